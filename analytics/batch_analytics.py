@@ -3,19 +3,29 @@ Analytics - Big Data Analysis Scripts
 Batch processing and reporting
 """
 
+import argparse
 import asyncio
+import os
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
 from motor.motor_asyncio import AsyncIOMotorClient
 import pandas as pd
 from datetime import datetime
 import json
 
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://127.0.0.1:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "recruitment_db")
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "1000"))
+
 
 async def analyze_recruitment_trends():
     """Analyze recruitment trends using pandas"""
     
     # Connect to MongoDB
-    client = AsyncIOMotorClient("mongodb://127.0.0.1:27017")
-    db = client["recruitment_db"]
+    client = AsyncIOMotorClient(MONGODB_URL)
+    db = client[DATABASE_NAME]
     
     # 🔍 Debug info
     print(f"🔗 Connected to: {client.address}")
@@ -120,7 +130,170 @@ async def analyze_recruitment_trends():
     # ✅ Supprimé : client.close() — inutile ici
 
 
+class StageProfiler:
+    """Record wall time and peak Python memory of each pipeline stage"""
+    
+    def __init__(self):
+        self.stages = []
+    
+    @contextmanager
+    def stage(self, name):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        yield
+        _, peak = tracemalloc.get_traced_memory()
+        self.stages.append({
+            "stage": name,
+            "seconds": round(time.perf_counter() - start, 3),
+            "peak_memory_mb": round(peak / 1024 / 1024, 2)
+        })
+
+
+async def count_skills(collection, field, batch_size):
+    """Count skill occurrences with an $unwind/$group aggregation run by Mongo"""
+    cursor = collection.aggregate([
+        {"$unwind": f"${field}"},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+    ], allowDiskUse=True, batchSize=batch_size)
+    return Counter({item["_id"]: item["count"] async for item in cursor})
+
+
+async def analyze_recruitment_trends_streaming(batch_size=ANALYTICS_BATCH_SIZE):
+    """Analyze recruitment trends with bounded memory.
+    
+    Counts, groupings and skill occurrences run as Mongo aggregations whose
+    results are read in cursor batches of `batch_size`, so no stage holds the
+    full collections in memory.
+    """
+    
+    client = AsyncIOMotorClient(MONGODB_URL)
+    try:
+        await _analyze_streaming(client[DATABASE_NAME], batch_size)
+    finally:
+        client.close()
+
+
+async def _analyze_streaming(db, batch_size):
+    profiler = StageProfiler()
+    tracemalloc.start()
+    
+    print(f"🔗 Connected to: {MONGODB_URL}")
+    print(f"📦 Using database: {db.name} (batch size {batch_size})")
+    
+    with profiler.stage("candidates_overview"):
+        overview = await db.candidates.aggregate([
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "avg_experience": {"$avg": "$experience_years"},
+                "max_experience": {"$max": "$experience_years"}
+            }}
+        ]).to_list(length=1)
+        candidates_overview = overview[0] if overview else {"count": 0}
+    
+    with profiler.stage("candidate_skills"):
+        candidate_skills = await count_skills(db.candidates, "skills", batch_size)
+    
+    with profiler.stage("jobs_overview"):
+        jobs_by_status = {
+            item["_id"]: item["count"]
+            async for item in db.jobs.aggregate([
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ])
+        }
+    
+    with profiler.stage("job_skills"):
+        required_skills = await count_skills(db.jobs, "required_skills", batch_size)
+    
+    with profiler.stage("monthly_candidates"):
+        monthly_candidates = {
+            item["_id"]: item["count"]
+            async for item in db.candidates.aggregate([
+                {"$match": {"created_at": {"$type": "date"}}},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id": 1}}
+            ], allowDiskUse=True)
+        }
+    
+    with profiler.stage("skills_gap"):
+        high_demand = sorted(set(required_skills) - set(candidate_skills))
+    
+    tracemalloc.stop()
+    
+    total_candidates = candidates_overview["count"]
+    total_jobs = sum(jobs_by_status.values())
+    top_skills = dict(candidate_skills.most_common(10))
+    top_req_skills = dict(required_skills.most_common(10))
+    
+    print("=" * 60)
+    print("📊 BIG DATA ANALYTICS REPORT (streaming)")
+    print("=" * 60)
+    
+    print("\n🎯 CANDIDATES ANALYSIS")
+    print(f"Total Candidates: {total_candidates}")
+    if total_candidates > 0:
+        print(f"Average Experience: {candidates_overview['avg_experience'] or 0:.2f} years")
+        print(f"Max Experience: {candidates_overview['max_experience']} years")
+        print("\nTop 10 Candidate Skills:")
+        for skill, count in top_skills.items():
+            print(f"  {skill}: {count}")
+    
+    print("\n💼 JOBS ANALYSIS")
+    print(f"Total Jobs: {total_jobs}")
+    if total_jobs > 0:
+        print(f"Active Jobs: {jobs_by_status.get('active', 0)}")
+        print("\nTop 10 Required Skills:")
+        for skill, count in top_req_skills.items():
+            print(f"  {skill}: {count}")
+    
+    print("\n⚠️ SKILLS GAP ANALYSIS")
+    if high_demand:
+        print("High demand, low supply skills:")
+        for skill in high_demand[:10]:
+            print(f"  ⚡ {skill}")
+    
+    print("\n📈 TREND ANALYSIS")
+    print("\nCandidates per month:")
+    for month, count in monthly_candidates.items():
+        print(f"  {month}: {count}")
+    
+    print("\n⏱️ STAGES")
+    for stage in profiler.stages:
+        print(f"  {stage['stage']}: {stage['seconds']}s, peak {stage['peak_memory_mb']} MB")
+    
+    print("\n" + "=" * 60)
+    
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "mode": "streaming",
+        "total_candidates": total_candidates,
+        "total_jobs": total_jobs,
+        "top_candidate_skills": top_skills,
+        "top_required_skills": top_req_skills,
+        "candidates_per_month": monthly_candidates,
+        "stages": profiler.stages
+    }
+    
+    with open("analytics_report.json", "w") as f:
+        json.dump(report, f, indent=2)
+    
+    print("📄 Report saved to analytics_report.json")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recruitment batch analytics")
+    parser.add_argument("--stream", action="store_true",
+                        help="chunked streaming mode with bounded memory")
+    parser.add_argument("--batch-size", type=int, default=ANALYTICS_BATCH_SIZE,
+                        help="documents per chunk in streaming mode")
+    args = parser.parse_args()
+    
     print("🚀 Starting Big Data Analytics Pipeline...")
-    asyncio.run(analyze_recruitment_trends())
+    if args.stream:
+        asyncio.run(analyze_recruitment_trends_streaming(args.batch_size))
+    else:
+        asyncio.run(analyze_recruitment_trends())
     print("✅ Analysis completed!")
\ No newline at end of file
@@ -0,0 +1,457 @@
+"""
+Analytics - Incremental Batch Pipeline
+Watermark-based processing with columnar snapshots
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from batch_analytics import (
+    ANALYTICS_BATCH_SIZE,
+    DATABASE_NAME,
+    MONGODB_URL,
+    StageProfiler,
+)
+
+OUTPUT_DIR = os.getenv("ANALYTICS_OUTPUT_DIR", "analytics_output")
+# Documents changed this long before the newest one seen are read again by
+# the next run, in case their write committed after the scan went past them
+WATERMARK_OVERLAP = timedelta(seconds=int(os.getenv("ANALYTICS_WATERMARK_OVERLAP", "300")))
+
+# Snapshot columns per collection ("_id" is always stored)
+COLUMNS = {
+    "candidates": {
+        "created_at": "datetime",
+        "updated_at": "datetime",
+        "experience_years": "int",
+        "skills": "list",
+        "location": "str",
+        "education": "str",
+    },
+    "jobs": {
+        "created_at": "datetime",
+        "updated_at": "datetime",
+        "status": "str",
+        "company": "str",
+        "remote": "bool",
+        "min_experience": "int",
+        "required_skills": "list",
+    },
+}
+
+
+# ---------------------------------------------------------------------------
+# Columnar snapshots
+# ---------------------------------------------------------------------------
+
+def write_partition(output_dir, collection, part_name, documents):
+    """Write one chunk of documents as one .npy file per column, returns its path.
+
+    Snapshots are partitioned by processing day; list columns are stored
+    flattened with an `<name>_offsets.npy` index.
+    """
+    day = datetime.utcnow().strftime("%Y-%m-%d")
+    path = Path(output_dir) / "snapshots" / collection / f"date={day}" / part_name
+    path.mkdir(parents=True, exist_ok=True)
+
+    np.save(path / "_id.npy", np.array([str(doc["_id"]) for doc in documents]))
+    for name, kind in COLUMNS[collection].items():
+        values = [doc.get(name) for doc in documents]
+        if kind == "list":
+            lists = [value or [] for value in values]
+            np.save(path / f"{name}.npy", np.array([item for items in lists for item in items], dtype=str))
+            np.save(path / f"{name}_offsets.npy", np.cumsum([0] + [len(items) for items in lists]))
+        elif kind == "datetime":
+            np.save(path / f"{name}.npy", np.array(values, dtype="datetime64[ms]"))
+        elif kind == "int":
+            np.save(path / f"{name}.npy", np.array([value or 0 for value in values], dtype=np.int64))
+        elif kind == "bool":
+            np.save(path / f"{name}.npy", np.array([bool(value) for value in values]))
+        else:
+            np.save(path / f"{name}.npy", np.array(["" if value is None else str(value) for value in values]))
+    return path
+
+
+def list_partitions(output_dir, collection):
+    """Partition directories of a collection, oldest first"""
+    root = Path(output_dir) / "snapshots" / collection
+    return sorted(root.glob("date=*/part-*"), key=lambda path: path.name)
+
+
+def _load_column(path, name, kind):
+    values = np.load(path / f"{name}.npy")
+    if kind != "list":
+        return values
+    offsets = np.load(path / f"{name}_offsets.npy")
+    return [list(items) for items in np.split(values, offsets[1:-1])]
+
+
+def load_columns(collection, columns, output_dir=OUTPUT_DIR, latest_only=True):
+    """Load selected snapshot columns across all partitions.
+
+    Only the requested columns are read from disk. With `latest_only`, each
+    document appears once, in its most recent version.
+    """
+    kinds = COLUMNS[collection]
+    ids, data = [], {name: [] for name in columns}
+    for path in list_partitions(output_dir, collection):
+        ids.append(np.load(path / "_id.npy"))
+        for name in columns:
+            column = _load_column(path, name, kinds[name])
+            if kinds[name] == "list":
+                data[name].extend(column)
+            else:
+                data[name].append(column)
+
+    if not ids:
+        return {"_id": np.array([], dtype=str), **{name: [] for name in columns}}
+
+    all_ids = np.concatenate(ids)
+    result = {"_id": all_ids}
+    for name in columns:
+        result[name] = data[name] if kinds[name] == "list" else np.concatenate(data[name])
+
+    if latest_only:
+        _, last_seen = np.unique(all_ids[::-1], return_index=True)
+        keep = np.sort(len(all_ids) - 1 - last_seen)
+        for name, values in result.items():
+            result[name] = [values[i] for i in keep] if isinstance(values, list) else values[keep]
+    return result
+
+
+class SnapshotIndex:
+    """Partition and row of the latest snapshot of every document of a collection.
+
+    Previous versions are then read from the partitions holding them only,
+    rather than by scanning every partition written so far. Each run saves
+    a new index file; state.json names the current one, so the index and
+    the aggregates are replaced together.
+    """
+
+    def __init__(self, output_dir, collection, name=None):
+        self.root = Path(output_dir) / "snapshots" / collection
+        self.pending = {}
+        if name is not None:
+            with np.load(self.root / name) as data:
+                self.ids, self.parts, self.rows = data["ids"], data["parts"], data["rows"]
+                self.partitions = [str(partition) for partition in data["partitions"]]
+        else:
+            self._scan()
+
+    def _scan(self):
+        """Build the index from the partitions (snapshots written without one)"""
+        self.partitions, ids, parts, rows = [], [], [], []
+        for number, path in enumerate(list_partitions(self.root.parent.parent, self.root.name)):
+            part_ids = np.load(path / "_id.npy")
+            self.partitions.append(str(path.relative_to(self.root)))
+            ids.append(part_ids)
+            parts.append(np.full(len(part_ids), number, dtype=np.int32))
+            rows.append(np.arange(len(part_ids), dtype=np.int32))
+        self.ids, self.parts, self.rows = self._latest(ids, parts, rows)
+
+    @staticmethod
+    def _latest(ids, parts, rows):
+        if not ids:
+            return np.array([], dtype="U24"), np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+        ids, parts, rows = np.concatenate(ids), np.concatenate(parts), np.concatenate(rows)
+        # Sorted unique ids, keeping the last occurrence of each
+        unique, last_seen = np.unique(ids[::-1], return_index=True)
+        keep = len(ids) - 1 - last_seen
+        return unique, parts[keep], rows[keep]
+
+    def locate(self, wanted_ids):
+        """{id: (partition, row)} of the documents of `wanted_ids` already snapshotted"""
+        found = {}
+        if len(self.ids) and wanted_ids:
+            wanted = np.array(wanted_ids)
+            positions = np.minimum(np.searchsorted(self.ids, wanted), len(self.ids) - 1)
+            for doc_id, position in zip(wanted, positions):
+                if self.ids[position] == doc_id:
+                    found[str(doc_id)] = (self.partitions[self.parts[position]], int(self.rows[position]))
+        for doc_id in wanted_ids:
+            if doc_id in self.pending:
+                found[doc_id] = self.pending[doc_id]
+        return found
+
+    def add(self, path, ids):
+        partition = str(Path(path).relative_to(self.root))
+        for row, doc_id in enumerate(ids):
+            self.pending[doc_id] = (partition, row)
+
+    def save(self, run_id):
+        """Write the index including this run's partitions, returns its file name"""
+        partitions = list(self.partitions)
+        numbers = {partition: number for number, partition in enumerate(partitions)}
+        for partition, _ in self.pending.values():
+            if partition not in numbers:
+                numbers[partition] = len(partitions)
+                partitions.append(partition)
+        new_ids = list(self.pending)
+        self.ids, self.parts, self.rows = self._latest(
+            [self.ids, np.array(new_ids, dtype="U24")],
+            [self.parts, np.array([numbers[self.pending[i][0]] for i in new_ids], dtype=np.int32)],
+            [self.rows, np.array([self.pending[i][1] for i in new_ids], dtype=np.int32)]
+        )
+        self.partitions, self.pending = partitions, {}
+
+        name = f"_index-{run_id}.npz"
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / name, "wb") as f:
+            np.savez(f, ids=self.ids, parts=self.parts, rows=self.rows, partitions=np.array(partitions, dtype=str))
+        return name
+
+    def prune(self, keep):
+        """Delete index files other than `keep` (left by earlier or failed runs)"""
+        for path in self.root.glob("_index-*.npz"):
+            if path.name != keep:
+                path.unlink()
+
+
+def previous_versions(output_dir, collection, index, wanted_ids):
+    """Latest snapshotted version of each document in `wanted_ids`"""
+    kinds = COLUMNS[collection]
+    by_partition = {}
+    for doc_id, (partition, row) in index.locate(wanted_ids).items():
+        by_partition.setdefault(partition, []).append((doc_id, row))
+    rows = {}
+    for partition, located in by_partition.items():
+        path = index.root / partition
+        columns = {name: _load_column(path, name, kind) for name, kind in kinds.items()}
+        for doc_id, row in located:
+            rows[doc_id] = {name: values[row] for name, values in columns.items()}
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Mergeable aggregates
+# ---------------------------------------------------------------------------
+
+def _month(value):
+    if value is None:
+        return None
+    value = np.datetime64(value, "M")
+    return None if np.isnat(value) else str(value)
+
+
+def empty_aggregates():
+    return {
+        "candidates": {"count": 0, "experience": Counter(), "skills": Counter(), "months": Counter()},
+        "jobs": {"count": 0, "status": Counter(), "companies": Counter(), "skills": Counter(), "months": Counter()},
+    }
+
+
+def apply_candidate(aggregates, row, sign):
+    """Add (sign=1) or retract (sign=-1) one candidate version"""
+    agg = aggregates["candidates"]
+    agg["count"] += sign
+    agg["experience"][str(int(row.get("experience_years") or 0))] += sign
+    for skill in row.get("skills") or []:
+        agg["skills"][str(skill)] += sign
+    month = _month(row.get("created_at"))
+    if month:
+        agg["months"][month] += sign
+
+
+def apply_job(aggregates, row, sign):
+    """Add (sign=1) or retract (sign=-1) one job version"""
+    agg = aggregates["jobs"]
+    agg["count"] += sign
+    agg["status"][str(row.get("status"))] += sign
+    agg["companies"][str(row.get("company"))] += sign
+    for skill in row.get("required_skills") or []:
+        agg["skills"][str(skill)] += sign
+    month = _month(row.get("created_at"))
+    if month:
+        agg["months"][month] += sign
+
+
+APPLY = {"candidates": apply_candidate, "jobs": apply_job}
+
+
+def load_state(output_dir):
+    """Watermark, aggregates and snapshot index file of each collection"""
+    path = Path(output_dir) / "state.json"
+    if not path.exists():
+        return None, empty_aggregates(), {}
+    with open(path) as f:
+        state = json.load(f)
+    aggregates = empty_aggregates()
+    for collection, values in state["aggregates"].items():
+        for name, value in values.items():
+            aggregates[collection][name] = Counter(value) if isinstance(value, dict) else value
+    watermark = state["watermark"] and datetime.fromisoformat(state["watermark"])
+    return watermark, aggregates, state.get("indexes", {})
+
+
+def save_state(output_dir, watermark, aggregates, indexes):
+    """Persist the watermark, aggregates and index file names atomically"""
+    serializable = {
+        collection: {
+            name: {k: v for k, v in value.items() if v} if isinstance(value, Counter) else value
+            for name, value in values.items()
+        }
+        for collection, values in aggregates.items()
+    }
+    path = Path(output_dir) / "state.json"
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "watermark": watermark and watermark.isoformat(),
+            "aggregates": serializable,
+            "indexes": indexes
+        }, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+def changes_query(watermark):
+    """Documents changed since `watermark` (all of them without one).
+
+    Documents written without `updated_at` are picked up by the creation
+    time in their ObjectId; later changes to them go unnoticed until a
+    full run.
+    """
+    if watermark is None:
+        return {}
+    return {"$or": [
+        {"updated_at": {"$gte": watermark}},
+        {"updated_at": None, "_id": {"$gte": ObjectId.from_datetime(watermark)}}
+    ]}
+
+
+def _changed_at(doc):
+    if isinstance(doc.get("updated_at"), datetime):
+        return doc["updated_at"]
+    return doc["_id"].generation_time.replace(tzinfo=None)
+
+
+async def iter_batches(cursor, batch_size):
+    """Yield documents from a cursor in lists of at most `batch_size` (one partition each)"""
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def run_incremental(output_dir=OUTPUT_DIR, batch_size=ANALYTICS_BATCH_SIZE, full=False, db=None):
+    """Process documents changed since the last watermark.
+
+    Updated documents retract their previously snapshotted version from the
+    aggregates before adding the new one, so documents read again (the
+    watermark overlap) are not counted twice. The next watermark comes from
+    the `updated_at` values seen, not from this machine's clock. Deletions
+    are not visible to a watermark; run with `full=True` to rebuild from
+    scratch.
+    """
+    if full and Path(output_dir).exists():
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    client = None
+    if db is None:
+        client = AsyncIOMotorClient(MONGODB_URL)
+        db = client[DATABASE_NAME]
+    profiler = StageProfiler()
+    tracemalloc.start()
+
+    watermark, aggregates, index_names = load_state(output_dir)
+    run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    newest = None
+    processed = {}
+    indexes = {}
+
+    print(f"🔗 Connected to: {MONGODB_URL}")
+    print(f"🕒 Watermark: {watermark.isoformat() if watermark else 'none (full run)'}")
+
+    for collection, columns in COLUMNS.items():
+        projection = {name: 1 for name in columns}
+
+        processed[collection] = 0
+        with profiler.stage(collection):
+            indexes[collection] = index = SnapshotIndex(output_dir, collection, index_names.get(collection))
+            cursor = db[collection].find(changes_query(watermark), projection).batch_size(batch_size)
+            part = 0
+            async for batch in iter_batches(cursor, batch_size):
+                ids = [str(doc["_id"]) for doc in batch]
+                previous = previous_versions(output_dir, collection, index, ids)
+
+                for doc in batch:
+                    old = previous.get(str(doc["_id"]))
+                    if old is not None:
+                        APPLY[collection](aggregates, old, -1)
+                    APPLY[collection](aggregates, doc, 1)
+                    changed_at = _changed_at(doc)
+                    if newest is None or changed_at > newest:
+                        newest = changed_at
+
+                path = write_partition(output_dir, collection, f"part-{run_id}-{part:05d}", batch)
+                index.add(path, ids)
+                part += 1
+                processed[collection] += len(batch)
+
+    tracemalloc.stop()
+    if client is not None:
+        client.close()
+    new_watermark = watermark
+    if newest is not None and (watermark is None or newest - WATERMARK_OVERLAP > watermark):
+        new_watermark = newest - WATERMARK_OVERLAP
+    index_names = {collection: index.save(run_id) for collection, index in indexes.items()}
+    save_state(output_dir, new_watermark, aggregates, index_names)
+    for collection, index in indexes.items():
+        index.prune(index_names[collection])
+
+    candidates, jobs = aggregates["candidates"], aggregates["jobs"]
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "mode": "incremental",
+        "watermark": new_watermark and new_watermark.isoformat(),
+        "processed": processed,
+        "total_candidates": candidates["count"],
+        "total_jobs": jobs["count"],
+        "top_candidate_skills": dict(candidates["skills"].most_common(10)),
+        "top_required_skills": dict(jobs["skills"].most_common(10)),
+        "jobs_by_status": {k: v for k, v in jobs["status"].items() if v},
+        "candidates_per_month": dict(sorted((k, v) for k, v in candidates["months"].items() if v)),
+        "stages": profiler.stages
+    }
+    with open(Path(output_dir) / "analytics_report.json", "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📊 Processed {processed['candidates']} candidates, {processed['jobs']} jobs")
+    print(f"🎯 Total Candidates: {report['total_candidates']}")
+    print(f"💼 Total Jobs: {report['total_jobs']}")
+    print(f"📄 Report saved to {Path(output_dir) / 'analytics_report.json'}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental recruitment analytics")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                        help="directory holding state.json and snapshots")
+    parser.add_argument("--batch-size", type=int, default=ANALYTICS_BATCH_SIZE,
+                        help="documents per chunk and snapshot part")
+    parser.add_argument("--full", action="store_true",
+                        help="discard state and snapshots and reprocess everything")
+    args = parser.parse_args()
+
+    print("🚀 Starting Incremental Analytics Pipeline...")
+    asyncio.run(run_incremental(args.output_dir, args.batch_size, args.full))
+    print("✅ Analysis completed!")
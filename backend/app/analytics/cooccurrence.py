@@ -0,0 +1,128 @@
+"""
+Skill co-occurrence analytics.
+
+Jobs (or candidates) and their skills form a sparse binary entity x skill
+matrix X. One sparse product X^T X gives, for every pair of skills, the number
+of entities listing both; the diagonal holds per-skill counts. Pairs are scored
+by lift, c(a, b) * N / (c(a) * c(b)), and its log (PMI). The top-k neighbors of
+each skill are stored in the ``skill_cooccurrence`` collection.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+import numpy as np
+from pymongo import ReplaceOne
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+COLLECTION = "skill_cooccurrence"
+
+# Source name -> (collection, skills field)
+SOURCES = {
+    "jobs": ("jobs", "required_skills"),
+    "candidates": ("candidates", "skills"),
+}
+
+
+def build_skill_matrix(skill_lists: Iterable[List[str]]) -> Tuple["sparse.csr_matrix", List[str]]:
+    """Binary entity x skill CSR matrix and its column labels"""
+    from scipy import sparse
+
+    vocabulary: Dict[str, int] = {}
+    indices: List[int] = []
+    indptr = [0]
+    for skills in skill_lists:
+        columns = {vocabulary.setdefault(skill, len(vocabulary)) for skill in skills or []}
+        indices.extend(sorted(columns))
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), indices, indptr),
+        shape=(len(indptr) - 1, len(vocabulary))
+    )
+    return matrix, list(vocabulary)
+
+
+def compute_neighbors(matrix: "sparse.csr_matrix",
+                      skills: List[str],
+                      top_k: int = 10,
+                      min_count: int = 2) -> Dict[str, Dict]:
+    """Top-k co-occurring skills per skill, ranked by lift.
+
+    Pairs seen in fewer than `min_count` entities are ignored, since lift is
+    unreliable for rare pairs.
+    """
+    n_entities = matrix.shape[0]
+    cooccurrence = (matrix.T @ matrix).tocsr()
+    counts = cooccurrence.diagonal().astype(np.float64)
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+
+    results = {}
+    for i, skill in enumerate(skills):
+        start, end = cooccurrence.indptr[i], cooccurrence.indptr[i + 1]
+        neighbor_ids = cooccurrence.indices[start:end]
+        pair_counts = cooccurrence.data[start:end]
+
+        keep = pair_counts >= min_count
+        neighbor_ids, pair_counts = neighbor_ids[keep], pair_counts[keep]
+        lift = pair_counts * n_entities / (counts[i] * counts[neighbor_ids])
+
+        order = np.argsort(-lift, kind="stable")[:top_k]
+        results[skill] = {
+            "count": int(counts[i]),
+            "neighbors": [
+                {
+                    "skill": skills[neighbor_ids[j]],
+                    "count": int(pair_counts[j]),
+                    "confidence": round(float(pair_counts[j] / counts[i]), 4),
+                    "lift": round(float(lift[j]), 4),
+                    "pmi": round(float(np.log(lift[j])), 4)
+                }
+                for j in order
+            ]
+        }
+    return results
+
+
+async def refresh_cooccurrence(db, top_k: int = 10, min_count: int = 2) -> int:
+    """Recompute and store neighbors for every source, returns skill count"""
+    stored = 0
+    computed_at = datetime.utcnow()
+    loop = asyncio.get_running_loop()
+
+    for source, (collection, field) in SOURCES.items():
+        skill_lists = [
+            doc.get(field, [])
+            async for doc in db[collection].find({}, {field: 1, "_id": 0})
+        ]
+        matrix, skills = build_skill_matrix(skill_lists)
+        del skill_lists
+
+        # CPU-bound sparse algebra runs off the event loop
+        neighbors = await loop.run_in_executor(
+            None, compute_neighbors, matrix, skills, top_k, min_count
+        )
+
+        operations = [
+            ReplaceOne(
+                {"_id": f"{source}:{skill}"},
+                {"source": source, "skill": skill, "computed_at": computed_at, **data},
+                upsert=True
+            )
+            for skill, data in neighbors.items()
+        ]
+        if operations:
+            await db[COLLECTION].bulk_write(operations, ordered=False)
+        stored += len(operations)
+
+    await db[COLLECTION].delete_many({"computed_at": {"$lt": computed_at}})
+    return stored
+
+
+async def get_cooccurrence(db, source: str, skill: str):
+    """Stored neighbors of a skill, or None"""
+    return await db[COLLECTION].find_one({"_id": f"{source}:{skill}"})
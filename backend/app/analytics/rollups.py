@@ -0,0 +1,185 @@
+"""
+Daily time-series rollups for candidates and jobs.
+
+Each rollup document counts one event type for one day, optionally broken
+down by a key::
+
+    {"day": 2024-05-01T00:00, "metric": "jobs_by_company", "key": "TechCorp", "count": 3}
+
+Rollups record what happened on a day (creations, status transitions, skill
+mentions); deleting a document later does not rewrite history. Write paths
+increment them through ``app.utils.events``; ``rebuild_rollups`` backfills
+them from the raw collections.
+"""
+
+from collections import Counter
+from datetime import date, datetime, time
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+COLLECTION = "analytics_rollups"
+
+# Metric name -> whether it is broken down by key
+METRICS = {
+    "candidates_new": False,
+    "candidate_skills": True,
+    "jobs_new": False,
+    "jobs_by_status": True,
+    "jobs_by_company": True,
+    "jobs_by_remote": True,
+    "job_skills": True,
+}
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def day_start(value: Optional[datetime] = None) -> datetime:
+    """Midnight (UTC) of the day `value` falls on, today by default"""
+    value = value or datetime.utcnow()
+    return datetime.combine(value.date(), time.min)
+
+
+def _added(before: List[str], after: List[str]) -> List[str]:
+    return list((Counter(after) - Counter(before)).elements())
+
+
+def candidate_events(before: Optional[Dict], after: Optional[Dict]) -> Counter:
+    """(metric, key) increments produced by a candidate write"""
+    events = Counter()
+    if after is None:
+        return events
+    if before is None:
+        events[("candidates_new", None)] += 1
+    for skill in _added((before or {}).get("skills", []), after.get("skills", [])):
+        events[("candidate_skills", skill)] += 1
+    return events
+
+
+def job_events(before: Optional[Dict], after: Optional[Dict]) -> Counter:
+    """(metric, key) increments produced by a job write"""
+    events = Counter()
+    if after is None:
+        return events
+    if before is None:
+        events[("jobs_new", None)] += 1
+        events[("jobs_by_company", after.get("company"))] += 1
+        events[("jobs_by_remote", "remote" if after.get("remote") else "onsite")] += 1
+    if before is None or before.get("status") != after.get("status"):
+        events[("jobs_by_status", after.get("status"))] += 1
+    for skill in _added((before or {}).get("required_skills", []), after.get("required_skills", [])):
+        events[("job_skills", skill)] += 1
+    return events
+
+
+async def _increment(db, day: datetime, events: Counter):
+    if not events:
+        return
+    operations = [
+        UpdateOne(
+            {"day": day, "metric": metric, "key": key},
+            {"$inc": {"count": count}},
+            upsert=True
+        )
+        for (metric, key), count in events.items()
+    ]
+    await db[COLLECTION].bulk_write(operations, ordered=False)
+
+
+async def apply_candidate_change(db, before: Optional[Dict], after: Optional[Dict]):
+    """Record a candidate write in today's rollups"""
+    await _increment(db, day_start(), candidate_events(before, after))
+
+
+async def apply_job_change(db, before: Optional[Dict], after: Optional[Dict]):
+    """Record a job write in today's rollups"""
+    await _increment(db, day_start(), job_events(before, after))
+
+
+async def query_timeseries(db,
+                           metrics: List[str],
+                           start: date,
+                           end: date,
+                           granularity: str = "day") -> Dict[str, List[Dict]]:
+    """Aggregate rollups between `start` and `end` (inclusive) per period"""
+    pipeline = [
+        {"$match": {
+            "metric": {"$in": metrics},
+            "day": {
+                "$gte": datetime.combine(start, time.min),
+                "$lte": datetime.combine(end, time.min)
+            }
+        }},
+        {"$group": {
+            "_id": {
+                "metric": "$metric",
+                "key": "$key",
+                "period": {"$dateTrunc": {
+                    "date": "$day",
+                    "unit": granularity,
+                    "startOfWeek": "monday"
+                }}
+            },
+            "count": {"$sum": "$count"}
+        }},
+        {"$sort": {"_id.period": 1, "count": -1}}
+    ]
+
+    series: Dict[str, List[Dict]] = {metric: [] for metric in metrics}
+    async for item in db[COLLECTION].aggregate(pipeline):
+        point = {"period": item["_id"]["period"].date().isoformat(), "count": item["count"]}
+        if METRICS[item["_id"]["metric"]]:
+            point["key"] = item["_id"]["key"]
+        series[item["_id"]["metric"]].append(point)
+    return series
+
+
+async def rebuild_rollups(db) -> int:
+    """Backfill rollups from the raw collections, returns rollup count.
+
+    Raw documents only keep their current state, so skills and job status
+    are attributed to the creation day.
+    """
+    day = {"$dateTrunc": {"date": "$created_at", "unit": "day"}}
+
+    def grouped(metric: str, key) -> List[Dict]:
+        return [
+            {"$group": {"_id": {"day": day, "key": key}, "count": {"$sum": 1}}},
+            {"$addFields": {"metric": metric}}
+        ]
+
+    candidate_pipelines = [
+        grouped("candidates_new", None),
+        [{"$unwind": "$skills"}] + grouped("candidate_skills", "$skills"),
+    ]
+    job_pipelines = [
+        grouped("jobs_new", None),
+        grouped("jobs_by_status", "$status"),
+        grouped("jobs_by_company", "$company"),
+        grouped("jobs_by_remote", {"$cond": ["$remote", "remote", "onsite"]}),
+        [{"$unwind": "$required_skills"}] + grouped("job_skills", "$required_skills"),
+    ]
+
+    rows = []
+    for collection, pipelines in ((db.candidates, candidate_pipelines), (db.jobs, job_pipelines)):
+        for pipeline in pipelines:
+            rows.extend(await collection.aggregate(pipeline).to_list(length=None))
+
+    await db[COLLECTION].delete_many({})
+    if rows:
+        await db[COLLECTION].insert_many([
+            {"day": row["_id"]["day"], "metric": row["metric"], "key": row["_id"]["key"], "count": row["count"]}
+            for row in rows
+        ])
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import asyncio
+    from app.database import connect_to_database, get_database
+
+    async def main():
+        await connect_to_database()
+        print(f"Rebuilt {await rebuild_rollups(await get_database())} rollups")
+
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Materialized per-skill demand and supply counters.
+
+Demand is the number of active jobs requiring a skill, supply the number of
+candidates listing it. Counters live in the ``skill_counters`` collection and
+are updated with ``$inc`` from the write paths; ``reconcile_skill_counters``
+rebuilds them from the source collections to correct any drift.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+COLLECTION = "skill_counters"
+
+
+def job_demand(job: Optional[Dict]) -> Counter:
+    """Skills a job contributes to demand (only active jobs count)"""
+    if not job or job.get("status") != "active":
+        return Counter()
+    return Counter(job.get("required_skills", []))
+
+
+def candidate_supply(candidate: Optional[Dict]) -> Counter:
+    """Skills a candidate contributes to supply"""
+    if not candidate:
+        return Counter()
+    return Counter(candidate.get("skills", []))
+
+
+def counter_deltas(before: Counter, after: Counter) -> Dict[str, int]:
+    """Per-skill increments turning `before` into `after`, zeros omitted"""
+    deltas = {}
+    for skill in set(before) | set(after):
+        diff = after[skill] - before[skill]
+        if diff:
+            deltas[skill] = diff
+    return deltas
+
+
+async def _apply_deltas(db, field: str, deltas: Dict[str, int]):
+    if not deltas:
+        return
+    operations = [
+        UpdateOne({"_id": skill}, {"$inc": {field: delta}}, upsert=True)
+        for skill, delta in deltas.items()
+    ]
+    await db[COLLECTION].bulk_write(operations, ordered=False)
+
+
+async def apply_candidate_change(db, before: Optional[Dict], after: Optional[Dict]):
+    """Update supply counters for a created, updated or deleted candidate"""
+    deltas = counter_deltas(candidate_supply(before), candidate_supply(after))
+    await _apply_deltas(db, "supply", deltas)
+
+
+async def apply_job_change(db, before: Optional[Dict], after: Optional[Dict]):
+    """Update demand counters for a created, updated or deleted job"""
+    deltas = counter_deltas(job_demand(before), job_demand(after))
+    await _apply_deltas(db, "demand", deltas)
+
+
+async def get_skill_counters(db) -> List[Dict]:
+    """All skills with non-zero demand or supply"""
+    cursor = db[COLLECTION].find({
+        "$or": [{"demand": {"$gt": 0}}, {"supply": {"$gt": 0}}]
+    })
+    return await cursor.to_list(length=None)
+
+
+async def reconcile_skill_counters(db) -> int:
+    """Recompute all counters from jobs and candidates, returns skill count.
+
+    Writes racing with the reconciliation may be overwritten; the resulting
+    drift is corrected by the next run.
+    """
+    demand = await db.jobs.aggregate([
+        {"$match": {"status": "active"}},
+        {"$unwind": "$required_skills"},
+        {"$group": {"_id": "$required_skills", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+    supply = await db.candidates.aggregate([
+        {"$unwind": "$skills"},
+        {"$group": {"_id": "$skills", "count": {"$sum": 1}}}
+    ]).to_list(length=None)
+
+    counters: Dict[str, Dict[str, int]] = {}
+    for item in demand:
+        counters.setdefault(item["_id"], {"demand": 0, "supply": 0})["demand"] = item["count"]
+    for item in supply:
+        counters.setdefault(item["_id"], {"demand": 0, "supply": 0})["supply"] = item["count"]
+
+    if counters:
+        operations = [
+            UpdateOne({"_id": skill}, {"$set": values}, upsert=True)
+            for skill, values in counters.items()
+        ]
+        await db[COLLECTION].bulk_write(operations, ordered=False)
+    await db[COLLECTION].delete_many({"_id": {"$nin": list(counters)}})
+
+    return len(counters)
@@ -0,0 +1,121 @@
+"""
+Sliding-window trending skills backed by Redis.
+
+Skill mentions are counted in one sorted set per source and UTC day
+(``trending:{source}:{YYYYMMDD}``); distinct candidates per skill and day are
+kept in HyperLogLogs (``trending:hll:{skill}:{YYYYMMDD}``). A skill removed
+from a profile or job is counted down in today's bucket, so windows hold net
+mentions; distinct counts only ever grow (a HyperLogLog cannot forget). Every key expires
+after ``RETENTION_DAYS``, so memory is bounded by skills x days and a query
+touches at most one key per day of the window, whatever the data volume.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.analytics.skill_counters import counter_deltas
+
+SOURCES = ("candidates", "jobs")
+WINDOWS = (7, 30, 90)
+RETENTION_DAYS = max(WINDOWS) + 1
+MAX_LIMIT = 100  # skills per query
+TMP_KEY_TTL = 60  # seconds, window unions are reused by concurrent queries
+
+
+def _day(offset: int = 0, now: Optional[datetime] = None) -> str:
+    return ((now or datetime.utcnow()) - timedelta(days=offset)).strftime("%Y%m%d")
+
+
+def mentions_key(source: str, day: str) -> str:
+    return f"trending:{source}:{day}"
+
+
+def hll_key(skill: str, day: str) -> str:
+    return f"trending:hll:{skill}:{day}"
+
+
+def record_mentions(redis, source: str, deltas: Dict[str, int], entity_id=None):
+    """Count skill mentions up or down (and distinct candidates) in today's buckets"""
+    if not deltas:
+        return
+    day = _day()
+    key = mentions_key(source, day)
+    ttl = RETENTION_DAYS * 86400
+
+    pipe = redis.pipeline(transaction=False)
+    for skill, delta in deltas.items():
+        pipe.zincrby(key, delta, skill)
+        if delta > 0 and source == "candidates" and entity_id is not None:
+            pipe.pfadd(hll_key(skill, day), str(entity_id))
+            pipe.expire(hll_key(skill, day), ttl)
+    pipe.expire(key, ttl)
+    pipe.execute()
+
+
+def _skill_deltas(before: Optional[Dict], after: Optional[Dict], field: str) -> Dict[str, int]:
+    return counter_deltas(
+        Counter((before or {}).get(field) or []),
+        Counter((after or {}).get(field) or [])
+    )
+
+
+def apply_candidate_change(redis, before: Optional[Dict], after: Optional[Dict]):
+    """Record skills a candidate gained or lost"""
+    entity_id = (after or before or {}).get("_id")
+    record_mentions(redis, "candidates", _skill_deltas(before, after, "skills"), entity_id)
+
+
+def apply_job_change(redis, before: Optional[Dict], after: Optional[Dict]):
+    """Record skills a job started or stopped requiring"""
+    record_mentions(redis, "jobs", _skill_deltas(before, after, "required_skills"))
+
+
+def _union(redis, source: str, first_day: int, days: int, now: datetime) -> str:
+    """Union of the daily sets for days [first_day, first_day + days) ago"""
+    dest = f"trending:tmp:{source}:{first_day}:{days}:{_day(now=now)}"
+    if not redis.exists(dest):
+        keys = [mentions_key(source, _day(offset, now)) for offset in range(first_day, first_day + days)]
+        pipe = redis.pipeline(transaction=False)
+        pipe.zunionstore(dest, keys)
+        pipe.expire(dest, TMP_KEY_TTL)
+        pipe.execute()
+    return dest
+
+
+def get_trending_skills(redis, source: str = "candidates", window: int = 7, limit: int = 20) -> List[Dict]:
+    """Top skills over the last `window` days with week-over-week deltas"""
+    now = datetime.utcnow()
+    window_key = _union(redis, source, 0, window, now)
+    # Skills only removed during the window net out at zero or below
+    top = redis.zrevrangebyscore(window_key, "+inf", "(0", start=0, num=limit, withscores=True)
+    if not top:
+        return []
+
+    skills = [skill for skill, _ in top]
+    this_week = redis.zmscore(_union(redis, source, 0, 7, now), skills)
+    previous_week = redis.zmscore(_union(redis, source, 7, 7, now), skills)
+
+    distinct = None
+    if source == "candidates":
+        pipe = redis.pipeline(transaction=False)
+        for skill in skills:
+            pipe.pfcount(*[hll_key(skill, _day(offset, now)) for offset in range(window)])
+        distinct = pipe.execute()
+
+    trending = []
+    for i, (skill, mentions) in enumerate(top):
+        current = int(this_week[i] or 0)
+        previous = int(previous_week[i] or 0)
+        item = {
+            "skill": skill,
+            "mentions": int(mentions),
+            "this_week": current,
+            "previous_week": previous,
+            "wow_delta": current - previous,
+            "wow_change_pct": round((current - previous) / previous * 100, 2) if previous else None
+        }
+        if distinct is not None:
+            item["distinct_candidates"] = distinct[i]
+        trending.append(item)
+    return trending
@@ -0,0 +1,124 @@
+from fastapi import APIRouter, HTTPException, Depends, Header
+from typing import Optional
+from datetime import datetime
+
+from app.config import settings
+from app.utils import memory, profiling
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is set"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling.check_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/profile")
+async def profile_process(seconds: float = 5.0):
+    """Sample the stacks of the whole process for `seconds` (collapsed format)"""
+    if not 0 < seconds <= settings.PROFILING_MAX_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be between 0 and {settings.PROFILING_MAX_SECONDS}"
+        )
+    
+    stacks = await profiling.sample_process(seconds)
+    return profiling.collapsed_response(stacks)
+
+
+@router.get("/profile/aggregate")
+async def get_profile_aggregate(previous: bool = False, reset: bool = False):
+    """Stacks of the sampled requests in the current (or previous) window, collapsed format"""
+    snapshot = profiling.aggregate.snapshot(previous)
+    if reset:
+        profiling.aggregate.reset()
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No completed profiling window")
+    
+    return profiling.collapsed_response(snapshot["stacks"], {
+        "X-Profile-Requests": str(snapshot["requests"]),
+        "X-Profile-Window-Start": datetime.utcfromtimestamp(snapshot["started_at"]).isoformat()
+    })
+
+
+def _snapshot_summary(entry, limit: int):
+    return {
+        "id": entry["id"],
+        "taken_at": datetime.utcfromtimestamp(entry["taken_at"]).isoformat(),
+        "traced_bytes": entry["traced_bytes"],
+        "peak_bytes": entry["peak_bytes"],
+        "top_modules": memory.top_modules(entry["snapshot"], limit)
+    }
+
+
+@router.get("/memory")
+async def get_memory_status():
+    """tracemalloc status and kept snapshots"""
+    traced, peak = memory.tracemalloc.get_traced_memory()
+    return {
+        "tracing": memory.tracemalloc.is_tracing(),
+        "traced_bytes": traced,
+        "peak_bytes": peak,
+        "snapshots": memory.list_snapshots()
+    }
+
+
+@router.post("/memory/tracing")
+async def start_memory_tracing(frames: int = 1):
+    """Start tracemalloc (slows allocations down while active)"""
+    memory.start_tracing(frames)
+    return {"tracing": True}
+
+
+@router.delete("/memory/tracing")
+async def stop_memory_tracing():
+    """Stop tracemalloc and drop the snapshots"""
+    memory.stop_tracing()
+    return {"tracing": False}
+
+
+@router.post("/memory/snapshots")
+async def take_memory_snapshot(limit: int = 20):
+    """Take a tracemalloc snapshot, returns the largest modules"""
+    try:
+        entry = memory.take_snapshot()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _snapshot_summary(entry, limit)
+
+
+@router.get("/memory/snapshots/{snapshot_id}")
+async def get_memory_snapshot(snapshot_id: int, limit: int = 20):
+    """Allocations of a snapshot grouped by module"""
+    entry = memory.get_snapshot(snapshot_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return _snapshot_summary(entry, limit)
+
+
+@router.get("/memory/diff")
+async def diff_memory_snapshots(base: int, target: Optional[int] = None, limit: int = 20):
+    """Growth per module between two snapshots (`target` defaults to a new one)"""
+    base_entry = memory.get_snapshot(base)
+    if not base_entry:
+        raise HTTPException(status_code=404, detail="Base snapshot not found")
+    if target is None:
+        try:
+            target_entry = memory.take_snapshot()
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+    else:
+        target_entry = memory.get_snapshot(target)
+        if not target_entry:
+            raise HTTPException(status_code=404, detail="Target snapshot not found")
+    
+    return {
+        "base": base_entry["id"],
+        "target": target_entry["id"],
+        "traced_bytes_diff": target_entry["traced_bytes"] - base_entry["traced_bytes"],
+        "modules": memory.diff_modules(base_entry["snapshot"], target_entry["snapshot"], limit)
+    }
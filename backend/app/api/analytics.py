@@ -1,16 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, List
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
 from bson import ObjectId
-import pandas as pd
 
-from app.database import get_database, get_redis
-import json
+from app.database import get_database, get_redis, get_redis_binary
+from app.analytics.skill_counters import get_skill_counters
+from app.analytics import cooccurrence, rollups, trending
+from app.utils import serialization
+from app.utils.serialization import cached_json_response
+from app.utils.http_cache import conditional
+from app.config import settings
 
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
 
+# Analytics change slowly, clients may reuse responses for a while
+ANALYTICS_MAX_AGE = settings.ANALYTICS_CACHE_MAX_AGE
 
-@router.get("/dashboard")
+
+@router.get(
+    "/dashboard",
+    dependencies=[Depends(conditional("candidates", "jobs", max_age=ANALYTICS_MAX_AGE, period=3600))]
+)
 async def get_dashboard_stats(db=Depends(get_database)):
     """Get dashboard statistics"""
     
@@ -49,11 +59,11 @@ async def get_dashboard_stats(db=Depends(get_database)):
     }
 
 
-@router.get("/skills-trends")
+@router.get("/skills-trends", dependencies=[Depends(conditional(max_age=ANALYTICS_MAX_AGE))])
 async def get_skills_trends(
     limit: int = 20,
     db=Depends(get_database),
-    redis=Depends(get_redis)
+    redis=Depends(get_redis_binary)
 ):
     """Get trending skills from jobs and candidates"""
     
@@ -61,7 +71,7 @@ async def get_skills_trends(
     cached_result = redis.get(cache_key)
     
     if cached_result:
-        return json.loads(cached_result)
+        return cached_json_response(cached_result)
     
     # Skills from jobs (demand)
     jobs_pipeline = [
@@ -102,12 +112,47 @@ async def get_skills_trends(
     }
     
     # Cache for 1 hour
-    redis.setex(cache_key, 3600, json.dumps(result))
+    payload = serialization.dumps(result)
+    redis.setex(cache_key, 3600, payload)
+    
+    return cached_json_response(payload)
+
+
+@router.get(
+    "/skills-trending",
+    dependencies=[Depends(conditional("candidates", "jobs", max_age=ANALYTICS_MAX_AGE, period=86400))]
+)
+async def get_trending_skills(
+    window: int = 7,
+    source: str = "candidates",
+    limit: int = Query(20, ge=1, le=trending.MAX_LIMIT),
+    redis=Depends(get_redis)
+):
+    """Get skills trending over a recent time window"""
+    
+    if window not in trending.WINDOWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid window. Allowed values: {list(trending.WINDOWS)}"
+        )
+    if source not in trending.SOURCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid source. Allowed values: {list(trending.SOURCES)}"
+        )
     
-    return result
+    return {
+        "window_days": window,
+        "source": source,
+        "trending_skills": trending.get_trending_skills(redis, source, window, limit),
+        "last_updated": datetime.utcnow().isoformat()
+    }
 
 
-@router.get("/hiring-metrics")
+@router.get(
+    "/hiring-metrics",
+    dependencies=[Depends(conditional("candidates", "jobs", max_age=ANALYTICS_MAX_AGE))]
+)
 async def get_hiring_metrics(db=Depends(get_database)):
     """Get hiring metrics and trends"""
     
@@ -171,42 +216,22 @@ async def get_hiring_metrics(db=Depends(get_database)):
     }
 
 
-@router.get("/skills-gap")
+@router.get(
+    "/skills-gap",
+    dependencies=[Depends(conditional("candidates", "jobs", max_age=ANALYTICS_MAX_AGE, period=3600))]
+)
 async def analyze_skills_gap(db=Depends(get_database)):
     """Analyze skills gap between demand and supply"""
     
-    # Get all required skills from jobs
-    job_skills_pipeline = [
-        {"$match": {"status": "active"}},
-        {"$unwind": "$required_skills"},
-        {"$group": {
-            "_id": "$required_skills",
-            "demand": {"$sum": 1}
-        }}
-    ]
-    
-    job_skills = await db.jobs.aggregate(job_skills_pipeline).to_list(length=None)
-    job_skills_dict = {item["_id"]: item["demand"] for item in job_skills}
-    
-    # Get all skills from candidates
-    candidate_skills_pipeline = [
-        {"$unwind": "$skills"},
-        {"$group": {
-            "_id": "$skills",
-            "supply": {"$sum": 1}
-        }}
-    ]
-    
-    candidate_skills = await db.candidates.aggregate(candidate_skills_pipeline).to_list(length=None)
-    candidate_skills_dict = {item["_id"]: item["supply"] for item in candidate_skills}
+    # Demand and supply are maintained incrementally by the write paths
+    counters = await get_skill_counters(db)
     
     # Calculate gap
-    all_skills = set(job_skills_dict.keys()) | set(candidate_skills_dict.keys())
-    
     skills_analysis = []
-    for skill in all_skills:
-        demand = job_skills_dict.get(skill, 0)
-        supply = candidate_skills_dict.get(skill, 0)
+    for counter in counters:
+        skill = counter["_id"]
+        demand = counter.get("demand", 0)
+        supply = counter.get("supply", 0)
         gap = demand - supply
         gap_percentage = (gap / demand * 100) if demand > 0 else 0
         
@@ -229,7 +254,82 @@ async def analyze_skills_gap(db=Depends(get_database)):
     }
 
 
-@router.get("/company-stats/{company_name}")
+@router.get(
+    "/timeseries",
+    dependencies=[Depends(conditional("candidates", "jobs", max_age=ANALYTICS_MAX_AGE, period=86400))]
+)
+async def get_timeseries(
+    metrics: str = "candidates_new,jobs_new",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    granularity: str = "day",
+    db=Depends(get_database)
+):
+    """Get activity over time from the daily rollups"""
+    
+    metric_list = [m.strip() for m in metrics.split(",") if m.strip()]
+    unknown = [m for m in metric_list if m not in rollups.METRICS]
+    if unknown or not metric_list:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown metrics: {unknown}. Available metrics: {list(rollups.METRICS)}"
+        )
+    if granularity not in rollups.GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid granularity. Allowed values: {list(rollups.GRANULARITIES)}"
+        )
+    
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=30)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    series = await rollups.query_timeseries(db, metric_list, start, end, granularity)
+    
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "granularity": granularity,
+        "series": series
+    }
+
+
+@router.get(
+    "/skill-cooccurrence/{skill}",
+    dependencies=[Depends(conditional(max_age=ANALYTICS_MAX_AGE))]
+)
+async def get_skill_cooccurrence(
+    skill: str,
+    source: str = "jobs",
+    limit: int = 10,
+    db=Depends(get_database)
+):
+    """Get skills that most often appear together with a skill"""
+    
+    if source not in cooccurrence.SOURCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid source. Allowed values: {list(cooccurrence.SOURCES)}"
+        )
+    
+    result = await cooccurrence.get_cooccurrence(db, source, skill)
+    if not result:
+        raise HTTPException(status_code=404, detail="No co-occurrence data for this skill")
+    
+    return {
+        "skill": skill,
+        "source": source,
+        "count": result["count"],
+        "neighbors": result["neighbors"][:limit],
+        "last_updated": result["computed_at"].isoformat()
+    }
+
+
+@router.get(
+    "/company-stats/{company_name}",
+    dependencies=[Depends(conditional("jobs", max_age=ANALYTICS_MAX_AGE))]
+)
 async def get_company_stats(company_name: str, db=Depends(get_database)):
     """Get statistics for a specific company"""
     
@@ -4,23 +4,32 @@ from bson import ObjectId
 from datetime import datetime
 import os
 from pathlib import Path
+from pymongo import ReturnDocument
 
 from app.models.candidate import Candidate, CandidateCreate, CandidateResponse
-from app.database import get_database
+from app.database import get_database, get_redis
 from app.utils.cv_parser import CVParser, COMMON_SKILLS
 from app.config import settings
+from app.utils.serialization import FastJSONResponse
+from app.utils.http_cache import conditional
+from app.utils import cv_store, events, pagination, projection
 
 router = APIRouter(prefix="/api/candidates", tags=["Candidates"])
 
 
 @router.post("/", response_model=dict)
-async def create_candidate(candidate: CandidateCreate, db=Depends(get_database)):
+async def create_candidate(
+    candidate: CandidateCreate,
+    db=Depends(get_database),
+    redis=Depends(get_redis)
+):
     """Create a new candidate"""
     candidate_dict = candidate.model_dump()
     candidate_dict["created_at"] = datetime.utcnow()
     candidate_dict["updated_at"] = datetime.utcnow()
     
     result = await db.candidates.insert_one(candidate_dict)
+    await events.candidate_changed(db, redis, None, candidate_dict)
     
     return {
         "id": str(result.inserted_id),
@@ -28,53 +37,88 @@ async def create_candidate(candidate: CandidateCreate, db=Depends(get_database))
     }
 
 
-@router.get("/{candidate_id}")
-async def get_candidate(candidate_id: str, db=Depends(get_database)):
-    """Get candidate by ID"""
+@router.get("/{candidate_id}", dependencies=[Depends(conditional("candidates"))])
+async def get_candidate(
+    candidate_id: str,
+    fields: Optional[str] = None,
+    db=Depends(get_database)
+):
+    """Get candidate by ID, optionally restricted to comma-separated `fields`"""
     try:
-        candidate = await db.candidates.find_one({"_id": ObjectId(candidate_id)})
+        fields_projection = projection.parse_fields(
+            fields, projection.CANDIDATE_FIELDS, projection.CANDIDATE_DETAIL_PROJECTION
+        )
+        if cv_store.wants_cv_text(fields_projection):
+            fields_projection = projection.with_fields(fields_projection, "has_cv_text")
+        candidate = await db.candidates.find_one({"_id": ObjectId(candidate_id)}, fields_projection)
         if not candidate:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
-        candidate["id"] = str(candidate["_id"])
-        del candidate["_id"]
-        return candidate
+        if cv_store.wants_cv_text(fields_projection):
+            await cv_store.attach_cv_texts(db, [candidate])
+        
+        candidate["id"] = candidate.pop("_id")
+        return FastJSONResponse(candidate)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(conditional("candidates"))])
 async def list_candidates(
     skip: int = 0,
     limit: int = 50,
     skills: Optional[str] = None,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
+    fields: Optional[str] = None,
     db=Depends(get_database)
 ):
-    """List all candidates with optional filtering"""
+    """List candidates, newest first, with optional filtering.
+    
+    Pass the returned `next_cursor` as `cursor` to fetch the next page
+    (`skip` only applies to the first page).
+    `count=exact|estimated` adds the total number of matches.
+    `fields` restricts the returned fields (created_at is always included).
+    """
     query = {}
     
     if skills:
         skill_list = [s.strip() for s in skills.split(",")]
         query["skills"] = {"$in": skill_list}
     
-    cursor = db.candidates.find(query).skip(skip).limit(limit)
-    candidates = await cursor.to_list(length=limit)
+    if count is not None and count not in pagination.COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid count. Allowed values: {list(pagination.COUNT_MODES)}")
+    
+    try:
+        pagination.check_page(skip, cursor)
+        page_query = pagination.after_cursor(query, cursor) if cursor else query
+        fields_projection = projection.with_fields(
+            projection.parse_fields(fields, projection.CANDIDATE_FIELDS, projection.CANDIDATE_LIST_PROJECTION),
+            "created_at"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    db_cursor = db.candidates.find(page_query, fields_projection).sort(pagination.SORT).skip(skip).limit(limit)
+    candidates = await db_cursor.to_list(length=limit)
+    next_cursor = pagination.encode_cursor(candidates[-1]) if candidates and len(candidates) == limit else None
     
     for candidate in candidates:
-        candidate["id"] = str(candidate["_id"])
-        del candidate["_id"]
+        candidate["id"] = candidate.pop("_id")
     
-    return {
-        "total": await db.candidates.count_documents(query),
+    return FastJSONResponse({
+        "total": await pagination.count_documents(db.candidates, query, count),
+        "next_cursor": next_cursor,
         "candidates": candidates
-    }
+    })
 
 
 @router.post("/upload-cv")
 async def upload_cv(
     file: UploadFile = File(...),
     candidate_id: str = Form(...),
-    db=Depends(get_database)
+    db=Depends(get_database),
+    redis=Depends(get_redis)
 ):
     """Upload and parse CV for a candidate"""
     
@@ -104,23 +148,35 @@ async def upload_cv(
     # Extract skills
     extracted_skills = CVParser.extract_skills(cv_text, COMMON_SKILLS)
     
-    # Update candidate
+    # Update candidate, the CV text itself goes to the compressed side store
     try:
-        result = await db.candidates.update_one(
-            {"_id": ObjectId(candidate_id)},
+        object_id = ObjectId(candidate_id)
+        await cv_store.save_cv_text(db, object_id, cv_text)
+        
+        before = await db.candidates.find_one_and_update(
+            {"_id": object_id},
             {
                 "$set": {
-                    "cv_text": cv_text,
+                    "has_cv_text": True,
+                    "cv_length": len(cv_text),
                     "cv_file_path": file_path,
                     "updated_at": datetime.utcnow()
                 },
+                "$unset": {"cv_text": ""},
                 "$addToSet": {"skills": {"$each": extracted_skills}}
-            }
+            },
+            projection=events.CANDIDATE_EVENT_FIELDS,
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if before is None:
+            await cv_store.delete_cv_text(db, object_id)
             raise HTTPException(status_code=404, detail="Candidate not found")
         
+        skills = before.get("skills", [])
+        after = {**before, "skills": skills + [s for s in extracted_skills if s not in skills]}
+        await events.candidate_changed(db, redis, before, after)
+        
         return {
             "message": "CV uploaded and parsed successfully",
             "extracted_skills": extracted_skills,
@@ -134,35 +190,50 @@ async def upload_cv(
 async def update_candidate(
     candidate_id: str,
     candidate: CandidateCreate,
-    db=Depends(get_database)
+    db=Depends(get_database),
+    redis=Depends(get_redis)
 ):
     """Update candidate information"""
     candidate_dict = candidate.model_dump()
     candidate_dict["updated_at"] = datetime.utcnow()
     
     try:
-        result = await db.candidates.update_one(
+        before = await db.candidates.find_one_and_update(
             {"_id": ObjectId(candidate_id)},
-            {"$set": candidate_dict}
+            {"$set": candidate_dict},
+            projection=events.CANDIDATE_EVENT_FIELDS,
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if before is None:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
+        await events.candidate_changed(db, redis, before, {**before, **candidate_dict})
+        
         return {"message": "Candidate updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.delete("/{candidate_id}")
-async def delete_candidate(candidate_id: str, db=Depends(get_database)):
+async def delete_candidate(
+    candidate_id: str,
+    db=Depends(get_database),
+    redis=Depends(get_redis)
+):
     """Delete a candidate"""
     try:
-        result = await db.candidates.delete_one({"_id": ObjectId(candidate_id)})
+        before = await db.candidates.find_one_and_delete(
+            {"_id": ObjectId(candidate_id)},
+            projection=events.CANDIDATE_EVENT_FIELDS
+        )
         
-        if result.deleted_count == 0:
+        if before is None:
             raise HTTPException(status_code=404, detail="Candidate not found")
         
+        await cv_store.delete_cv_text(db, before["_id"])
+        await events.candidate_changed(db, redis, before, None)
+        
         return {"message": "Candidate deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,251 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, List, Optional
+from bson import ObjectId
+from datetime import datetime
+import asyncio
+import csv
+import io
+
+import numpy as np
+
+from app.config import settings
+from app.database import get_database
+from app.ml import get_matching_engine
+from app.utils import cv_store, projection, serialization
+
+router = APIRouter(prefix="/api/exports", tags=["Exports"])
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows are sent in chunks of about this many bytes rather than one per row
+CHUNK_SIZE = 65536
+
+RANKING_COLUMNS = [
+    "rank", "candidate_id", "name", "email", "experience_years",
+    "total_score", "skill_match", "experience_match", "text_similarity", "is_recommended"
+]
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+async def _ndjson_lines(rows: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+    buffer = bytearray()
+    async for row in rows:
+        buffer += serialization.dumps(row)
+        buffer += b"\n"
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def _csv_lines(rows: AsyncIterator[Dict], columns: List[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def _documents(cursor) -> AsyncIterator[Dict]:
+    async for document in cursor:
+        document["id"] = document.pop("_id")
+        yield document
+
+
+async def _candidate_documents(db, cursor, drop: List[str]) -> AsyncIterator[Dict]:
+    """Candidates with their CV text from the store, attached batch by batch"""
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= settings.ANALYTICS_BATCH_SIZE:
+            async for row in _attached(db, batch, drop):
+                yield row
+            batch = []
+    async for row in _attached(db, batch, drop):
+        yield row
+
+
+async def _attached(db, candidates: List[Dict], drop: List[str]) -> AsyncIterator[Dict]:
+    await cv_store.attach_cv_texts(db, candidates)
+    for candidate in candidates:
+        for name in drop:
+            candidate.pop(name, None)
+        candidate["id"] = candidate.pop("_id")
+        yield candidate
+
+
+def _stream(rows: AsyncIterator[Dict], format: str, columns: List[str], filename: str) -> StreamingResponse:
+    lines = _csv_lines(rows, columns) if format == "csv" else _ndjson_lines(rows)
+    return StreamingResponse(
+        lines,
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
+
+
+def _check_format(format: str):
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Allowed values: {list(FORMATS)}")
+
+
+def _export_columns(fields_projection: Optional[Dict], allowed: set) -> List[str]:
+    if fields_projection and 0 not in fields_projection.values():
+        names = list(fields_projection)
+    else:
+        names = sorted(allowed - set(fields_projection or {}))
+    return ["id"] + names
+
+
+@router.get("/candidates")
+async def export_candidates(
+    format: str = "ndjson",
+    fields: Optional[str] = None,
+    skills: Optional[str] = None,
+    db=Depends(get_database)
+):
+    """Stream all candidates as NDJSON or CSV"""
+    _check_format(format)
+    try:
+        fields_projection = projection.parse_fields(
+            fields, projection.CANDIDATE_FIELDS, projection.CANDIDATE_LIST_PROJECTION
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query = {}
+    if skills:
+        query["skills"] = {"$in": [s.strip() for s in skills.split(",")]}
+
+    columns = _export_columns(fields_projection, projection.CANDIDATE_FIELDS)
+    if cv_store.wants_cv_text(fields_projection):
+        # The text lives in the cv_texts store for most candidates
+        drop = [] if "has_cv_text" in columns else ["has_cv_text"]
+        fields_projection = projection.with_fields(fields_projection, "has_cv_text")
+        cursor = db.candidates.find(query, fields_projection).batch_size(settings.ANALYTICS_BATCH_SIZE)
+        rows = _candidate_documents(db, cursor, drop)
+    else:
+        cursor = db.candidates.find(query, fields_projection).batch_size(settings.ANALYTICS_BATCH_SIZE)
+        rows = _documents(cursor)
+    return _stream(rows, format, columns, "candidates")
+
+
+@router.get("/jobs")
+async def export_jobs(
+    format: str = "ndjson",
+    fields: Optional[str] = None,
+    status: Optional[str] = None,
+    db=Depends(get_database)
+):
+    """Stream all jobs as NDJSON or CSV"""
+    _check_format(format)
+    try:
+        fields_projection = projection.parse_fields(
+            fields, projection.JOB_FIELDS, projection.JOB_LIST_PROJECTION
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    query = {"status": status} if status else {}
+
+    cursor = db.jobs.find(query, fields_projection).batch_size(settings.ANALYTICS_BATCH_SIZE)
+    columns = _export_columns(fields_projection, projection.JOB_FIELDS)
+    return _stream(_documents(cursor), format, columns, "jobs")
+
+
+@router.get("/matching/{job_id}")
+async def export_job_ranking(
+    job_id: str,
+    format: str = "ndjson",
+    min_score: float = 0.0,
+    db=Depends(get_database)
+):
+    """Stream the full candidate ranking of a job as NDJSON or CSV.
+
+    Candidates are scored batch by batch (off the event loop) and only their
+    ids and score arrays are kept; once sorted, names and emails are fetched
+    by batches of ids while the rows are streamed.
+    """
+    _check_format(format)
+    try:
+        job = await db.jobs.find_one({"_id": ObjectId(job_id)}, projection.MATCHING_JOB_PROJECTION)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return _stream(_ranking_rows(db, job, min_score), format, RANKING_COLUMNS, f"ranking_{job_id}")
+
+
+async def _ranking_rows(db, job: Dict, min_score: float) -> AsyncIterator[Dict]:
+    engine = get_matching_engine()
+    loop = asyncio.get_running_loop()
+    batch_size = settings.ANALYTICS_BATCH_SIZE
+    ids, parts = [], [[] for _ in range(4)]
+
+    async def score(candidates):
+        await cv_store.attach_cv_texts(db, candidates)
+        arrays = await loop.run_in_executor(None, engine.score_arrays, candidates, job)
+        ids.append(np.array([str(candidate["_id"]) for candidate in candidates], dtype="S24"))
+        for part, values in zip(parts, arrays):
+            part.append(values)
+
+    cursor = db.candidates.find({}, projection.MATCHING_CANDIDATE_PROJECTION).sort("_id", 1).batch_size(batch_size)
+    batch = []
+    async for candidate in cursor:
+        batch.append(candidate)
+        if len(batch) >= batch_size:
+            await score(batch)
+            batch = []
+    if batch:
+        await score(batch)
+    if not ids:
+        return
+
+    ids = np.concatenate(ids)
+    total, skill, experience, text = (np.concatenate(part) for part in parts)
+    # Rounded total score descending, then _id (the scan order)
+    rounded = np.round(total, 3)
+    order = np.lexsort((np.arange(len(ids)), -rounded))
+    order = order[rounded[order] >= min_score]
+
+    rank = 0
+    for start in range(0, len(order), batch_size):
+        rows = order[start:start + batch_size]
+        object_ids = [ObjectId(candidate_id.decode()) for candidate_id in ids[rows]]
+        documents = {
+            document["_id"]: document
+            async for document in db.candidates.find(
+                {"_id": {"$in": object_ids}}, {"name": 1, "email": 1, "experience_years": 1}
+            )
+        }
+        scores = engine.format_scores(total[rows], skill[rows], experience[rows], text[rows])
+        for object_id, score_data in zip(object_ids, scores):
+            document = documents.get(object_id)
+            if document is None:  # deleted since it was scored
+                continue
+            rank += 1
+            yield {
+                "rank": rank,
+                "candidate_id": str(object_id),
+                "name": document.get("name"),
+                "email": document.get("email"),
+                "experience_years": document.get("experience_years", 0),
+                **score_data
+            }
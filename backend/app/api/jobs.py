@@ -2,15 +2,23 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument
 
 from app.models.job import Job, JobCreate, JobResponse
-from app.database import get_database
+from app.database import get_database, get_redis
+from app.utils.serialization import FastJSONResponse
+from app.utils.http_cache import conditional
+from app.utils import events, pagination, projection
 
 router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
 
 
 @router.post("/", response_model=dict)
-async def create_job(job: JobCreate, db=Depends(get_database)):
+async def create_job(
+    job: JobCreate,
+    db=Depends(get_database),
+    redis=Depends(get_redis)
+):
     """Create a new job posting"""
     job_dict = job.model_dump()
     job_dict["created_at"] = datetime.utcnow()
@@ -18,6 +26,7 @@ async def create_job(job: JobCreate, db=Depends(get_database)):
     job_dict["status"] = "active"
     
     result = await db.jobs.insert_one(job_dict)
+    await events.job_changed(db, redis, None, job_dict)
     
     return {
         "id": str(result.inserted_id),
@@ -25,30 +34,45 @@ async def create_job(job: JobCreate, db=Depends(get_database)):
     }
 
 
-@router.get("/{job_id}")
-async def get_job(job_id: str, db=Depends(get_database)):
-    """Get job by ID"""
+@router.get("/{job_id}", dependencies=[Depends(conditional("jobs"))])
+async def get_job(
+    job_id: str,
+    fields: Optional[str] = None,
+    db=Depends(get_database)
+):
+    """Get job by ID, optionally restricted to comma-separated `fields`"""
     try:
-        job = await db.jobs.find_one({"_id": ObjectId(job_id)})
+        fields_projection = projection.parse_fields(
+            fields, projection.JOB_FIELDS, projection.JOB_DETAIL_PROJECTION
+        )
+        job = await db.jobs.find_one({"_id": ObjectId(job_id)}, fields_projection)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        job["id"] = str(job["_id"])
-        del job["_id"]
-        return job
+        job["id"] = job.pop("_id")
+        return FastJSONResponse(job)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/")
+@router.get("/", dependencies=[Depends(conditional("jobs"))])
 async def list_jobs(
     skip: int = 0,
     limit: int = 50,
     status: Optional[str] = "active",
     skills: Optional[str] = None,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
+    fields: Optional[str] = None,
     db=Depends(get_database)
 ):
-    """List all jobs with optional filtering"""
+    """List jobs, newest first, with optional filtering.
+    
+    Pass the returned `next_cursor` as `cursor` to fetch the next page
+    (`skip` only applies to the first page).
+    `count=exact|estimated` adds the total number of matches.
+    `fields` restricts the returned fields (created_at is always included).
+    """
     query = {}
     
     if status:
@@ -58,38 +82,57 @@ async def list_jobs(
         skill_list = [s.strip() for s in skills.split(",")]
         query["required_skills"] = {"$in": skill_list}
     
-    cursor = db.jobs.find(query).skip(skip).limit(limit).sort("created_at", -1)
-    jobs = await cursor.to_list(length=limit)
+    if count is not None and count not in pagination.COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid count. Allowed values: {list(pagination.COUNT_MODES)}")
+    
+    try:
+        pagination.check_page(skip, cursor)
+        page_query = pagination.after_cursor(query, cursor) if cursor else query
+        fields_projection = projection.with_fields(
+            projection.parse_fields(fields, projection.JOB_FIELDS, projection.JOB_LIST_PROJECTION),
+            "created_at"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    db_cursor = db.jobs.find(page_query, fields_projection).sort(pagination.SORT).skip(skip).limit(limit)
+    jobs = await db_cursor.to_list(length=limit)
+    next_cursor = pagination.encode_cursor(jobs[-1]) if jobs and len(jobs) == limit else None
     
     for job in jobs:
-        job["id"] = str(job["_id"])
-        del job["_id"]
+        job["id"] = job.pop("_id")
     
-    return {
-        "total": await db.jobs.count_documents(query),
+    return FastJSONResponse({
+        "total": await pagination.count_documents(db.jobs, query, count),
+        "next_cursor": next_cursor,
         "jobs": jobs
-    }
+    })
 
 
 @router.put("/{job_id}")
 async def update_job(
     job_id: str,
     job: JobCreate,
-    db=Depends(get_database)
+    db=Depends(get_database),
+    redis=Depends(get_redis)
 ):
     """Update job information"""
     job_dict = job.model_dump()
     job_dict["updated_at"] = datetime.utcnow()
     
     try:
-        result = await db.jobs.update_one(
+        before = await db.jobs.find_one_and_update(
             {"_id": ObjectId(job_id)},
-            {"$set": job_dict}
+            {"$set": job_dict},
+            projection=events.JOB_EVENT_FIELDS,
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if before is None:
             raise HTTPException(status_code=404, detail="Job not found")
         
+        await events.job_changed(db, redis, before, {**before, **job_dict})
+        
         return {"message": "Job updated successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -99,35 +142,49 @@ async def update_job(
 async def update_job_status(
     job_id: str,
     status: str,
-    db=Depends(get_database)
+    db=Depends(get_database),
+    redis=Depends(get_redis)
 ):
     """Update job status (active, closed, draft)"""
     if status not in ["active", "closed", "draft"]:
         raise HTTPException(status_code=400, detail="Invalid status")
     
     try:
-        result = await db.jobs.update_one(
+        before = await db.jobs.find_one_and_update(
             {"_id": ObjectId(job_id)},
-            {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+            {"$set": {"status": status, "updated_at": datetime.utcnow()}},
+            projection=events.JOB_EVENT_FIELDS,
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if before is None:
             raise HTTPException(status_code=404, detail="Job not found")
         
+        await events.job_changed(db, redis, before, {**before, "status": status})
+        
         return {"message": f"Job status updated to {status}"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.delete("/{job_id}")
-async def delete_job(job_id: str, db=Depends(get_database)):
+async def delete_job(
+    job_id: str,
+    db=Depends(get_database),
+    redis=Depends(get_redis)
+):
     """Delete a job"""
     try:
-        result = await db.jobs.delete_one({"_id": ObjectId(job_id)})
+        before = await db.jobs.find_one_and_delete(
+            {"_id": ObjectId(job_id)},
+            projection=events.JOB_EVENT_FIELDS
+        )
         
-        if result.deleted_count == 0:
+        if before is None:
             raise HTTPException(status_code=404, detail="Job not found")
         
+        await events.job_changed(db, redis, before, None)
+        
         return {"message": "Job deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,13 +1,68 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from typing import Dict, Iterable, List, Tuple
 from bson import ObjectId
+import asyncio
 
-from app.database import get_database, get_redis
-from app.ml.matching_engine import MatchingEngine
-import json
+from app.config import settings
+from app.database import get_database, get_redis_binary
+from app.models.matching import BulkScoreRequest
+from app.ml import get_matching_engine, loaded_matching_engine
+from app.ml.matching_index import attached_index, loaded_index
+from app.ml.recommendations import get_list
+from app.ml.prescoring import shortlist_candidates
+from app.utils.cv_store import attach_cv_texts
+from app.utils.projection import MATCHING_CANDIDATE_PROJECTION, MATCHING_JOB_PROJECTION
+from app.utils import memory, serialization
+from app.utils.http_cache import conditional
+from app.utils.metrics import StageTimer
+from app.utils.serialization import cached_json_response
 
 router = APIRouter(prefix="/api/matching", tags=["Matching"])
-matching_engine = MatchingEngine()
+
+
+def _engine_size(size):
+    """Memory gauge of the matching engine, 0 until it is built"""
+    def measure():
+        engine = loaded_matching_engine()
+        return size(engine) if engine is not None else 0
+    return measure
+
+
+memory.register(
+    "matching_engine.stop_words",
+    _engine_size(lambda engine: memory.deep_sizeof(engine.stop_words)),
+    _engine_size(lambda engine: len(engine.stop_words))
+)
+memory.register(
+    "matching_engine.vocabulary",
+    _engine_size(lambda engine: memory.deep_sizeof(getattr(engine.vectorizer, "vocabulary_", {}))),
+    _engine_size(lambda engine: len(getattr(engine.vectorizer, "vocabulary_", {})))
+)
+
+RECOMMENDED_CANDIDATE_PROJECTION = {"name": 1, "email": 1, "skills": 1, "experience_years": 1}
+
+memory.register(
+    "matching_index",
+    lambda: loaded_index().nbytes if loaded_index() is not None else 0,
+    lambda: len(loaded_index()) if loaded_index() is not None else 0
+)
+
+
+async def _with_documents(collection, ranked: List, query: Dict, projection: Dict,
+                          timer: StageTimer) -> List[Tuple[Dict, Dict]]:
+    """(id, score_data) pairs as (document, score_data), documents read with one $in query"""
+    with timer.stage("mongo_fetch"):
+        ids = [ObjectId(entity_id) for entity_id, _ in ranked]
+        docs = await collection.find({**query, "_id": {"$in": ids}}, projection).to_list(length=None)
+    by_id = {doc["_id"]: doc for doc in docs}
+    # Entities deleted (or closed) since the scores were computed are left out
+    return [(by_id[_id], score_data) for _id, (_, score_data) in zip(ids, ranked) if _id in by_id]
+
+
+async def _rank_from_index(db, index, job: Dict, top_n: int, timer: StageTimer) -> List[Tuple[Dict, Dict]]:
+    """rank_candidates from the shared index; only the top candidates are read from MongoDB"""
+    ranked = index.rank(get_matching_engine(), job, top_n=top_n, timer=timer)
+    return await _with_documents(db.candidates, ranked, {}, RECOMMENDED_CANDIDATE_PROJECTION, timer)
 
 
 @router.post("/score")
@@ -18,19 +73,20 @@ async def calculate_match_score(
 ):
     """Calculate match score between a candidate and a job"""
     
-    # Get candidate
     try:
-        candidate = await db.candidates.find_one({"_id": ObjectId(candidate_id)})
+        # Get candidate and job concurrently
+        candidate, job = await asyncio.gather(
+            db.candidates.find_one({"_id": ObjectId(candidate_id)}, MATCHING_CANDIDATE_PROJECTION),
+            db.jobs.find_one({"_id": ObjectId(job_id)}, MATCHING_JOB_PROJECTION)
+        )
         if not candidate:
             raise HTTPException(status_code=404, detail="Candidate not found")
-        
-        # Get job
-        job = await db.jobs.find_one({"_id": ObjectId(job_id)})
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
+        await attach_cv_texts(db, [candidate])
         
         # Calculate score
-        score_data = matching_engine.calculate_match_score(candidate, job)
+        score_data = get_matching_engine().calculate_match_score(candidate, job)
         
         return {
             "candidate_id": candidate_id,
@@ -45,34 +101,68 @@ async def calculate_match_score(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/recommend/{job_id}")
+@router.get("/recommend/{job_id}", dependencies=[Depends(conditional("candidates", "jobs"))])
 async def recommend_candidates_for_job(
     job_id: str,
     top_n: int = 10,
     min_score: float = 0.3,
+    prescore: bool = False,
     db=Depends(get_database),
-    redis=Depends(get_redis)
+    redis=Depends(get_redis_binary)
 ):
-    """Get top recommended candidates for a job"""
+    """Get top recommended candidates for a job.
+    
+    With `prescore`, MongoDB ranks candidates on skills and experience and
+    only an over-fetched shortlist is scored in full. Otherwise the list
+    precomputed by the background refresh is served when there is one.
+    """
+    
+    timer = StageTimer("recommend")
     
     # Check cache
-    cache_key = f"job_recommendations:{job_id}:{top_n}:{min_score}"
-    cached_result = redis.get(cache_key)
+    cache_key = f"job_recommendations:{job_id}:{top_n}:{min_score}:{int(prescore)}"
+    with timer.stage("cache_lookup"):
+        cached_result = redis.get(cache_key)
     
     if cached_result:
-        return json.loads(cached_result)
+        # Served as stored, without decoding and re-encoding
+        return cached_json_response(cached_result)
     
     try:
-        # Get job
-        job = await db.jobs.find_one({"_id": ObjectId(job_id)})
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found")
-        
-        # Get all candidates
-        candidates = await db.candidates.find().to_list(length=None)
+        with timer.stage("mongo_fetch"):
+            # Get job
+            job = await db.jobs.find_one({"_id": ObjectId(job_id)}, MATCHING_JOB_PROJECTION)
+            if not job:
+                raise HTTPException(status_code=404, detail="Job not found")
+            
+            entry = None if prescore else get_list(redis, "job", job_id, top_n)
+            index = None if prescore or entry else attached_index()
+            if prescore:
+                shortlist_size = max(top_n * settings.MATCHING_PRESCORE_OVERFETCH, settings.MATCHING_PRESCORE_MIN_SHORTLIST)
+                candidates = await shortlist_candidates(db, job, shortlist_size)
+                timer.pruned("prescore", await db.candidates.estimated_document_count() - len(candidates))
+                await attach_cv_texts(db, candidates)
+            elif entry is None and index is None:
+                # Get all candidates
+                candidates = await db.candidates.find({}, MATCHING_CANDIDATE_PROJECTION).to_list(length=None)
+                await attach_cv_texts(db, candidates)
         
         # Rank candidates
-        ranked_candidates = matching_engine.rank_candidates(candidates, job, top_n=top_n)
+        if entry is not None:
+            evaluated = entry["evaluated"]
+            ranked_candidates = await _with_documents(
+                db.candidates, entry["items"], {}, RECOMMENDED_CANDIDATE_PROJECTION, timer
+            )
+        elif index is not None:
+            evaluated = len(index)
+            ranked_candidates = await _rank_from_index(db, index, job, top_n, timer)
+        else:
+            evaluated = len(candidates)
+            with memory.track_inflight("matching.candidates", candidates):
+                ranked_candidates = get_matching_engine().rank_candidates(candidates, job, top_n=top_n, timer=timer)
+        if entry is None:
+            timer.scored(evaluated)
+        timer.pruned("top_n", evaluated - len(ranked_candidates))
         
         # Filter by minimum score and format results
         recommendations = []
@@ -87,51 +177,82 @@ async def recommend_candidates_for_job(
                     **score_data
                 })
         
+        timer.pruned("min_score", len(ranked_candidates) - len(recommendations))
+        
         result = {
             "job_id": job_id,
             "job_title": job.get("title"),
-            "total_candidates_evaluated": len(candidates),
+            "total_candidates_evaluated": evaluated,
+            "prescored": prescore,
+            "precomputed": entry is not None,
+            "index_generation": index.generation if index is not None else None,
             "recommendations": recommendations
         }
         
         # Cache result for 5 minutes
-        redis.setex(cache_key, 300, json.dumps(result))
+        payload = serialization.dumps(result)
+        redis.setex(cache_key, 300, payload)
         
-        return result
+        return cached_json_response(payload)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/jobs-for-candidate/{candidate_id}")
+@router.get(
+    "/jobs-for-candidate/{candidate_id}",
+    dependencies=[Depends(conditional("candidates", "jobs"))]
+)
 async def recommend_jobs_for_candidate(
     candidate_id: str,
     top_n: int = 10,
     min_score: float = 0.3,
     db=Depends(get_database),
-    redis=Depends(get_redis)
+    redis=Depends(get_redis_binary)
 ):
     """Get top recommended jobs for a candidate"""
     
+    timer = StageTimer("jobs_for_candidate")
+    
     # Check cache
     cache_key = f"candidate_recommendations:{candidate_id}:{top_n}:{min_score}"
-    cached_result = redis.get(cache_key)
+    with timer.stage("cache_lookup"):
+        cached_result = redis.get(cache_key)
     
     if cached_result:
-        return json.loads(cached_result)
+        # Served as stored, without decoding and re-encoding
+        return cached_json_response(cached_result)
     
     try:
-        # Get candidate
-        candidate = await db.candidates.find_one({"_id": ObjectId(candidate_id)})
-        if not candidate:
-            raise HTTPException(status_code=404, detail="Candidate not found")
-        
-        # Get active jobs
-        jobs = await db.jobs.find({"status": "active"}).to_list(length=None)
+        with timer.stage("mongo_fetch"):
+            # Get candidate
+            candidate = await db.candidates.find_one(
+                {"_id": ObjectId(candidate_id)}, MATCHING_CANDIDATE_PROJECTION
+            )
+            if not candidate:
+                raise HTTPException(status_code=404, detail="Candidate not found")
+            
+            entry = get_list(redis, "candidate", candidate_id, top_n)
+            if entry is None:
+                await attach_cv_texts(db, [candidate])
+                # Get active jobs
+                jobs = await db.jobs.find(
+                    {"status": "active"}, MATCHING_JOB_PROJECTION
+                ).to_list(length=None)
         
         # Recommend jobs
-        recommended_jobs = matching_engine.recommend_jobs(candidate, jobs, top_n=top_n)
+        if entry is not None:
+            evaluated = entry["evaluated"]
+            recommended_jobs = await _with_documents(
+                db.jobs, entry["items"], {"status": "active"}, MATCHING_JOB_PROJECTION, timer
+            )
+        else:
+            evaluated = len(jobs)
+            with memory.track_inflight("matching.jobs", jobs):
+                recommended_jobs = get_matching_engine().recommend_jobs(candidate, jobs, top_n=top_n, timer=timer)
+            timer.scored(evaluated)
+        timer.pruned("top_n", evaluated - len(recommended_jobs))
         
         # Filter by minimum score and format results
         recommendations = []
@@ -148,23 +269,132 @@ async def recommend_jobs_for_candidate(
                     **score_data
                 })
         
+        timer.pruned("min_score", len(recommended_jobs) - len(recommendations))
+        
         result = {
             "candidate_id": candidate_id,
             "candidate_name": candidate.get("name"),
-            "total_jobs_evaluated": len(jobs),
+            "total_jobs_evaluated": evaluated,
+            "precomputed": entry is not None,
             "recommendations": recommendations
         }
         
         # Cache result for 5 minutes
-        redis.setex(cache_key, 300, json.dumps(result))
+        payload = serialization.dumps(result)
+        redis.setex(cache_key, 300, payload)
         
-        return result
+        return cached_json_response(payload)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _normalize_id(object_id: str) -> str:
+    """Canonical (lowercase hex) form of a valid ObjectId string, anything else as is"""
+    return str(ObjectId(object_id)) if ObjectId.is_valid(object_id) else object_id
+
+
+async def _fetch_by_ids(collection, ids: Iterable[str], projection: Dict) -> Dict[str, Dict]:
+    """Documents for the valid IDs among `ids`, fetched with a single $in query"""
+    object_ids = [ObjectId(i) for i in set(ids) if ObjectId.is_valid(i)]
+    if not object_ids:
+        return {}
+    documents = await collection.find({"_id": {"$in": object_ids}}, projection).to_list(length=None)
+    return {str(document["_id"]): document for document in documents}
+
+
+def _pair_error(candidate_id: str, job_id: str, candidates: Dict, jobs: Dict):
+    if not ObjectId.is_valid(candidate_id):
+        return "Invalid candidate ID"
+    if not ObjectId.is_valid(job_id):
+        return "Invalid job ID"
+    if candidate_id not in candidates:
+        return "Candidate not found"
+    if job_id not in jobs:
+        return "Job not found"
+    return None
+
+
+async def score_pairs(db, pairs: List[Tuple[str, str]], timer: StageTimer) -> Tuple[Dict, Dict, Dict, List[Dict]]:
+    """Score (candidate_id, job_id) pairs in bulk.
+    
+    IDs are deduplicated and fetched with one $in query per collection, and
+    the candidates of each job are scored together. Returns the scores by
+    pair, the fetched candidates and jobs, and one error per unscorable pair,
+    all keyed by normalized IDs.
+    """
+    pairs = list(dict.fromkeys((_normalize_id(c), _normalize_id(j)) for c, j in pairs))
+    with timer.stage("mongo_fetch"):
+        candidates, jobs = await asyncio.gather(
+            _fetch_by_ids(db.candidates, [c for c, _ in pairs], MATCHING_CANDIDATE_PROJECTION),
+            _fetch_by_ids(db.jobs, [j for _, j in pairs], MATCHING_JOB_PROJECTION)
+        )
+        await attach_cv_texts(db, list(candidates.values()))
+    
+    errors = []
+    candidates_by_job = {}
+    for candidate_id, job_id in pairs:
+        error = _pair_error(candidate_id, job_id, candidates, jobs)
+        if error:
+            errors.append({"candidate_id": candidate_id, "job_id": job_id, "error": error})
+        else:
+            candidates_by_job.setdefault(job_id, []).append(candidate_id)
+    
+    # Scoring is CPU bound, keep it off the event loop
+    loop = asyncio.get_running_loop()
+    scores = {}
+    with memory.track_inflight("matching.candidates", list(candidates.values())):
+        for job_id, candidate_ids in candidates_by_job.items():
+            job_scores = await loop.run_in_executor(
+                None,
+                get_matching_engine().score_candidates,
+                [candidates[candidate_id] for candidate_id in candidate_ids],
+                jobs[job_id],
+                timer
+            )
+            timer.scored(len(candidate_ids))
+            for candidate_id, score_data in zip(candidate_ids, job_scores):
+                scores[(candidate_id, job_id)] = score_data
+    
+    return scores, candidates, jobs, errors
+
+
+@router.post("/bulk-score")
+async def bulk_score(
+    request: BulkScoreRequest,
+    db=Depends(get_database)
+):
+    """Score many candidate/job pairs.
+    
+    Accepts a `job_id` with `candidate_ids`, explicit `pairs`, or both.
+    Results follow the request order (duplicates scored once); pairs that
+    cannot be scored are listed in `errors`.
+    """
+    if request.candidate_ids and not request.job_id:
+        raise HTTPException(status_code=400, detail="candidate_ids requires job_id")
+    pairs = [(candidate_id, request.job_id) for candidate_id in request.candidate_ids]
+    pairs += [(pair.candidate_id, pair.job_id) for pair in request.pairs]
+    pairs = [(_normalize_id(candidate_id), _normalize_id(job_id)) for candidate_id, job_id in pairs]
+    if len(pairs) > settings.BULK_SCORE_MAX_PAIRS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many pairs ({len(pairs)}), the maximum is {settings.BULK_SCORE_MAX_PAIRS}"
+        )
+    
+    scores, _, _, errors = await score_pairs(db, pairs, StageTimer("bulk_score"))
+    
+    return {
+        "total_scored": len(scores),
+        "results": [
+            {"candidate_id": candidate_id, "job_id": job_id, **scores[(candidate_id, job_id)]}
+            for candidate_id, job_id in dict.fromkeys(pairs)
+            if (candidate_id, job_id) in scores
+        ],
+        "errors": errors
+    }
+
+
 @router.post("/batch-match")
 async def batch_match_candidates(
     job_id: str,
@@ -173,36 +403,37 @@ async def batch_match_candidates(
 ):
     """Calculate match scores for multiple candidates in batch"""
     
-    try:
-        # Get job
-        job = await db.jobs.find_one({"_id": ObjectId(job_id)})
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found")
-        
-        results = []
-        for candidate_id in candidate_ids:
-            try:
-                candidate = await db.candidates.find_one({"_id": ObjectId(candidate_id)})
-                if candidate:
-                    score_data = matching_engine.calculate_match_score(candidate, job)
-                    results.append({
-                        "candidate_id": candidate_id,
-                        "name": candidate.get("name"),
-                        **score_data
-                    })
-            except:
-                continue
-        
-        # Sort by score
-        results.sort(key=lambda x: x['total_score'], reverse=True)
-        
-        return {
-            "job_id": job_id,
-            "job_title": job.get("title"),
-            "total_evaluated": len(results),
-            "results": results
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    job_id = _normalize_id(job_id)
+    if len(candidate_ids) > settings.BULK_SCORE_MAX_PAIRS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many candidates ({len(candidate_ids)}), the maximum is {settings.BULK_SCORE_MAX_PAIRS}"
+        )
+    
+    scores, candidates, jobs, errors = await score_pairs(
+        db, [(candidate_id, job_id) for candidate_id in candidate_ids], StageTimer("batch_match")
+    )
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    results = [
+        {
+            "candidate_id": candidate_id,
+            "name": candidates[candidate_id].get("name"),
+            **score_data
         }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        for (candidate_id, _), score_data in scores.items()
+    ]
+    
+    # Sort by score
+    results.sort(key=lambda x: x['total_score'], reverse=True)
+    
+    return {
+        "job_id": job_id,
+        "job_title": jobs[job_id].get("title"),
+        "total_evaluated": len(results),
+        "results": results,
+        "errors": errors
+    }
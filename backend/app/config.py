@@ -13,6 +13,11 @@ class Settings(BaseSettings):
     # MongoDB
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "recruitment_db"
+    ENSURE_INDEXES_ON_STARTUP: bool = True
+    
+    # Startup
+    WARMUP_ON_STARTUP: bool = True  # build the matching engine in the background at startup
+    PRELOAD_MODELS: bool = False  # build it at import, for pre-fork servers (gunicorn --preload)
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
@@ -20,6 +25,42 @@ class Settings(BaseSettings):
     # ML Settings
     ML_MODEL_PATH: str = "./models"
     MATCHING_THRESHOLD: float = 0.5
+    BULK_SCORE_MAX_PAIRS: int = 10000
+    MATCHING_PRESCORE_OVERFETCH: int = 10  # shortlist = top_n * overfetch
+    MATCHING_PRESCORE_MIN_SHORTLIST: int = 200
+    
+    # Shared matching index (see app/ml/matching_index.py)
+    MATCHING_INDEX_DIR: Optional[str] = None  # e.g. /dev/shm/recruitment-matching, disabled when unset
+    MATCHING_INDEX_CHECK_INTERVAL: float = 1.0  # seconds between checks for a newer generation
+    MATCHING_INDEX_REFRESH_INTERVAL: int = 300  # seconds between rebuilds of a stale index, 0 disables
+    
+    # Precomputed recommendations (see app/ml/recommendations.py)
+    PRECOMPUTE_INTERVAL: int = 0  # seconds between refreshes, 0 disables
+    PRECOMPUTE_CANDIDATES_PER_JOB: int = 50
+    PRECOMPUTE_JOBS_PER_CANDIDATE: int = 20
+    
+    # Pagination
+    PAGINATION_COUNT_LIMIT: int = 10000  # cap for estimated filtered counts
+    
+    # HTTP caching
+    HTTP_CACHE_MAX_AGE: int = 0  # seconds before clients revalidate, 0 = always
+    ANALYTICS_CACHE_MAX_AGE: int = 60
+    GZIP_MINIMUM_SIZE: int = 1024  # bytes
+    GZIP_COMPRESS_LEVEL: int = 6
+    
+    # Admin & profiling
+    ADMIN_TOKEN: Optional[str] = None  # admin endpoints and profiling are disabled when unset
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of requests sampled into the aggregate
+    PROFILING_SAMPLE_INTERVAL: float = 0.005  # seconds between stack samples
+    PROFILING_WINDOW: int = 300  # seconds per aggregation window
+    PROFILING_MAX_SECONDS: float = 60
+    
+    # Traffic capture (anonymized request traces for replay benchmarks)
+    TRAFFIC_CAPTURE_PATH: Optional[str] = None  # capture is disabled when unset
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = 1.0
+    TRAFFIC_CAPTURE_KEY: Optional[str] = None  # id hashing key, random per process when unset
+    TRAFFIC_CAPTURE_MAX_BYTES: int = 50 * 1024 * 1024
+    TRAFFIC_CAPTURE_BACKUPS: int = 5
     
     # File Upload
     UPLOAD_DIR: str = "./uploads"
@@ -28,6 +69,9 @@ class Settings(BaseSettings):
     
     # Analytics
     ANALYTICS_BATCH_SIZE: int = 1000
+    SKILL_COUNTERS_RECONCILE_INTERVAL: int = 3600  # seconds, 0 disables
+    SKILL_COOCCURRENCE_REFRESH_INTERVAL: int = 3600  # seconds, 0 disables
+    SKILL_COOCCURRENCE_TOP_K: int = 20
     
     class Config:
         env_file = ".env"
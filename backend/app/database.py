@@ -1,11 +1,13 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from redis import Redis
 from app.config import settings
+from app.indexes import ensure_indexes
 
 
 class Database:
     client: AsyncIOMotorClient = None
     redis_client: Redis = None
+    redis_binary_client: Redis = None
 
 
 db = Database()
@@ -21,13 +23,23 @@ def get_redis():
     return db.redis_client
 
 
+def get_redis_binary():
+    """Get Redis client returning raw bytes (cached payloads)"""
+    return db.redis_binary_client
+
+
 async def connect_to_database():
     """Connect to MongoDB and Redis"""
     print("Connecting to MongoDB...")
     db.client = AsyncIOMotorClient(settings.MONGODB_URL)
     
+    if settings.ENSURE_INDEXES_ON_STARTUP:
+        print("Ensuring MongoDB indexes...")
+        await ensure_indexes(db.client[settings.DATABASE_NAME])
+    
     print("Connecting to Redis...")
     db.redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    db.redis_binary_client = Redis.from_url(settings.REDIS_URL)
     
     print("Connected to databases successfully!")
 
@@ -39,4 +51,6 @@ async def close_database_connection():
         db.client.close()
     if db.redis_client:
         db.redis_client.close()
+    if db.redis_binary_client:
+        db.redis_binary_client.close()
     print("Database connections closed.")
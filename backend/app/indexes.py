@@ -0,0 +1,85 @@
+"""
+MongoDB index registry.
+
+Every query issued by the API should be served by one of these indexes;
+``tests/test_query_plans.py`` fails on collection scans. Indexes are ensured
+at startup (``ENSURE_INDEXES_ON_STARTUP``) or with ``python -m app.indexes``.
+"""
+
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "candidates": [
+        # list_candidates skill filter
+        IndexModel([("skills", ASCENDING)], name="skills"),
+        # list_candidates keyset pagination, dashboard recent counts
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        # incremental analytics watermark (analytics/incremental_analytics.py)
+        IndexModel([("updated_at", ASCENDING), ("_id", ASCENDING)], name="updated_at_id"),
+    ],
+    "jobs": [
+        # list_jobs status filter with keyset pagination, dashboard active count
+        IndexModel(
+            [("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="status_created_at_id"
+        ),
+        # list_jobs skill filter
+        IndexModel([("required_skills", ASCENDING)], name="required_skills"),
+        # company stats
+        IndexModel([("company", ASCENDING), ("status", ASCENDING)], name="company_status"),
+        # list_jobs without status filter, dashboard recent counts
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        # incremental analytics watermark (analytics/incremental_analytics.py)
+        IndexModel([("updated_at", ASCENDING), ("_id", ASCENDING)], name="updated_at_id"),
+    ],
+    "analytics_rollups": [
+        # upsert key and timeseries range queries
+        IndexModel(
+            [("metric", ASCENDING), ("day", ASCENDING), ("key", ASCENDING)],
+            name="metric_day_key",
+            unique=True
+        ),
+    ],
+    "skill_cooccurrence": [
+        # stale entry cleanup after a refresh
+        IndexModel([("computed_at", ASCENDING)], name="computed_at"),
+    ],
+}
+
+
+async def ensure_indexes(database) -> Dict[str, List[str]]:
+    """Create missing indexes, returns index names per collection"""
+    created = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            created[collection] = await database[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # An index with the same name but different options already exists
+            print(f"Could not ensure indexes on {collection}: {e}")
+    return created
+
+
+async def missing_indexes(database) -> Dict[str, List[str]]:
+    """Registered indexes that do not exist yet, by collection"""
+    missing = {}
+    for collection, indexes in INDEXES.items():
+        existing = await database[collection].index_information()
+        names = [index.document["name"] for index in indexes if index.document["name"] not in existing]
+        if names:
+            missing[collection] = names
+    return missing
+
+
+if __name__ == "__main__":
+    import asyncio
+    from app.database import connect_to_database, get_database
+
+    async def main():
+        await connect_to_database()
+        for collection, names in (await ensure_indexes(await get_database())).items():
+            print(f"{collection}: {', '.join(names)}")
+
+    asyncio.run(main())
@@ -1,31 +1,29 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import Counter, Histogram, generate_latest
+from fastapi.middleware.gzip import GZipMiddleware
+from prometheus_client import generate_latest
 from fastapi.responses import PlainTextResponse
 import time
 
 from app.config import settings
-from app.database import connect_to_database, close_database_connection
-from app.api import candidates, jobs, matching, analytics
-
-# Prometheus metrics
-REQUEST_COUNT = Counter(
-    'recruitment_app_requests_total',
-    'Total request count',
-    ['method', 'endpoint', 'status']
-)
-
-REQUEST_DURATION = Histogram(
-    'recruitment_app_request_duration_seconds',
-    'Request duration in seconds',
-    ['method', 'endpoint']
-)
+from app import warmup
+from app.utils.serialization import FastJSONResponse
+from app.utils import http_cache, profiling, traffic_capture
+from app.utils.metrics import REQUEST_COUNT, REQUEST_DURATION, route_label
+from app.database import connect_to_database, close_database_connection, get_database, get_redis, get_redis_binary
+from app.tasks import start_periodic_task, start_task, stop_background_tasks
+from app.analytics.skill_counters import reconcile_skill_counters
+from app.analytics.cooccurrence import refresh_cooccurrence
+from app.ml import recommendations
+from app.ml.matching_index import refresh_index
+from app.api import candidates, jobs, matching, analytics, exports, admin
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="Intelligent Recruitment Application with ML-based Matching"
+    description="Intelligent Recruitment Application with ML-based Matching",
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -37,6 +35,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in CPU profiling (see app/utils/profiling.py), inside the
+# @app.middleware layers so that endpoints run in its task
+app.add_middleware(profiling.ProfilingMiddleware)
+
 
 # Middleware for metrics
 @app.middleware("http")
@@ -47,27 +49,113 @@ async def metrics_middleware(request, call_next):
     
     duration = time.time() - start_time
     
-    # Record metrics
+    # Record metrics, labelled by route template to keep series bounded
+    endpoint = route_label(request)
     REQUEST_COUNT.labels(
         method=request.method,
-        endpoint=request.url.path,
+        endpoint=endpoint,
         status=response.status_code
     ).inc()
     
     REQUEST_DURATION.labels(
         method=request.method,
-        endpoint=request.url.path
+        endpoint=endpoint
     ).observe(duration)
     
     return response
 
 
+# Middleware for ETag / Cache-Control on conditional routes
+@app.middleware("http")
+async def http_cache_middleware(request, call_next):
+    response = await call_next(request)
+    return await http_cache.apply_validators(request, response)
+
+
+# Opt-in anonymized traffic capture (see app/utils/traffic_capture.py)
+app.add_middleware(traffic_capture.TrafficCaptureMiddleware)
+
+
+@app.exception_handler(http_cache.NotModified)
+async def not_modified_handler(request, exc):
+    return http_cache.not_modified(exc.etag, exc.cache_control)
+
+
+# Compression (added last so it wraps the other middlewares and
+# ETags are computed on uncompressed bodies)
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL
+)
+
+
+async def reconcile_counters():
+    """Correct drift in the incrementally maintained skill counters"""
+    skills = await reconcile_skill_counters(await get_database())
+    print(f"Reconciled skill counters ({skills} skills)")
+
+
+async def refresh_skill_cooccurrence():
+    """Recompute top co-occurring skills"""
+    skills = await refresh_cooccurrence(await get_database(), settings.SKILL_COOCCURRENCE_TOP_K)
+    print(f"Refreshed skill co-occurrence ({skills} skills)")
+
+
+async def refresh_matching_index():
+    """Rebuild the shared matching index in a loader process if candidates changed"""
+    if await refresh_index(get_redis(), settings.MATCHING_INDEX_DIR):
+        print("Refreshed matching index")
+
+
+async def refresh_recommendations():
+    """Recompute the precomputed recommendation lists affected by recent writes"""
+    counts = await recommendations.refresh(await get_database(), get_redis_binary())
+    if counts is not None and any(counts.values()):
+        print(f"Refreshed recommendations ({counts['written']} lists written, "
+              f"{counts['deleted']} deleted, {counts['deferred']} deferred)")
+
+
+async def warm_up_models():
+    """Build the matching engine off the request path and check indexes"""
+    await warmup.warm_up(await get_database())
+
+
+# Pre-fork servers (gunicorn --preload) build the engine once, before forking
+if settings.PRELOAD_MODELS:
+    warmup.preload()
+
+
 # Event handlers
 @app.on_event("startup")
 async def startup_event():
     """Startup event handler"""
     print(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     await connect_to_database()
+    traffic_capture.start_capture()
+    if settings.WARMUP_ON_STARTUP:
+        start_task("warm_up", warm_up_models)
+    start_periodic_task(
+        "reconcile_skill_counters",
+        reconcile_counters,
+        settings.SKILL_COUNTERS_RECONCILE_INTERVAL
+    )
+    start_periodic_task(
+        "refresh_skill_cooccurrence",
+        refresh_skill_cooccurrence,
+        settings.SKILL_COOCCURRENCE_REFRESH_INTERVAL
+    )
+    if settings.MATCHING_INDEX_DIR:
+        start_periodic_task(
+            "refresh_matching_index",
+            refresh_matching_index,
+            settings.MATCHING_INDEX_REFRESH_INTERVAL
+        )
+    start_periodic_task(
+        "refresh_recommendations",
+        refresh_recommendations,
+        settings.PRECOMPUTE_INTERVAL
+    )
     print("Application started successfully!")
 
 
@@ -75,6 +163,8 @@ async def startup_event():
 async def shutdown_event():
     """Shutdown event handler"""
     print("Shutting down application...")
+    await stop_background_tasks()
+    traffic_capture.stop_capture()
     await close_database_connection()
 
 
@@ -83,6 +173,8 @@ app.include_router(candidates.router)
 app.include_router(jobs.router)
 app.include_router(matching.router)
 app.include_router(analytics.router)
+app.include_router(exports.router)
+app.include_router(admin.router)
 
 
 # Root endpoint
@@ -105,6 +197,14 @@ async def health_check():
     return {"status": "healthy"}
 
 
+# Readiness: models built and indexes present
+@app.get("/ready")
+async def readiness_check(db=Depends(get_database)):
+    """Readiness endpoint (503 until warmed up)"""
+    report = await warmup.readiness(db)
+    return FastJSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
 # Prometheus metrics endpoint
 @app.get("/metrics", response_class=PlainTextResponse)
 async def metrics():
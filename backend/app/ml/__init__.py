@@ -1 +1,27 @@
 # ML module
+"""
+The matching engine pulls in scikit-learn, SciPy and NLTK, which take most
+of the application's import time. It is built on first use (or by the
+warm-up, see app/warmup.py) rather than when the API modules are imported.
+"""
+
+import threading
+
+_engine = None
+_lock = threading.Lock()
+
+
+def get_matching_engine():
+    """The shared MatchingEngine, built on first call"""
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                from app.ml.matching_engine import MatchingEngine
+                _engine = MatchingEngine()
+    return _engine
+
+
+def loaded_matching_engine():
+    """The shared MatchingEngine if already built, without building it"""
+    return _engine
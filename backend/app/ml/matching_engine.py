@@ -1,13 +1,26 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
 import numpy as np
 from typing import List, Dict, Tuple
+from collections import Counter
+from contextlib import nullcontext
+import math
 import re
-import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 
 
+# TF-IDF weight of a term present in only one of the two documents of a pair
+# (smooth idf with n=2, df=1); terms present in both have weight 1
+SINGLE_DOC_IDF = math.log(3 / 2) + 1
+
+
+def _stage(timer, name: str):
+    """Time a block with an optional StageTimer"""
+    return timer.stage(name) if timer else nullcontext()
+
+
 class MatchingEngine:
     """ML-based matching engine for candidates and jobs"""
     
@@ -17,13 +30,17 @@ class MatchingEngine:
             ngram_range=(1, 2),
             stop_words='english'
         )
-        # Download NLTK data if not present
+        self._analyze = self.vectorizer.build_analyzer()
+        # NLTK data is installed with the image (see Dockerfile), never
+        # downloaded at runtime; check the tokenizer models here too so a
+        # missing corpus fails at startup rather than on the first request
         try:
             self.stop_words = set(stopwords.words('english'))
-        except:
-            nltk.download('stopwords')
-            nltk.download('punkt')
-            self.stop_words = set(stopwords.words('english'))
+            word_tokenize("nltk data check")
+        except LookupError as e:
+            raise RuntimeError(
+                "NLTK data is missing, install it with: python -m nltk.downloader stopwords punkt"
+            ) from e
     
     def preprocess_text(self, text: str) -> str:
         """Preprocess text for matching"""
@@ -116,7 +133,7 @@ class MatchingEngine:
         
         # 1. Skill match (40% weight)
         skill_score = self.calculate_skill_match(
-            candidate_data.get('skills', []),
+            candidate_data.get('skills') or [],
             job_data.get('required_skills', []),
             job_data.get('nice_to_have_skills', [])
         )
@@ -149,34 +166,201 @@ class MatchingEngine:
             'is_recommended': total_score >= 0.6
         }
     
+    def _pair_similarities(self, cv_texts: List[str], description: str, timer=None) -> np.ndarray:
+        """Text similarity of many CVs against one description.
+        
+        Equivalent to calling calculate_text_similarity for each CV (a TF-IDF
+        fitted on the pair), but the description is preprocessed once and
+        similarities are computed with sparse matrix products. Only pairs whose
+        joint vocabulary exceeds max_features need a per-pair term selection.
+        """
+        similarities = np.zeros(len(cv_texts))
+        if not description:
+            return similarities
+        
+        with _stage(timer, "preprocessing"):
+            job_terms = self.text_terms(description)
+            cv_terms = [self.text_terms(text) if text else Counter() for text in cv_texts]
+        
+        with _stage(timer, "vectorization"):
+            # Alphabetical vocabulary, as TfidfVectorizer orders its features
+            vocabulary = sorted(set(job_terms).union(*cv_terms))
+            if not vocabulary or not job_terms:
+                return similarities
+            index = {term: i for i, term in enumerate(vocabulary)}
+            
+            job = np.zeros(len(vocabulary))
+            for term, count in job_terms.items():
+                job[index[term]] = count
+            rows, cols, counts = [], [], []
+            for row, terms in enumerate(cv_terms):
+                for term, count in terms.items():
+                    rows.append(row)
+                    cols.append(index[term])
+                    counts.append(count)
+            cvs = sparse.csr_matrix((counts, (rows, cols)), shape=(len(cv_texts), len(vocabulary)), dtype=float)
+            cvs.sort_indices()
+        
+        with _stage(timer, "similarity"):
+            present = (cvs > 0).astype(float)
+            in_job = (job > 0).astype(float)
+            squares = cvs.multiply(cvs)
+            similarities = self.weighted_cosine(
+                cvs @ job,
+                np.asarray(squares.sum(axis=1)).ravel(),
+                squares @ in_job,
+                job @ job,
+                present @ (job * job)
+            )
+            
+            max_features = self.vectorizer.max_features
+            if max_features:
+                shared = present @ in_job
+                joint = np.diff(cvs.indptr) + np.count_nonzero(job) - shared
+                for row in np.nonzero(joint > max_features)[0]:
+                    similarities[row] = self._capped_similarity(cvs, row, job, max_features)
+            for row, text in enumerate(cv_texts):
+                if not text:
+                    similarities[row] = 0.0
+        return similarities
+    
+    def text_terms(self, text: str) -> Counter:
+        """Term counts of a text as the TF-IDF vectorizer sees it (unigrams and bigrams)"""
+        return Counter(self._analyze(self.preprocess_text(text)))
+    
+    @staticmethod
+    def weighted_cosine(dot, cv_squares, cv_shared_squares, job_squares, job_shared_squares) -> np.ndarray:
+        """Pairwise TF-IDF similarities from term count statistics.
+        
+        Shared terms have idf 1, the others SINGLE_DOC_IDF. Arguments are,
+        per CV: dot product of counts, sum of squared counts, and the same
+        sums restricted to terms shared with the description.
+        """
+        single = SINGLE_DOC_IDF ** 2
+        cv_norms = single * cv_squares + (1 - single) * cv_shared_squares
+        job_norms = single * job_squares + (1 - single) * job_shared_squares
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(cv_norms > 0, dot / np.sqrt(cv_norms * job_norms), 0.0)
+    
+    @staticmethod
+    def _capped_similarity(cvs, row: int, job: np.ndarray, max_features: int) -> float:
+        """Similarity of one pair restricted to its max_features most frequent terms"""
+        start, end = cvs.indptr[row], cvs.indptr[row + 1]
+        terms = np.union1d(cvs.indices[start:end], np.nonzero(job)[0])
+        cv = np.zeros(len(terms))
+        cv[np.searchsorted(terms, cvs.indices[start:end])] = cvs.data[start:end]
+        return MatchingEngine.capped_pair_similarity(cv, job[terms], max_features)
+    
+    @staticmethod
+    def capped_pair_similarity(cv: np.ndarray, jb: np.ndarray, max_features: int) -> float:
+        """Similarity of two count vectors over their alphabetical joint vocabulary"""
+        # Same selection (and tie order) as TfidfVectorizer's max_features
+        kept = np.argsort(-(cv + jb).astype(np.int64))[:max_features]
+        cv, jb = cv[kept], jb[kept]
+        weights = np.where((cv > 0) & (jb > 0), 1.0, SINGLE_DOC_IDF)
+        cv, jb = cv * weights, jb * weights
+        norm = np.linalg.norm(cv) * np.linalg.norm(jb)
+        return float(cv @ jb / norm) if norm else 0.0
+    
+    def score_candidates(self,
+                         candidates: List[Dict],
+                         job_data: Dict,
+                         timer=None) -> List[Dict]:
+        """Match scores of many candidates for one job.
+        
+        Same results as calculate_match_score for each candidate, computed
+        in bulk. `timer` (a StageTimer) records the time spent per stage.
+        """
+        if not candidates:
+            return []
+        return self.format_scores(*self.score_arrays(candidates, job_data, timer))
+    
+    def score_arrays(self, candidates: List[Dict], job_data: Dict, timer=None) -> Tuple[np.ndarray, ...]:
+        """Total, skill, experience and text score arrays (unrounded) of many candidates for one job"""
+        text_scores = self._pair_similarities(
+            [c.get('cv_text', '') for c in candidates],
+            job_data.get('description', ''),
+            timer
+        )
+        
+        with _stage(timer, "scoring"):
+            required = [s.lower() for s in job_data.get('required_skills') or []]
+            nice_to_have = [s.lower() for s in job_data.get('nice_to_have_skills') or []]
+            skill_scores = []
+            for candidate in candidates:
+                skills = {s.lower() for s in candidate.get('skills') or []}
+                if not required:
+                    skill_scores.append(0.0)
+                    continue
+                score = sum(1 for skill in required if skill in skills) / len(required)
+                if nice_to_have:
+                    score += sum(1 for skill in nice_to_have if skill in skills) / len(nice_to_have) * 0.2
+                skill_scores.append(min(score, 1.0))
+            skill_scores = np.array(skill_scores)
+            
+            experience = np.array([c.get('experience_years', 0) for c in candidates])
+            exp_scores = self.experience_scores(experience, job_data)
+            total_scores = skill_scores * 0.4 + exp_scores * 0.3 + text_scores * 0.3
+        return total_scores, skill_scores, exp_scores, text_scores
+    
+    @staticmethod
+    def experience_scores(experience: np.ndarray, job_data: Dict) -> np.ndarray:
+        """Experience match of an array of years of experience"""
+        min_exp = job_data.get('min_experience', 0)
+        max_exp = job_data.get('max_experience')
+        gap = min_exp - experience
+        exp_scores = np.select(
+            [gap <= 0, gap <= 1, gap <= 2],
+            [1.0, 0.8, 0.6],
+            default=0.3
+        )
+        if max_exp:
+            exp_scores = np.where((gap <= 0) & (experience > max_exp + 3), 0.8, exp_scores)
+        return exp_scores
+    
+    @staticmethod
+    def format_scores(total_scores, skill_scores, exp_scores, text_scores) -> List[Dict]:
+        """Score dicts (as calculate_match_score returns them) from score arrays"""
+        return [
+            {
+                'total_score': round(float(total), 3),
+                'skill_match': round(float(skill), 3),
+                'experience_match': round(float(exp), 3),
+                'text_similarity': round(float(text), 3),
+                'is_recommended': bool(total >= 0.6)
+            }
+            for total, skill, exp, text in zip(total_scores, skill_scores, exp_scores, text_scores)
+        ]
+    
     def rank_candidates(self, 
                        candidates: List[Dict],
                        job_data: Dict,
-                       top_n: int = 10) -> List[Tuple[Dict, Dict]]:
+                       top_n: int = 10,
+                       timer=None) -> List[Tuple[Dict, Dict]]:
         """Rank candidates for a job"""
-        scored_candidates = []
-        
-        for candidate in candidates:
-            score_data = self.calculate_match_score(candidate, job_data)
-            scored_candidates.append((candidate, score_data))
+        scored_candidates = list(zip(candidates, self.score_candidates(candidates, job_data, timer)))
         
         # Sort by total score descending
-        scored_candidates.sort(key=lambda x: x[1]['total_score'], reverse=True)
+        with _stage(timer, "sorting"):
+            scored_candidates.sort(key=lambda x: x[1]['total_score'], reverse=True)
         
         return scored_candidates[:top_n]
     
     def recommend_jobs(self,
                       candidate_data: Dict,
                       jobs: List[Dict],
-                      top_n: int = 10) -> List[Tuple[Dict, Dict]]:
+                      top_n: int = 10,
+                      timer=None) -> List[Tuple[Dict, Dict]]:
         """Recommend jobs for a candidate"""
         scored_jobs = []
         
-        for job in jobs:
-            score_data = self.calculate_match_score(candidate_data, job)
-            scored_jobs.append((job, score_data))
+        with _stage(timer, "scoring"):
+            for job in jobs:
+                score_data = self.calculate_match_score(candidate_data, job)
+                scored_jobs.append((job, score_data))
         
         # Sort by total score descending
-        scored_jobs.sort(key=lambda x: x[1]['total_score'], reverse=True)
+        with _stage(timer, "sorting"):
+            scored_jobs.sort(key=lambda x: x[1]['total_score'], reverse=True)
         
         return scored_jobs[:top_n]
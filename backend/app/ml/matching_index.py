@@ -0,0 +1,452 @@
+"""
+Candidate matching index shared by the API workers of a host.
+
+Ranking candidates for a job normally reads every candidate from MongoDB and
+tokenizes every CV on each request. The index holds what the matching engine
+derives from candidates, computed once:
+
+* candidate ids (sorted, so rows follow ``_id`` order) and years of experience;
+* a binary candidate x skill matrix (lowercase skills), stored by column;
+* CV term counts (the vectorizer's unigrams and bigrams) over one alphabetical
+  vocabulary, stored by row and by column, with per-row sums of squares.
+
+Scores computed from it are the ones ``MatchingEngine.score_candidates``
+returns for the same data.
+
+A loader writes each generation as ``.npy`` files in ``MATCHING_INDEX_DIR``
+(on a tmpfs such as ``/dev/shm``) and publishes it by atomically replacing
+the ``CURRENT`` pointer file. Workers memory-map the files read-only, so a
+host holds one copy of the index whatever the number of workers. Workers
+look for a newer generation at most every ``MATCHING_INDEX_CHECK_INTERVAL``
+and swap to it; requests in flight keep the generation they started with,
+and files of dropped generations are freed once no worker maps them.
+
+Build a generation before starting the workers, and whenever needed:
+
+    python -m app.ml.matching_index [--force]
+
+With ``MATCHING_INDEX_REFRESH_INTERVAL`` the API workers also check whether
+candidates changed since the published generation (the ``candidates``
+generation counter of app/utils/http_cache.py) and start that command; a
+file lock keeps it to one build per host. Until the next generation is
+published, new or edited candidates are ranked on their previous state (or
+not at all).
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.analytics.cooccurrence import build_skill_matrix
+from app.config import settings
+from app.utils.cv_store import attach_cv_texts
+from app.utils.http_cache import get_generations
+
+FORMAT_VERSION = 1
+POINTER = "CURRENT"
+BUILD_LOCK = "build.lock"
+PUBLISH_LOCK = "publish.lock"
+KEEP_GENERATIONS = 2  # the published one and its predecessor
+BUILD_PROJECTION = {"skills": 1, "experience_years": 1, "cv_text": 1, "has_cv_text": 1}
+
+# Files of a generation
+ARRAYS = (
+    "ids",
+    "experience",
+    "skill_indptr", "skill_rows",
+    "term_indptr", "term_columns", "term_counts", "term_squares",
+    "column_indptr", "column_rows", "column_counts",
+    "vocabulary", "vocabulary_offsets",
+)
+
+
+async def build_arrays(db, engine, batch_size: int = 1000) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Index arrays and metadata of all candidates"""
+    from scipy import sparse
+
+    ids, experience, skill_lists = [], [], []
+    vocabulary: Dict[str, int] = {}
+    columns, counts, indptr = [], [], [0]
+
+    def add(batch: List[Dict]):
+        for candidate in batch:
+            ids.append(str(candidate["_id"]))
+            experience.append(candidate.get("experience_years") or 0)
+            skill_lists.append([s.lower() for s in candidate.get("skills") or []])
+            text = candidate.get("cv_text")
+            for term, count in (engine.text_terms(text) if text else {}).items():
+                columns.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+            indptr.append(len(columns))
+
+    # Tokenizing runs off the event loop, for builds inside the API process
+    loop = asyncio.get_running_loop()
+    cursor = db.candidates.find({}, BUILD_PROJECTION).sort("_id", 1).batch_size(batch_size)
+    batch = []
+    async for candidate in cursor:
+        batch.append(candidate)
+        if len(batch) >= batch_size:
+            await loop.run_in_executor(None, add, await attach_cv_texts(db, batch))
+            batch = []
+    if batch:
+        await loop.run_in_executor(None, add, await attach_cv_texts(db, batch))
+
+    # Renumber terms alphabetically, as TfidfVectorizer orders its features
+    terms = sorted(vocabulary)
+    rank = np.empty(len(terms), dtype=np.int32)
+    rank[[vocabulary[term] for term in terms]] = np.arange(len(terms), dtype=np.int32)
+    cvs = sparse.csr_matrix(
+        (np.array(counts, dtype=np.int32), rank[np.array(columns, dtype=np.int64)], indptr),
+        shape=(len(ids), len(terms))
+    )
+    cvs.sort_indices()
+    by_column = cvs.tocsc()
+    by_column.sort_indices()
+    skills, skill_names = build_skill_matrix(skill_lists)
+    skills = skills.tocsc()
+    skills.sort_indices()
+
+    encoded = [term.encode("utf-8") for term in terms]
+    arrays = {
+        "ids": np.array(ids, dtype="S24"),
+        "experience": np.array(experience, dtype=np.float64),
+        "skill_indptr": skills.indptr.astype(np.int64),
+        "skill_rows": skills.indices.astype(np.int32),
+        "term_indptr": cvs.indptr.astype(np.int64),
+        "term_columns": cvs.indices.astype(np.int32),
+        "term_counts": cvs.data.astype(np.int32),
+        "term_squares": np.asarray(cvs.multiply(cvs).sum(axis=1), dtype=np.float64).ravel(),
+        "column_indptr": by_column.indptr.astype(np.int64),
+        "column_rows": by_column.indices.astype(np.int32),
+        "column_counts": by_column.data.astype(np.int32),
+        "vocabulary": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "vocabulary_offsets": np.concatenate([[0], np.cumsum([len(term) for term in encoded])]).astype(np.int64),
+    }
+    meta = {
+        "format": FORMAT_VERSION,
+        "candidates": len(ids),
+        "terms": len(terms),
+        "skills": skill_names,
+        "built_at": datetime.utcnow().isoformat()
+    }
+    return arrays, meta
+
+
+class MatchingIndex:
+    """Index arrays, usually a published generation memory-mapped read-only"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict, generation: Optional[str] = None):
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported matching index format {meta.get('format')}")
+        self.meta = meta
+        self.generation = generation
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.skill_columns = {skill: column for column, skill in enumerate(meta["skills"])}
+        self.term_sizes = np.diff(self.term_indptr)
+
+    @classmethod
+    def open(cls, path: str) -> "MatchingIndex":
+        """Map a published generation"""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+        return cls(arrays, meta, os.path.basename(path))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+    def _term(self, column: int) -> bytes:
+        return self.vocabulary[self.vocabulary_offsets[column]:self.vocabulary_offsets[column + 1]].tobytes()
+
+    def _locate(self, term: str) -> Tuple[bool, int]:
+        """Whether `term` is in the vocabulary, and its (insertion) column"""
+        key = term.encode("utf-8")
+        lo, hi = 0, len(self.vocabulary_offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < len(self.vocabulary_offsets) - 1 and self._term(lo) == key, lo
+
+    def _skill_counts(self, skills: List[str]) -> np.ndarray:
+        """Per row, how many of `skills` (lowercase, repeats counted) it has"""
+        counts = np.zeros(len(self))
+        for skill in skills:
+            column = self.skill_columns.get(skill)
+            if column is not None:
+                counts[self.skill_rows[self.skill_indptr[column]:self.skill_indptr[column + 1]]] += 1
+        return counts
+
+    def skill_scores(self, job: Dict) -> np.ndarray:
+        required = [s.lower() for s in job.get("required_skills") or []]
+        if not required:
+            return np.zeros(len(self))
+        scores = self._skill_counts(required) / len(required)
+        nice_to_have = [s.lower() for s in job.get("nice_to_have_skills") or []]
+        if nice_to_have:
+            scores = scores + self._skill_counts(nice_to_have) / len(nice_to_have) * 0.2
+        return np.minimum(scores, 1.0)
+
+    def text_scores(self, engine, description: str) -> np.ndarray:
+        scores = np.zeros(len(self))
+        job_terms = engine.text_terms(description) if description else {}
+        if not job_terms:
+            return scores
+
+        # Description terms by column; terms no CV has get fractional keys
+        # that keep them in alphabetical order between the columns
+        known, extra = {}, {}
+        for term in sorted(job_terms):
+            found, column = self._locate(term)
+            if found:
+                known[column] = job_terms[term]
+            else:
+                extra.setdefault(column, []).append(job_terms[term])
+        keys = [float(column) for column in known]
+        for column, term_counts in extra.items():
+            keys.extend(column - 1 + (i + 1) / (len(term_counts) + 1) for i in range(len(term_counts)))
+        job_keys = np.array(keys)
+        job_counts = np.array(list(known.values()) + [c for term_counts in extra.values() for c in term_counts],
+                              dtype=float)
+        order = np.argsort(job_keys)
+        job_keys, job_counts = job_keys[order], job_counts[order]
+
+        # Only the columns of the description's terms are read
+        slices = [slice(self.column_indptr[c], self.column_indptr[c + 1]) for c in known]
+        rows = np.concatenate([self.column_rows[s] for s in slices] + [np.array([], dtype=np.int32)])
+        cv_counts = np.concatenate([self.column_counts[s] for s in slices] + [np.array([], dtype=np.int32)])
+        cv_counts = cv_counts.astype(float)
+        job_values = np.repeat(np.array(list(known.values()), dtype=float), [s.stop - s.start for s in slices])
+        size = len(self)
+        scores = engine.weighted_cosine(
+            np.bincount(rows, weights=cv_counts * job_values, minlength=size),
+            self.term_squares,
+            np.bincount(rows, weights=cv_counts * cv_counts, minlength=size),
+            float(job_counts @ job_counts),
+            np.bincount(rows, weights=job_values * job_values, minlength=size)
+        )
+
+        max_features = engine.vectorizer.max_features
+        if max_features:
+            joint = self.term_sizes + len(job_counts) - np.bincount(rows, minlength=size)
+            for row in np.nonzero(joint > max_features)[0]:
+                start, end = self.term_indptr[row], self.term_indptr[row + 1]
+                row_keys = self.term_columns[start:end].astype(float)
+                keys = np.union1d(row_keys, job_keys)
+                cv = np.zeros(len(keys))
+                cv[np.searchsorted(keys, row_keys)] = self.term_counts[start:end]
+                jb = np.zeros(len(keys))
+                jb[np.searchsorted(keys, job_keys)] = job_counts
+                scores[row] = engine.capped_pair_similarity(cv, jb, max_features)
+        return scores
+
+    def score(self, engine, job: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Total, skill, experience and text scores of every row"""
+        skill = self.skill_scores(job)
+        experience = engine.experience_scores(self.experience, job)
+        text = self.text_scores(engine, job.get("description", ""))
+        return skill * 0.4 + experience * 0.3 + text * 0.3, skill, experience, text
+
+    def rank(self, engine, job: Dict, top_n: int = 10, timer=None) -> List[Tuple[str, Dict]]:
+        """Top candidate ids and scores, ordered as MatchingEngine.rank_candidates orders them"""
+        with _stage(timer, "scoring"):
+            scores = self.score(engine, job)
+        with _stage(timer, "sorting"):
+            ranked = top_scores(engine, self.ids, *scores, top_n=top_n)
+        return [(candidate_id.decode(), score_data) for candidate_id, score_data in ranked]
+
+
+def top_scores(engine, ids, total, skill, experience, text, top_n: int) -> List[Tuple[str, Dict]]:
+    """Best `top_n` of score arrays, by rounded total score then position"""
+    rows = np.arange(len(ids))
+    if 0 < top_n < len(ids):
+        # Rows that can reach the top_n once scores are rounded
+        threshold = np.partition(total, len(ids) - top_n)[len(ids) - top_n] - 0.001
+        rows = np.nonzero(total >= threshold)[0]
+    scores = engine.format_scores(total[rows], skill[rows], experience[rows], text[rows])
+    order = sorted(range(len(rows)), key=lambda i: -scores[i]["total_score"])[:top_n]
+    return [(ids[rows[i]], scores[i]) for i in order]
+
+
+def _stage(timer, name: str):
+    return timer.stage(name) if timer else nullcontext()
+
+
+def published_generation(directory: str) -> Optional[str]:
+    """Name of the published generation, None if there is none"""
+    try:
+        with open(os.path.join(directory, POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def published_meta(directory: str) -> Optional[Dict]:
+    generation = published_generation(directory)
+    if generation is None:
+        return None
+    try:
+        with open(os.path.join(directory, generation, "meta.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _file_lock(path: str, blocking: bool = True):
+    """Exclusive lock on `path`; yields False if not blocking and already held"""
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def publish(directory: str, arrays: Dict[str, np.ndarray], meta: Dict) -> str:
+    """Write a new generation and make it the published one, returns its name"""
+    os.makedirs(directory, exist_ok=True)
+    with _file_lock(os.path.join(directory, PUBLISH_LOCK)):
+        current = published_generation(directory)
+        number = int(current.rsplit("-", 1)[1]) + 1 if current else 1
+        name = f"gen-{number:08d}"
+        staging = os.path.join(directory, f".{name}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for key in ARRAYS:
+            np.save(os.path.join(staging, f"{key}.npy"), arrays[key])
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        os.rename(staging, os.path.join(directory, name))
+
+        pointer = os.path.join(directory, f".{POINTER}.tmp")
+        with open(pointer, "w") as f:
+            f.write(name)
+        os.replace(pointer, os.path.join(directory, POINTER))
+
+        # Workers still mapping a removed generation keep its pages until they swap
+        generations = sorted(entry for entry in os.listdir(directory) if entry.startswith("gen-"))
+        for old in generations[:-KEEP_GENERATIONS]:
+            shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return name
+
+
+def is_stale(directory: str, redis) -> bool:
+    """Whether candidates changed since the published generation was built"""
+    meta = published_meta(directory)
+    if meta is None:
+        return True
+    return meta.get("candidates_generation") != get_generations(redis, ["candidates"])[0]
+
+
+async def build_index(db, redis, directory: str, engine=None, force: bool = False) -> Optional[str]:
+    """Build and publish a generation unless another build runs or nothing changed"""
+    os.makedirs(directory, exist_ok=True)
+    with _file_lock(os.path.join(directory, BUILD_LOCK), blocking=False) as locked:
+        if not locked or not (force or is_stale(directory, redis)):
+            return None
+        if engine is None:
+            from app.ml import get_matching_engine
+            engine = get_matching_engine()
+        # Read before the build: writes made meanwhile leave the generation stale
+        candidates_generation = get_generations(redis, ["candidates"])[0]
+        arrays, meta = await build_arrays(db, engine, settings.ANALYTICS_BATCH_SIZE)
+        meta["candidates_generation"] = candidates_generation
+        return publish(directory, arrays, meta)
+
+
+async def refresh_index(redis, directory: str) -> bool:
+    """Start a loader process when the published generation is stale, returns whether one ran"""
+    if not is_stale(directory, redis):
+        return False
+    os.makedirs(directory, exist_ok=True)
+    with _file_lock(os.path.join(directory, BUILD_LOCK), blocking=False) as free:
+        if not free:
+            return False
+    # The loader takes the lock itself (losing the race to another worker's
+    # loader just makes it exit); building in a separate process keeps the
+    # worker's event loop and memory out of it
+    process = await asyncio.create_subprocess_exec(sys.executable, "-m", "app.ml.matching_index")
+    await process.wait()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, "python -m app.ml.matching_index")
+    return True
+
+
+_attached: Optional[MatchingIndex] = None
+_checked_at = 0.0
+_attach_lock = threading.Lock()
+
+
+def attached_index() -> Optional[MatchingIndex]:
+    """The published generation, swapped when a newer one appears (None when disabled or unbuilt)"""
+    global _attached, _checked_at
+    directory = settings.MATCHING_INDEX_DIR
+    if not directory:
+        return None
+    now = time.monotonic()
+    if now - _checked_at < settings.MATCHING_INDEX_CHECK_INTERVAL:
+        return _attached
+    with _attach_lock:
+        if now - _checked_at >= settings.MATCHING_INDEX_CHECK_INTERVAL:
+            _checked_at = now
+            generation = published_generation(directory)
+            if generation and (_attached is None or _attached.generation != generation):
+                try:
+                    _attached = MatchingIndex.open(os.path.join(directory, generation))
+                    print(f"Attached matching index {generation} ({len(_attached)} candidates)")
+                except (OSError, ValueError) as e:
+                    print(f"Could not attach matching index {generation}: {e}")
+    return _attached
+
+
+def loaded_index() -> Optional[MatchingIndex]:
+    """The attached generation, without checking for a newer one"""
+    return _attached
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.database import connect_to_database, get_database, get_redis
+
+    parser = argparse.ArgumentParser(prog="python -m app.ml.matching_index", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dir", default=settings.MATCHING_INDEX_DIR, help="index directory (MATCHING_INDEX_DIR)")
+    parser.add_argument("--force", action="store_true", help="build even if candidates did not change")
+    args = parser.parse_args()
+    if not args.dir:
+        raise SystemExit("Set MATCHING_INDEX_DIR or pass --dir")
+
+    async def main():
+        await connect_to_database()
+        start = time.perf_counter()
+        generation = await build_index(await get_database(), get_redis(), args.dir, force=args.force)
+        if generation is None:
+            print("Matching index up to date (or being built by another process)")
+        else:
+            meta = published_meta(args.dir)
+            print(f"Published matching index {generation}: {meta['candidates']} candidates, "
+                  f"{meta['terms']} terms in {time.perf_counter() - start:.1f}s")
+
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Server-side pre-scoring for job rankings.
+
+The skill and experience parts of the match score only need a candidate's
+skills and years of experience, so MongoDB can compute them and keep an
+over-fetched shortlist with a top-k `$sort`/`$limit`. Only the shortlist is
+sent to Python, where the matching engine adds text similarity and reranks.
+
+Text similarity weighs 0.3 of the total, so a candidate left out of the
+shortlist can only beat a shortlisted one when its CV is a much better
+textual match; the over-fetch factor keeps that unlikely.
+"""
+
+from typing import Dict, List
+
+from app.utils.projection import MATCHING_CANDIDATE_PROJECTION
+
+# Weights of MatchingEngine.calculate_match_score
+SKILL_WEIGHT = 0.4
+EXPERIENCE_WEIGHT = 0.3
+NICE_TO_HAVE_BONUS = 0.2
+
+
+def _overlap(wanted: List[str]) -> Dict:
+    """Fraction of `wanted` (lowercase, repeats counted like the engine) found in `$$skills`"""
+    found = {"$filter": {"input": {"$literal": wanted}, "as": "wanted", "cond": {"$in": ["$$wanted", "$$skills"]}}}
+    return {"$divide": [{"$size": found}, len(wanted)]}
+
+
+def skill_score_expression(job: Dict) -> Dict:
+    required = [s.lower() for s in job.get("required_skills") or []]
+    if not required:
+        return {"$literal": 0.0}
+    nice_to_have = [s.lower() for s in job.get("nice_to_have_skills") or []]
+
+    score = _overlap(required)
+    if nice_to_have:
+        score = {"$add": [score, {"$multiply": [_overlap(nice_to_have), NICE_TO_HAVE_BONUS]}]}
+    skills = {"$map": {"input": {"$ifNull": ["$skills", []]}, "as": "skill", "in": {"$toLower": "$$skill"}}}
+    return {"$let": {"vars": {"skills": skills}, "in": {"$min": [score, 1.0]}}}
+
+
+def experience_score_expression(job: Dict) -> Dict:
+    min_exp = job.get("min_experience", 0)
+    max_exp = job.get("max_experience")
+    experience = {"$ifNull": ["$experience_years", 0]}
+
+    qualified = 1.0
+    if max_exp:
+        # Overqualified penalty
+        qualified = {"$cond": [{"$gt": [experience, max_exp + 3]}, 0.8, 1.0]}
+    return {"$switch": {
+        "branches": [
+            {"case": {"$gte": [experience, min_exp]}, "then": qualified},
+            {"case": {"$gte": [experience, min_exp - 1]}, "then": 0.8},
+            {"case": {"$gte": [experience, min_exp - 2]}, "then": 0.6},
+        ],
+        "default": 0.3
+    }}
+
+
+def prescore_pipeline(job: Dict, shortlist_size: int, query: Dict = None) -> List[Dict]:
+    """Aggregation returning the `shortlist_size` best candidates on skills and experience"""
+    return [
+        {"$match": query or {}},
+        {"$project": {
+            **MATCHING_CANDIDATE_PROJECTION,
+            "prescore": {"$add": [
+                {"$multiply": [skill_score_expression(job), SKILL_WEIGHT]},
+                {"$multiply": [experience_score_expression(job), EXPERIENCE_WEIGHT]}
+            ]}
+        }},
+        {"$sort": {"prescore": -1, "_id": 1}},
+        {"$limit": shortlist_size}
+    ]
+
+
+async def shortlist_candidates(db, job: Dict, shortlist_size: int) -> List[Dict]:
+    """Candidates worth scoring in full for a job, in MATCHING_CANDIDATE_PROJECTION form"""
+    pipeline = prescore_pipeline(job, shortlist_size)
+    return await db.candidates.aggregate(pipeline).to_list(length=shortlist_size)
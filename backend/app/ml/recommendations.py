@@ -0,0 +1,431 @@
+"""
+Precomputed recommendations.
+
+A background refresh stores in Redis the top candidates of every active job
+and the top jobs of every candidate, so the matching endpoints can serve
+them without scoring anything. Write paths (app/utils/events.py) mark the
+candidates and jobs they change as dirty. A refresh takes the dirty sets
+and rewrites only the lists they affect:
+
+* a dirty or new job has its list recomputed over all candidates, and its
+  new scores are merged into the candidates' lists;
+* a dirty or new candidate has its list recomputed over all active jobs,
+  and its new scores are merged into the jobs' lists;
+* deleted (or closed) entities are removed from the lists.
+
+Sets of the ids that have a list tell new and deleted entities apart
+without probing every key; when nothing is dirty and their sizes match the
+collections, a refresh stops there.
+
+A list remembers its threshold: the score of its last entry when entries
+were cut off. Entities outside the list score at most that, so a merge
+only inserts new scores above it. A list left with fewer than half its
+size is marked dirty and recomputed by the next refresh.
+
+Scores over all candidates come from the shared matching index
+(app/ml/matching_index.py) when one is attached, with dirty candidates
+rescored by the engine. Without one, the refresh builds an index in memory,
+but only when a list has to be recomputed over all candidates.
+
+Endpoints fall back to live scoring for entities without a list, dirty
+ones, and requests for more entries than a list holds. Changes to *other*
+entities reach a list at the next refresh (``PRECOMPUTE_INTERVAL``).
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from bson import ObjectId
+
+from app.config import settings
+from app.ml.matching_index import MatchingIndex, attached_index, build_arrays, top_scores
+from app.utils.cv_store import attach_cv_texts
+from app.utils.projection import MATCHING_CANDIDATE_PROJECTION, MATCHING_JOB_PROJECTION
+from app.utils.serialization import pack, unpack
+
+# "job": the candidates recommended for a job, "candidate": the jobs for a candidate
+KINDS = ("job", "candidate")
+PREFIX = "recommendations:"
+LOCK_KEY = f"{PREFIX}lock"
+LOCK_TTL = 3600  # seconds, frees the lock of a crashed refresh
+MAX_MERGED_JOBS = 16  # with more new or changed jobs, every list is recomputed
+TOP_K_CHUNK = 16  # jobs scored between two top-k selections
+PIPELINE_SIZE = 1000
+
+
+def list_key(kind: str, entity_id) -> str:
+    return f"{PREFIX}{kind}:{entity_id}"
+
+
+def dirty_key(kind: str) -> str:
+    return f"{PREFIX}dirty:{kind}"
+
+
+def processing_key(kind: str) -> str:
+    # Dirty ids taken by the refresh in progress (or by a failed one)
+    return f"{PREFIX}processing:{kind}"
+
+
+def listed_key(kind: str) -> str:
+    # Ids that have a stored list
+    return f"{PREFIX}listed:{kind}"
+
+
+def mark_dirty(redis, kind: str, entity_id):
+    """Score `entity_id` live until the next refresh has recomputed what it affects"""
+    if settings.PRECOMPUTE_INTERVAL > 0:
+        redis.sadd(dirty_key(kind), str(entity_id))
+
+
+def get_list(redis, kind: str, entity_id: str, top_n: int) -> Optional[Dict]:
+    """Precomputed top `top_n` of an entity, None when it has to be scored live"""
+    if settings.PRECOMPUTE_INTERVAL <= 0:
+        return None
+    pipe = redis.pipeline(transaction=False)
+    pipe.sismember(dirty_key(kind), entity_id)
+    pipe.sismember(processing_key(kind), entity_id)
+    pipe.get(list_key(kind, entity_id))
+    dirty, processing, data = pipe.execute()
+    if dirty or processing or data is None:
+        return None
+    entry = unpack(data)
+    if entry["threshold"] is not None and not 0 <= top_n <= len(entry["items"]):
+        return None
+    entry["items"] = entry["items"][:top_n]
+    return entry
+
+
+def _sort_key(item):
+    # Rounded total score, then id (rankings are computed in _id order)
+    return -item[1]["total_score"], item[0]
+
+
+def _entry(items: List, size: int, evaluated: int, threshold: Optional[float] = None) -> Dict:
+    """List entry of the `size` best of `items` (sorted)"""
+    if len(items) > size:
+        threshold = items[size - 1][1]["total_score"]
+        items = items[:size]
+    return {
+        "items": [list(item) for item in items],
+        "threshold": threshold,
+        "evaluated": evaluated,
+        "computed_at": datetime.utcnow().isoformat()
+    }
+
+
+def merge(entry: Dict, removed: Set[str], added: List[Tuple[str, Dict]], size: int, evaluated: int) -> Optional[Dict]:
+    """`entry` without the `removed` ids, plus the `added` scores ranking above its threshold.
+
+    Ids of `added` must be in `removed`. Returns None when too few entries
+    are left and the list must be recomputed.
+    """
+    threshold = entry["threshold"]
+    items = [item for item in entry["items"] if item[0] not in removed]
+    items += [item for item in added if threshold is None or item[1]["total_score"] > threshold]
+    items.sort(key=_sort_key)
+    if threshold is not None and len(items) < size // 2:
+        return None
+    return _entry(items, size, evaluated, threshold)
+
+
+class _TopK:
+    """Best `k` columns of each row, for columns added one at a time"""
+
+    def __init__(self, rows: int, k: int):
+        self.k = k
+        self.columns = np.empty((rows, 0), dtype=np.int64)
+        self.scores = [np.empty((rows, 0)) for _ in range(4)]
+        self.pending = []
+
+    def add(self, column: int, scores: Tuple[np.ndarray, ...]):
+        self.pending.append((column, scores))
+        if len(self.pending) >= TOP_K_CHUNK:
+            self._select()
+
+    def _select(self):
+        rows = len(self.columns)
+        if not self.pending or not rows:
+            self.pending = []
+            return
+        columns = np.hstack([self.columns, np.tile([column for column, _ in self.pending], (rows, 1))])
+        scores = [
+            np.hstack([kept, np.column_stack([added[i] for _, added in self.pending])])
+            for i, kept in enumerate(self.scores)
+        ]
+        order = np.lexsort((columns, -np.round(scores[0], 3)))[:, :self.k]
+        self.columns = np.take_along_axis(columns, order, axis=1)
+        self.scores = [np.take_along_axis(values, order, axis=1) for values in scores]
+        self.pending = []
+
+    def result(self) -> Tuple[np.ndarray, List[np.ndarray]]:
+        self._select()
+        return self.columns, self.scores
+
+
+async def _load_candidates(db, ids: List[str]) -> List[Dict]:
+    """Candidates as the engine reads them, in `ids` order"""
+    docs = []
+    for start in range(0, len(ids), settings.ANALYTICS_BATCH_SIZE):
+        batch = [ObjectId(i) for i in ids[start:start + settings.ANALYTICS_BATCH_SIZE]]
+        docs += await db.candidates.find({"_id": {"$in": batch}}, MATCHING_CANDIDATE_PROJECTION).to_list(length=None)
+    await attach_cv_texts(db, docs)
+    by_id = {str(doc["_id"]): doc for doc in docs}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+class _Scorer:
+    """Score arrays of a set of candidates, in id order, for one job at a time"""
+
+    def __init__(self, engine, index: Optional[MatchingIndex], index_rows: np.ndarray,
+                 indexed_ids: List[str], candidates: List[Dict]):
+        self.engine = engine
+        self.index = index
+        self.index_rows = index_rows
+        self.candidates = candidates
+        ids = indexed_ids + [str(candidate["_id"]) for candidate in candidates]
+        self.order = np.argsort(np.array(ids, dtype="S24"), kind="stable")
+        self.ids = [ids[row] for row in self.order]
+        self.rows = {candidate_id: row for row, candidate_id in enumerate(self.ids)}
+
+    @classmethod
+    async def create(cls, db, engine, index: Optional[MatchingIndex], candidate_ids: List[str],
+                     rescored: Set[str]) -> "_Scorer":
+        """Rows found in `index` (and not in `rescored`) are scored from it, the others by the engine"""
+        wanted = set(candidate_ids)
+        index_rows, indexed_ids = [], []
+        if index is not None:
+            for row, candidate_id in enumerate(index.ids):
+                candidate_id = candidate_id.decode()
+                if candidate_id in wanted and candidate_id not in rescored:
+                    index_rows.append(row)
+                    indexed_ids.append(candidate_id)
+        # Candidates deleted since they were listed are left out
+        candidates = await _load_candidates(db, sorted(wanted.difference(indexed_ids)))
+        return cls(engine, index, np.array(index_rows, dtype=np.int64), indexed_ids, candidates)
+
+    def score(self, job: Dict) -> Tuple[np.ndarray, ...]:
+        """Total, skill, experience and text scores of every row"""
+        parts = [[np.zeros(0)] for _ in range(4)]
+        if len(self.index_rows):
+            for part, values in zip(parts, self.index.score(self.engine, job)):
+                part.append(values[self.index_rows])
+        if self.candidates:
+            for part, values in zip(parts, self.engine.score_arrays(self.candidates, job)):
+                part.append(values)
+        return tuple(np.concatenate(part)[self.order] for part in parts)
+
+    def formatted(self, scores: Tuple[np.ndarray, ...], rows: List[int]) -> List[Tuple[str, Dict]]:
+        return list(zip(
+            [self.ids[row] for row in rows],
+            self.engine.format_scores(*(values[rows] for values in scores))
+        ))
+
+
+def _take_dirty(redis) -> Dict[str, Set[str]]:
+    """Move the dirty ids to the processing sets, returns all ids being processed"""
+    pipe = redis.pipeline()
+    for kind in KINDS:
+        pipe.sunionstore(processing_key(kind), [processing_key(kind), dirty_key(kind)])
+        pipe.delete(dirty_key(kind))
+        pipe.smembers(processing_key(kind))
+    values = pipe.execute()[2::3]
+    return {kind: {_text(member) for member in members} for kind, members in zip(KINDS, values)}
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _listed(redis) -> Dict[str, Set[str]]:
+    pipe = redis.pipeline(transaction=False)
+    for kind in KINDS:
+        pipe.smembers(listed_key(kind))
+    return {kind: {_text(member) for member in members} for kind, members in zip(KINDS, pipe.execute())}
+
+
+def _stored(redis, kind: str, ids: List[str]) -> Dict[str, Dict]:
+    entries = {}
+    for start in range(0, len(ids), PIPELINE_SIZE):
+        batch = ids[start:start + PIPELINE_SIZE]
+        values = redis.mget([list_key(kind, entity_id) for entity_id in batch])
+        entries.update((entity_id, unpack(value)) for entity_id, value in zip(batch, values) if value is not None)
+    return entries
+
+
+class _Writer:
+    """Pipelined writes of lists, and of ids left dirty for the next refresh"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.pipe = redis.pipeline(transaction=False)
+        self.counts = {"written": 0, "deleted": 0, "deferred": 0}
+        self.pending = 0
+
+    def write(self, kind: str, entity_id: str, entry: Optional[Dict]):
+        if entry is None:
+            self.pipe.sadd(dirty_key(kind), entity_id)
+            self.counts["deferred"] += 1
+        else:
+            self.pipe.set(list_key(kind, entity_id), pack(entry))
+            self.pipe.sadd(listed_key(kind), entity_id)
+            self.counts["written"] += 1
+        self._flush_if_full()
+
+    def delete(self, kind: str, entity_id: str):
+        self.pipe.delete(list_key(kind, entity_id))
+        self.pipe.srem(listed_key(kind), entity_id)
+        self.counts["deleted"] += 1
+        self._flush_if_full()
+
+    def _flush_if_full(self):
+        self.pending += 1
+        if self.pending >= PIPELINE_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.pipe.execute()
+        self.pending = 0
+
+
+async def refresh_recommendations(db, redis, engine) -> Dict[str, int]:
+    """Recompute the lists affected by changes since the last refresh.
+
+    Ids stay in the processing sets (and are served live) until the lists
+    are written; after a failure the next refresh takes them again.
+    """
+    counts = await _refresh(db, redis, engine, _take_dirty(redis))
+    redis.delete(*[processing_key(kind) for kind in KINDS])
+    return counts
+
+
+async def _up_to_date(db, dirty: Dict[str, Set[str]], listed_counts: List[int]) -> bool:
+    """Nothing dirty and one list per entity: nothing to do, without reading every id.
+
+    Entities added or removed outside the API show up as a count mismatch.
+    """
+    if dirty["job"] or dirty["candidate"]:
+        return False
+    return listed_counts == [
+        await db.jobs.count_documents({"status": "active"}),
+        await db.candidates.estimated_document_count()
+    ]
+
+
+async def _refresh(db, redis, engine, dirty: Dict[str, Set[str]]) -> Dict[str, int]:
+    loop = asyncio.get_running_loop()
+    per_job = settings.PRECOMPUTE_CANDIDATES_PER_JOB
+    per_candidate = settings.PRECOMPUTE_JOBS_PER_CANDIDATE
+
+    pipe = redis.pipeline(transaction=False)
+    for kind in KINDS:
+        pipe.scard(listed_key(kind))
+    if await _up_to_date(db, dirty, pipe.execute()):
+        return {"written": 0, "deleted": 0, "deferred": 0}
+
+    jobs = await db.jobs.find({"status": "active"}, MATCHING_JOB_PROJECTION).sort("_id", 1).to_list(length=None)
+    job_ids = [str(job["_id"]) for job in jobs]
+    candidate_ids = [str(c["_id"]) async for c in db.candidates.find({}, {"_id": 1}).sort("_id", 1)]
+    listed = _listed(redis)
+
+    # Recomputed over all candidates / all jobs
+    full_jobs = (dirty["job"] & set(job_ids)) | (set(job_ids) - listed["job"])
+    changed = dirty["candidate"] & set(candidate_ids)
+    full_candidates = changed | (set(candidate_ids) - listed["candidate"])
+    # Merged into the other lists / removed from them
+    merged_jobs = full_jobs
+    if len(full_jobs) > MAX_MERGED_JOBS:
+        full_jobs, merged_jobs, full_candidates = set(job_ids), set(), set(candidate_ids)
+    removed_jobs = (dirty["job"] | listed["job"]) - set(job_ids)
+    removed_candidates = (dirty["candidate"] | listed["candidate"]) - set(candidate_ids)
+
+    writer = _Writer(redis)
+    for candidate_id in removed_candidates:
+        writer.delete("candidate", candidate_id)
+    for job_id in removed_jobs:
+        writer.delete("job", job_id)
+    if not (full_jobs or full_candidates or removed_candidates or removed_jobs):
+        writer.flush()
+        return writer.counts
+
+    # Scores over all candidates are needed unless only dirty candidates changed
+    if full_jobs or full_candidates - changed:
+        index = attached_index()
+        if index is None:
+            arrays, meta = await build_arrays(db, engine, settings.ANALYTICS_BATCH_SIZE)
+            index = MatchingIndex(arrays, meta)
+        scorer = await _Scorer.create(db, engine, index, candidate_ids, changed)
+    else:
+        scorer = await _Scorer.create(db, engine, None, sorted(changed), set())
+
+    # Candidates whose scores go into every job's list, and whose own list is recomputed
+    added_ids = [c for c in sorted(full_candidates) if c in scorer.rows]
+    column_scorer = scorer
+    if added_ids and len(full_jobs) < len(jobs) and len(added_ids) < len(scorer.ids):
+        # Jobs not recomputed only need these rows: score them alone
+        column_scorer = await _Scorer.create(db, engine, None, added_ids, set())
+        added_ids = [c for c in added_ids if c in column_scorer.rows]
+    added_rows = [scorer.rows[c] for c in added_ids]
+    column_rows = [column_scorer.rows[c] for c in added_ids]
+    top_jobs = _TopK(len(added_ids), per_candidate)
+    removed = dirty["candidate"] | full_candidates | removed_candidates
+    stored_jobs = _stored(redis, "job", [j for j in job_ids if j not in full_jobs]) if removed else {}
+    merged_scores = {}
+
+    for position, job in enumerate(jobs):
+        job_id = job_ids[position]
+        added_scores = None
+        if job_id in full_jobs:
+            scores = await loop.run_in_executor(None, scorer.score, job)
+            items = top_scores(engine, scorer.ids, *scores, top_n=per_job)
+            threshold = items[-1][1]["total_score"] if len(scorer.ids) > per_job else None
+            writer.write("job", job_id, _entry(items, per_job, len(scorer.ids), threshold))
+            if job_id in merged_jobs:
+                merged_scores[job_id] = scores
+            added_scores = tuple(values[added_rows] for values in scores)
+        elif added_ids:
+            scores = await loop.run_in_executor(None, column_scorer.score, job)
+            added_scores = tuple(values[column_rows] for values in scores)
+        if job_id in stored_jobs:
+            added = list(zip(added_ids, engine.format_scores(*added_scores))) if added_ids else []
+            writer.write("job", job_id, merge(stored_jobs[job_id], removed, added, per_job, len(candidate_ids)))
+        if added_ids:
+            top_jobs.add(position, added_scores)
+
+    # Lists of the new and changed candidates
+    columns, scores = top_jobs.result()
+    for i, candidate_id in enumerate(added_ids):
+        items = sorted(
+            zip([job_ids[column] for column in columns[i]], engine.format_scores(*(values[i] for values in scores))),
+            key=_sort_key
+        )
+        threshold = items[-1][1]["total_score"] if len(jobs) > per_candidate and items else None
+        writer.write("candidate", candidate_id, _entry(items, per_candidate, len(jobs), threshold))
+
+    # New and changed jobs merged into the other candidates' lists
+    if merged_jobs or removed_jobs:
+        others = [c for c in candidate_ids if c not in full_candidates]
+        for start in range(0, len(others), PIPELINE_SIZE):
+            stored = _stored(redis, "candidate", others[start:start + PIPELINE_SIZE])
+            for candidate_id, entry in stored.items():
+                row = scorer.rows.get(candidate_id)
+                added = [] if row is None else [
+                    (job_id, scorer.formatted(job_scores, [row])[0][1]) for job_id, job_scores in merged_scores.items()
+                ]
+                writer.write("candidate", candidate_id, merge(
+                    entry, merged_jobs | removed_jobs, added, per_candidate, len(jobs)
+                ))
+    writer.flush()
+    return writer.counts
+
+
+async def refresh(db, redis) -> Optional[Dict[str, int]]:
+    """One refresh, unless another process is running one"""
+    if not redis.set(LOCK_KEY, 1, nx=True, ex=LOCK_TTL):
+        return None
+    try:
+        from app.ml import get_matching_engine
+        return await refresh_recommendations(db, redis, get_matching_engine())
+    finally:
+        redis.delete(LOCK_KEY)
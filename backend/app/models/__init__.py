@@ -1,5 +1,6 @@
 from .candidate import Candidate, CandidateCreate, CandidateResponse
 from .job import Job, JobCreate, JobResponse
+from .matching import BulkScoreRequest, ScorePair
 
 __all__ = [
     "Candidate",
@@ -8,4 +9,6 @@ __all__ = [
     "Job",
     "JobCreate",
     "JobResponse",
+    "BulkScoreRequest",
+    "ScorePair",
 ]
@@ -29,7 +29,9 @@ class Candidate(BaseModel):
     skills: List[str] = []
     experience_years: int = 0
     education: Optional[str] = None
-    cv_text: Optional[str] = None
+    cv_text: Optional[str] = None  # loaded from the cv_texts store
+    has_cv_text: bool = False
+    cv_length: int = 0
     cv_file_path: Optional[str] = None
     linkedin_url: Optional[str] = None
     github_url: Optional[str] = None
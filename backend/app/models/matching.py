@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ScorePair(BaseModel):
+    """A candidate/job pair to score"""
+    candidate_id: str
+    job_id: str
+
+
+class BulkScoreRequest(BaseModel):
+    """Bulk scoring request: a job with candidate IDs and/or explicit pairs"""
+    job_id: Optional[str] = None
+    candidate_ids: List[str] = []
+    pairs: List[ScorePair] = []
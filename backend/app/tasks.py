@@ -0,0 +1,40 @@
+"""
+Periodic background tasks run inside the API process.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List
+
+_tasks: List[asyncio.Task] = []
+
+
+async def _run_periodically(name: str, func: Callable[[], Awaitable], interval: float):
+    while True:
+        try:
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Background task {name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_periodic_task(name: str, func: Callable[[], Awaitable], interval: float):
+    """Run `func` now and then every `interval` seconds (disabled if <= 0)"""
+    if interval <= 0:
+        return
+    task = asyncio.create_task(_run_periodically(name, func, interval), name=name)
+    _tasks.append(task)
+
+
+def start_task(name: str, func: Callable[[], Awaitable]):
+    """Run `func` once in the background"""
+    _tasks.append(asyncio.create_task(func(), name=name))
+
+
+async def stop_background_tasks():
+    """Cancel all background tasks"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -2,8 +2,6 @@ import re
 import os
 from typing import Optional
 from pathlib import Path
-import PyPDF2
-from docx import Document
 
 
 class CVParser:
@@ -12,6 +10,7 @@ class CVParser:
     @staticmethod
     def extract_text_from_pdf(file_path: str) -> str:
         """Extract text from PDF file"""
+        import PyPDF2  # deferred, only CV uploads need it
         text = ""
         try:
             with open(file_path, 'rb') as file:
@@ -25,6 +24,7 @@ class CVParser:
     @staticmethod
     def extract_text_from_docx(file_path: str) -> str:
         """Extract text from DOCX file"""
+        from docx import Document  # deferred, only CV uploads need it
         text = ""
         try:
             doc = Document(file_path)
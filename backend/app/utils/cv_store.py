@@ -0,0 +1,123 @@
+"""
+Compressed side store for CV text.
+
+CV text is kept out of candidate documents so that candidate scans (listing,
+analytics, matching on skills) do not drag it through Mongo and the driver.
+Each text is stored zlib-compressed in the ``cv_texts`` collection under the
+candidate's ``_id``; the candidate keeps ``has_cv_text`` and ``cv_length``.
+Texts are loaded lazily, only by the reads that need them.
+
+Run ``python -m app.utils.cv_store`` to move inline ``cv_text`` fields of
+existing candidates into the store.
+"""
+
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from bson import Binary, ObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+COLLECTION = "cv_texts"
+COMPRESSION_LEVEL = 6
+
+
+def compress_cv_text(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress_cv_text(payload: bytes) -> str:
+    return zlib.decompress(payload).decode("utf-8")
+
+
+def _document(text: str) -> Dict:
+    return {
+        "codec": "zlib",
+        "payload": Binary(compress_cv_text(text)),
+        "length": len(text),
+        "updated_at": datetime.utcnow()
+    }
+
+
+def wants_cv_text(projection: Optional[Dict]) -> bool:
+    """Whether a read with this projection should return the CV text"""
+    if projection is None:
+        return True
+    return projection.get("cv_text") == 1 or (
+        0 in projection.values() and projection.get("cv_text") != 0
+    )
+
+
+async def save_cv_text(db, candidate_id: ObjectId, text: str):
+    """Store (or replace) a candidate's CV text"""
+    await db[COLLECTION].replace_one({"_id": candidate_id}, _document(text), upsert=True)
+
+
+async def delete_cv_text(db, candidate_id: ObjectId):
+    await db[COLLECTION].delete_one({"_id": candidate_id})
+
+
+async def load_cv_texts(db, candidate_ids: Iterable[ObjectId]) -> Dict[ObjectId, str]:
+    """CV texts of several candidates with a single $in query"""
+    ids = list(candidate_ids)
+    if not ids:
+        return {}
+    cursor = db[COLLECTION].find({"_id": {"$in": ids}}, {"payload": 1})
+    return {doc["_id"]: decompress_cv_text(doc["payload"]) async for doc in cursor}
+
+
+async def attach_cv_texts(db, candidates: List[Dict]) -> List[Dict]:
+    """Fill `cv_text` in place for candidates whose text is in the store"""
+    missing = [c["_id"] for c in candidates if "cv_text" not in c and c.get("has_cv_text")]
+    texts = await load_cv_texts(db, missing)
+    for candidate in candidates:
+        if candidate["_id"] in texts:
+            candidate["cv_text"] = texts[candidate["_id"]]
+    return candidates
+
+
+async def migrate_inline_cv_texts(db, batch_size: int = 1000) -> int:
+    """Move inline candidate `cv_text` fields into the store, returns count"""
+    migrated = 0
+    cursor = db.candidates.find({"cv_text": {"$type": "string"}}, {"cv_text": 1}).batch_size(batch_size)
+    batch = []
+    async for candidate in cursor:
+        batch.append(candidate)
+        if len(batch) >= batch_size:
+            migrated += await _migrate_batch(db, batch)
+            batch = []
+    if batch:
+        migrated += await _migrate_batch(db, batch)
+    return migrated
+
+
+async def _migrate_batch(db, candidates: List[Dict]) -> int:
+    await db[COLLECTION].bulk_write([
+        ReplaceOne({"_id": c["_id"]}, _document(c["cv_text"]), upsert=True)
+        for c in candidates
+    ], ordered=False)
+    await db.candidates.bulk_write([
+        UpdateOne(
+            {"_id": c["_id"]},
+            {"$set": {"has_cv_text": True, "cv_length": len(c["cv_text"])}, "$unset": {"cv_text": ""}}
+        )
+        for c in candidates
+    ], ordered=False)
+    return len(candidates)
+
+
+if __name__ == "__main__":
+    import asyncio
+    from app.config import settings
+    from app.database import connect_to_database, get_database, get_redis
+    from app.utils.http_cache import bump_generation
+
+    async def main():
+        await connect_to_database()
+        migrated = await migrate_inline_cv_texts(await get_database(), settings.ANALYTICS_BATCH_SIZE)
+        print(f"Moved {migrated} CV texts to the {COLLECTION} collection")
+        if migrated:
+            # Candidate documents changed outside the API
+            bump_generation(get_redis(), "candidates")
+
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""
+Write-path hooks for derived data.
+
+Endpoints that create, update or delete candidates and jobs report the
+document before and after the change (``None`` when it did not exist);
+derived stores and HTTP cache validators are kept in sync from here.
+
+The write has committed by the time the hooks run, so they never fail the
+request: a failed update is logged and counted
+(``recruitment_app_derived_update_failures_total``). Skill counters are
+corrected by their periodic reconciliation and rollups by
+``python -m app.analytics.rollups``; trending counts, recommendation dirty
+marks and cache generations catch up with later writes.
+"""
+
+import inspect
+from typing import Dict, Optional
+
+from app.analytics import rollups, skill_counters, trending
+from app.ml import recommendations
+from app.utils.http_cache import bump_generation
+from app.utils.metrics import DERIVED_UPDATE_FAILURES
+
+# Fields the hooks need from the previous version of a document
+CANDIDATE_EVENT_FIELDS = {"skills": 1}
+JOB_EVENT_FIELDS = {"required_skills": 1, "status": 1}
+
+
+async def _best_effort(store: str, update, *args):
+    """Run one derived data update, logging and counting failures"""
+    try:
+        result = update(*args)
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        DERIVED_UPDATE_FAILURES.labels(store=store).inc()
+        print(f"Derived data update failed ({store}): {e!r}")
+
+
+async def candidate_changed(db, redis, before: Optional[Dict], after: Optional[Dict]):
+    """Propagate a candidate write to derived data"""
+    candidate_id = (after or before)["_id"]
+    await _best_effort("skill_counters", skill_counters.apply_candidate_change, db, before, after)
+    await _best_effort("rollups", rollups.apply_candidate_change, db, before, after)
+    await _best_effort("trending", trending.apply_candidate_change, redis, before, after)
+    await _best_effort("recommendations", recommendations.mark_dirty, redis, "candidate", candidate_id)
+    await _best_effort("generations", bump_generation, redis, "candidates")
+
+
+async def job_changed(db, redis, before: Optional[Dict], after: Optional[Dict]):
+    """Propagate a job write to derived data"""
+    job_id = (after or before)["_id"]
+    await _best_effort("skill_counters", skill_counters.apply_job_change, db, before, after)
+    await _best_effort("rollups", rollups.apply_job_change, db, before, after)
+    await _best_effort("trending", trending.apply_job_change, redis, before, after)
+    await _best_effort("recommendations", recommendations.mark_dirty, redis, "job", job_id)
+    await _best_effort("generations", bump_generation, redis, "jobs")
@@ -0,0 +1,151 @@
+"""
+HTTP conditional requests.
+
+GET routes declare what their response depends on with the `conditional`
+dependency. For data routes the ETag is derived from per-collection
+generation counters kept in Redis and bumped by the write paths, so a
+client polling with `If-None-Match` gets a 304 before any query runs.
+Routes whose data changes outside the API (background refreshes) hash the
+response body instead, which saves the bandwidth but not the work.
+
+When Redis is unavailable responses are served without validators rather
+than failing.
+"""
+
+import hashlib
+import time
+from typing import Iterable, List, Optional
+
+from fastapi import Depends, Request
+from fastapi.responses import Response
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.database import get_redis
+
+GENERATION_PREFIX = "generation:"
+
+
+class NotModified(Exception):
+    """Raised by `conditional` when the client's copy is still current"""
+
+    def __init__(self, etag: str, cache_control: str):
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+def cache_control(max_age: int) -> str:
+    if max_age <= 0:
+        return "private, no-cache"
+    return f"private, max-age={max_age}"
+
+
+def _generation_key(name: str) -> str:
+    return f"{GENERATION_PREFIX}{name}"
+
+
+def bump_generation(redis, *names: str):
+    """Invalidate the ETags of everything depending on `names`.
+
+    Anything writing to candidates or jobs outside the API endpoints must
+    call this too (as the CV store migration and
+    scripts/generate_bulk_data.py do), or clients keep getting 304s for
+    data that changed.
+    """
+    pipe = redis.pipeline(transaction=False)
+    for name in names:
+        # Start from a timestamp so counters recreated after a Redis flush
+        # never reuse the values of ETags that clients still hold
+        pipe.set(_generation_key(name), time.time_ns(), nx=True)
+        pipe.incr(_generation_key(name))
+    pipe.execute()
+
+
+def get_generations(redis, names: Iterable[str]) -> List[str]:
+    keys = [_generation_key(name) for name in names]
+    values = redis.mget(keys)
+    if None in values:
+        for key, value in zip(keys, values):
+            if value is None:
+                redis.set(key, time.time_ns(), nx=True)
+        values = redis.mget(keys)
+    return values
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    # Weak: the same representation may be sent gzip-encoded or not
+    return f'W/"{digest}"'
+
+
+def content_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(",")}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def conditional(*collections: str, max_age: int = None, period: int = 0):
+    """Route dependency enabling ETag validation.
+
+    With `collections` the ETag changes whenever one of them is written to
+    (and every `period` seconds, for responses relative to the current
+    time); without, it is a hash of the response body.
+    """
+    header = cache_control(settings.HTTP_CACHE_MAX_AGE if max_age is None else max_age)
+
+    def check(request: Request, redis=Depends(get_redis)):
+        request.state.cache_control = header
+        request.state.etag = None
+        if not collections:
+            return
+        parts = [request.url.path, sorted(request.query_params.multi_items())]
+        try:
+            parts.extend(get_generations(redis, collections))
+        except RedisError as e:
+            # Served without validators until Redis is back
+            print(f"HTTP validators skipped: {e}")
+            request.state.cache_control = None
+            return
+        if period:
+            parts.append(int(time.time() // period))
+        etag = make_etag(*parts)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise NotModified(etag, header)
+        request.state.etag = etag
+
+    return check
+
+
+async def apply_validators(request: Request, response: Response) -> Response:
+    """Add ETag and Cache-Control to a response of a `conditional` route"""
+    header = getattr(request.state, "cache_control", None)
+    if header is None or response.status_code != 200:
+        return response
+
+    etag = request.state.etag
+    if etag is None:
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = content_etag(body)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag, header)
+        response = Response(content=body, status_code=response.status_code, headers=dict(response.headers))
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = header
+    return response
@@ -0,0 +1,183 @@
+"""
+Memory accounting.
+
+Subsystems holding in-process structures register a sizing function; the
+sizes are exported as Prometheus gauges, evaluated at scrape time. For
+everything else (and for leaks) `tracemalloc` snapshots can be taken and
+diffed through the admin API, grouped by the module that allocated.
+"""
+
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from prometheus_client import Gauge
+
+MEMORY_BYTES = Gauge(
+    'recruitment_app_memory_bytes',
+    'Estimated size of in-process structures in bytes',
+    ['subsystem']
+)
+
+MEMORY_ITEMS = Gauge(
+    'recruitment_app_memory_items',
+    'Number of entries in in-process structures',
+    ['subsystem']
+)
+
+INFLIGHT_BYTES = Gauge(
+    'recruitment_app_memory_inflight_bytes',
+    'Estimated size of documents loaded by requests in progress',
+    ['subsystem']
+)
+
+MAX_SNAPSHOTS = 5
+SIZE_SAMPLE = 50
+
+
+def deep_sizeof(obj, _seen=None) -> int:
+    """Approximate size of an object and everything it references"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    # Only look at SciPy once something imported it (no sparse matrix otherwise)
+    sparse = sys.modules.get("scipy.sparse")
+    if sparse is not None and sparse.issparse(obj):
+        return sum(getattr(obj, name).nbytes for name in ("data", "indices", "indptr") if hasattr(obj, name))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def estimate_list_size(items: List) -> int:
+    """Size of a list of similar documents, extrapolated from a sample"""
+    if not items:
+        return sys.getsizeof(items)
+    sample = items[:SIZE_SAMPLE]
+    return sys.getsizeof(items) + sum(deep_sizeof(item) for item in sample) * len(items) // len(sample)
+
+
+def register(subsystem: str, size: Callable[[], int], items: Optional[Callable[[], int]] = None):
+    """Export the size (and entry count) of a structure, computed at scrape time"""
+    MEMORY_BYTES.labels(subsystem=subsystem).set_function(size)
+    if items is not None:
+        MEMORY_ITEMS.labels(subsystem=subsystem).set_function(items)
+
+
+@contextmanager
+def track_inflight(subsystem: str, items: List):
+    """Count documents loaded by a request while it is being handled"""
+    size = estimate_list_size(items)
+    gauge = INFLIGHT_BYTES.labels(subsystem=subsystem)
+    gauge.inc(size)
+    try:
+        yield
+    finally:
+        gauge.dec(size)
+
+
+# tracemalloc snapshots
+
+_snapshots: "OrderedDict[int, Dict]" = OrderedDict()
+_snapshot_ids = iter(range(1, sys.maxsize))
+_lock = threading.Lock()
+
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),  # the snapshots kept here
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def start_tracing(frames: int = 1):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing():
+    tracemalloc.stop()
+    with _lock:
+        _snapshots.clear()
+
+
+def _module_names() -> Dict[str, str]:
+    names = {}
+    for name, module in list(sys.modules.items()):
+        filename = getattr(module, "__file__", None)
+        if filename:
+            names[filename] = name
+    return names
+
+
+def _module_of(filename: str, modules: Dict[str, str]) -> str:
+    if filename in modules:
+        return modules[filename]
+    # Files that are not modules themselves (e.g. site-packages data), by top directory
+    for marker in ("site-packages/", "dist-packages/"):
+        if marker in filename:
+            return filename.split(marker, 1)[1].split("/", 1)[0]
+    return filename
+
+
+def by_module(statistics) -> Dict[str, Dict]:
+    """Group tracemalloc statistics (or statistic diffs) by module"""
+    modules = _module_names()
+    grouped = {}
+    for stat in statistics:
+        module = _module_of(stat.traceback[0].filename, modules)
+        entry = grouped.setdefault(module, {"module": module, "size": 0, "count": 0})
+        entry["size"] += stat.size
+        entry["count"] += stat.count
+        if hasattr(stat, "size_diff"):
+            entry["size_diff"] = entry.get("size_diff", 0) + stat.size_diff
+            entry["count_diff"] = entry.get("count_diff", 0) + stat.count_diff
+    return grouped
+
+
+def take_snapshot() -> Dict:
+    """Take and keep a snapshot (the oldest is dropped beyond MAX_SNAPSHOTS)"""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not tracing, start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    current, peak = tracemalloc.get_traced_memory()
+    with _lock:
+        snapshot_id = next(_snapshot_ids)
+        _snapshots[snapshot_id] = {"id": snapshot_id, "taken_at": time.time(), "snapshot": snapshot,
+                                   "traced_bytes": current, "peak_bytes": peak}
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+        return _snapshots[snapshot_id]
+
+
+def get_snapshot(snapshot_id: int) -> Optional[Dict]:
+    with _lock:
+        return _snapshots.get(snapshot_id)
+
+
+def list_snapshots() -> List[Dict]:
+    with _lock:
+        return [{k: v for k, v in entry.items() if k != "snapshot"} for entry in _snapshots.values()]
+
+
+def top_modules(snapshot, limit: int = 20) -> List[Dict]:
+    grouped = by_module(snapshot.statistics("filename"))
+    return sorted(grouped.values(), key=lambda entry: entry["size"], reverse=True)[:limit]
+
+
+def diff_modules(base, target, limit: int = 20) -> List[Dict]:
+    grouped = by_module(target.compare_to(base, "filename"))
+    return sorted(grouped.values(), key=lambda entry: abs(entry["size_diff"]), reverse=True)[:limit]
@@ -0,0 +1,81 @@
+"""
+Prometheus metrics.
+
+Request metrics are labelled with the route template (``/api/jobs/{job_id}``)
+rather than the raw path, so the number of series stays bounded. The
+matching path reports per-stage latencies through `StageTimer`.
+"""
+
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram
+
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_COUNT = Counter(
+    'recruitment_app_requests_total',
+    'Total request count',
+    ['method', 'endpoint', 'status']
+)
+
+REQUEST_DURATION = Histogram(
+    'recruitment_app_request_duration_seconds',
+    'Request duration in seconds',
+    ['method', 'endpoint']
+)
+
+MATCHING_STAGE_DURATION = Histogram(
+    'recruitment_app_matching_stage_duration_seconds',
+    'Matching stage duration in seconds',
+    ['endpoint', 'stage'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+CANDIDATES_SCORED = Counter(
+    'recruitment_app_matching_candidates_scored_total',
+    'Candidates scored by the matching engine',
+    ['endpoint']
+)
+
+CANDIDATES_PRUNED = Counter(
+    'recruitment_app_matching_candidates_pruned_total',
+    'Candidates left out of a result (prescore shortlist, min_score or top_n)',
+    ['endpoint', 'reason']
+)
+
+DERIVED_UPDATE_FAILURES = Counter(
+    'recruitment_app_derived_update_failures_total',
+    'Derived data updates that failed after a successful write',
+    ['store']
+)
+
+
+def route_label(request) -> str:
+    """Route template of a handled request, for metric labels"""
+    route = request.scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class StageTimer:
+    """Times the stages of one matching request"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            MATCHING_STAGE_DURATION.labels(endpoint=self.endpoint, stage=name).observe(
+                time.perf_counter() - start
+            )
+
+    def scored(self, count: int):
+        CANDIDATES_SCORED.labels(endpoint=self.endpoint).inc(count)
+
+    def pruned(self, reason: str, count: int):
+        if count > 0:
+            CANDIDATES_PRUNED.labels(endpoint=self.endpoint, reason=reason).inc(count)
@@ -0,0 +1,74 @@
+"""
+Keyset (cursor-based) pagination helpers.
+
+Lists are sorted newest first on (created_at, _id). The opaque cursor encodes
+the sort key of the last document of a page, so the next page is an index
+range scan instead of a skip over all previous pages.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.config import settings
+
+SORT = [("created_at", -1), ("_id", -1)]
+COUNT_MODES = ("exact", "estimated")
+
+
+def encode_cursor(document: Dict) -> str:
+    """Opaque cursor pointing after `document`"""
+    created_at = document.get("created_at")
+    payload = json.dumps([created_at.isoformat() if created_at else None, str(document["_id"])])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], ObjectId]:
+    """Sort key encoded in a cursor, raises ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, object_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(created_at) if created_at else None), ObjectId(object_id)
+    except (binascii.Error, InvalidId, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+
+
+def check_page(skip: int, cursor: Optional[str]):
+    """Raises ValueError when `skip` is combined with a cursor (the rows skipped would be lost)"""
+    if cursor and skip:
+        raise ValueError("skip cannot be combined with cursor")
+
+
+def after_cursor(query: Dict, cursor: str) -> Dict:
+    """Restrict `query` to documents sorting after the cursor"""
+    created_at, object_id = decode_cursor(cursor)
+    if created_at is None:
+        keyset = {"created_at": None, "_id": {"$lt": object_id}}
+    else:
+        keyset = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": object_id}},
+            # Documents without created_at sort last
+            {"created_at": None},
+        ]}
+    return {"$and": [query, keyset]} if query else keyset
+
+
+async def count_documents(collection, query: Dict, mode: Optional[str]) -> Optional[int]:
+    """Total matching documents, or None when counting was not requested.
+
+    "estimated" uses collection metadata for unfiltered lists and stops
+    counting filtered ones at PAGINATION_COUNT_LIMIT.
+    """
+    if mode is None:
+        return None
+    if mode == "exact":
+        return await collection.count_documents(query)
+    if not query:
+        return await collection.estimated_document_count()
+    return await collection.count_documents(query, limit=settings.PAGINATION_COUNT_LIMIT)
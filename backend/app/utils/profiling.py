@@ -0,0 +1,249 @@
+"""
+CPU profiling.
+
+Three ways to see where time goes, all behind the admin token:
+
+* per request: send ``X-Profile: collapsed|pstats`` (or ``?profile=``) with
+  ``X-Admin-Token`` and the response is replaced by the profile. ``pstats``
+  is a cProfile dump of the event-loop thread (load it with
+  ``pstats.Stats``); ``collapsed`` comes from a stack sampler covering all
+  threads, including the executor threads running bulk scoring, and can be
+  fed to flamegraph.pl or speedscope. It is process-wide: whatever else runs
+  meanwhile (concurrent requests, background tasks) shows up too.
+* sampled: with ``PROFILING_SAMPLE_RATE`` set, that fraction of requests is
+  stack-sampled and aggregated per route over ``PROFILING_WINDOW`` seconds.
+  Only the request's own frames are counted, so other requests sharing the
+  event loop are not credited to its route; work it hands to executor
+  threads is not attributed (profile it with ``collapsed``).
+* on demand: sample the whole process for a few seconds (admin endpoint).
+"""
+
+import asyncio
+import cProfile
+import hmac
+import marshal
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse, Response
+
+from app.config import settings
+from app.utils import memory
+from app.utils.metrics import route_label
+
+PROFILE_FORMATS = ("collapsed", "pstats")
+
+# Leaf frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ("threading", "wait"), ("selectors", "select"), ("queue", "get"),
+    ("concurrent.futures.thread", "_worker"),
+}
+
+
+def check_admin_token(token: Optional[str]) -> bool:
+    if not settings.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+
+
+def _frame_label(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def collapse_stack(frame, thread_name: str) -> Optional[str]:
+    """Collapsed (root first, ';'-separated) stack, None for idle threads"""
+    if (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES:
+        return None
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+def format_collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class StackSampler:
+    """Samples thread stacks from a background thread.
+
+    With `root` (a frame), only the thread currently running inside that
+    frame is sampled; otherwise every thread is.
+    """
+
+    def __init__(self, interval: float = None, root=None):
+        self.interval = interval or settings.PROFILING_SAMPLE_INTERVAL
+        self.root = root
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _inside_root(self, frame) -> bool:
+        while frame is not None:
+            if frame is self.root:
+                return True
+            frame = frame.f_back
+        return False
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.root is not None and not self._inside_root(frame)):
+                    continue
+                stack = collapse_stack(frame, names.get(ident, str(ident)))
+                if stack:
+                    self.stacks[stack] += 1
+            self.samples += 1
+
+
+class ProfileAggregate:
+    """Sampled stacks of many requests over a time window, per route"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.previous = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.started_at = time.time()
+        self.requests = 0
+        self.stacks = Counter()
+
+    def _rotate(self):
+        if time.time() - self.started_at >= self.window:
+            self.previous = {"started_at": self.started_at, "requests": self.requests, "stacks": self.stacks}
+            self._reset()
+
+    def add(self, route: str, stacks: Counter):
+        with self._lock:
+            self._rotate()
+            self.requests += 1
+            for stack, count in stacks.items():
+                self.stacks[f"{route};{stack}"] += count
+
+    def snapshot(self, previous: bool = False) -> Optional[Dict]:
+        with self._lock:
+            self._rotate()
+            if previous:
+                return self.previous
+            return {"started_at": self.started_at, "requests": self.requests, "stacks": Counter(self.stacks)}
+
+    def reset(self):
+        with self._lock:
+            self.previous = None
+            self._reset()
+
+
+aggregate = ProfileAggregate(settings.PROFILING_WINDOW)
+_sampling = threading.Lock()
+memory.register("profiling.aggregate", lambda: memory.deep_sizeof(aggregate.stacks), lambda: len(aggregate.stacks))
+
+
+def requested_profile(request) -> Optional[str]:
+    """Profile format requested by an authorized client, if any"""
+    mode = request.headers.get("x-profile") or request.query_params.get("profile")
+    if mode not in PROFILE_FORMATS:
+        return None
+    if not check_admin_token(request.headers.get("x-admin-token")):
+        return None
+    return mode
+
+
+def collapsed_response(stacks: Counter, headers: Dict = None) -> Response:
+    return PlainTextResponse(format_collapsed(stacks), headers=headers)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware: per-request and sampled profiling.
+
+    Registered innermost, so the endpoint runs in the same task as this
+    middleware and the sampler can tell the request's frames (those below
+    ``__call__``) from those of other requests on the event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        mode = requested_profile(request)
+        if mode is None:
+            sampled = settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+            # One sampled request at a time bounds the sampling overhead
+            if sampled and _sampling.acquire(blocking=False):
+                sampler = StackSampler(root=sys._getframe()).start()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    aggregate.add(route_label(request), sampler.stop())
+                    _sampling.release()
+            else:
+                await self.app(scope, receive, send)
+            return
+
+        # The profile replaces the response: keep its status, drop the rest
+        status = {}
+
+        async def discard(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        if mode == "pstats":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                profiler.disable()
+            profiler.create_stats()
+            response = Response(
+                content=marshal.dumps(profiler.stats),
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": 'attachment; filename="profile.pstats"'}
+            )
+        else:
+            sampler = StackSampler().start()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                stacks = sampler.stop()
+            response = collapsed_response(stacks)
+
+        response.headers["X-Profiled-Status"] = str(status.get("code"))
+        # The validators set by a conditional route describe the real response
+        request.state.cache_control = None
+        await response(scope, receive, send)
+
+
+async def sample_process(seconds: float) -> Counter:
+    """Stack samples of the whole process during `seconds`"""
+    sampler = StackSampler().start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stacks = sampler.stop()
+    return stacks
@@ -0,0 +1,49 @@
+"""
+Field projections for candidate and job reads.
+
+Endpoints accept a comma-separated `fields=` parameter; without it they use a
+lean default that leaves out bulky fields such as the CV text.
+"""
+
+from typing import Dict, Optional
+
+from app.models.candidate import Candidate
+from app.models.job import Job
+
+CANDIDATE_FIELDS = set(Candidate.model_fields) - {"id"}
+JOB_FIELDS = set(Job.model_fields) - {"id"}
+
+# Default projections
+CANDIDATE_LIST_PROJECTION = {"cv_text": 0}
+CANDIDATE_DETAIL_PROJECTION = None
+JOB_LIST_PROJECTION = None
+JOB_DETAIL_PROJECTION = None
+
+# What the matching engine reads from each document
+# (cv_text is only inline for candidates not yet moved to the cv_texts store)
+MATCHING_CANDIDATE_PROJECTION = {
+    "name": 1, "email": 1, "skills": 1, "experience_years": 1, "cv_text": 1, "has_cv_text": 1
+}
+MATCHING_JOB_PROJECTION = {
+    "title": 1, "company": 1, "description": 1, "required_skills": 1,
+    "nice_to_have_skills": 1, "min_experience": 1, "max_experience": 1,
+    "location": 1, "remote": 1
+}
+
+
+def parse_fields(fields: Optional[str], allowed: set, default: Optional[Dict] = None) -> Optional[Dict]:
+    """Projection for a `fields=` parameter, raises ValueError on unknown fields"""
+    if not fields:
+        return default
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(names) - allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {unknown}. Available fields: {sorted(allowed)}")
+    return {name: 1 for name in names}
+
+
+def with_fields(projection: Optional[Dict], *names: str) -> Optional[Dict]:
+    """Make sure an inclusion projection also returns `names`"""
+    if not projection or 0 in projection.values():
+        return projection
+    return {**projection, **{name: 1 for name in names}}
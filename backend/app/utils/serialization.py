@@ -0,0 +1,68 @@
+"""
+Fast serialization for API responses and cache entries.
+
+Responses are rendered with orjson, which handles datetimes natively and
+ObjectIds through `_default`, so endpoints can return Mongo documents without
+per-document conversion loops. Cached response payloads are stored as the
+final JSON bytes and served without decoding; other structured cache entries
+use msgpack.
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+
+import msgpack
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=JSON_OPTIONS)
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def cached_json_response(payload: Optional[bytes]) -> Optional[Response]:
+    """Response serving cached JSON bytes as-is, None on cache miss"""
+    if payload is None:
+        return None
+    return Response(content=payload, media_type="application/json")
+
+
+def _pack_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return _default(value)
+
+
+def pack(content: Any) -> bytes:
+    """Serialize a cache entry to msgpack"""
+    return msgpack.packb(content, default=_pack_default, use_bin_type=True)
+
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
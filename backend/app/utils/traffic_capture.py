@@ -0,0 +1,206 @@
+"""
+Opt-in capture of anonymized request traces, for replay benchmarking.
+
+With ``TRAFFIC_CAPTURE_PATH`` set, a sample of requests is appended as JSON
+lines to a rotating file: route template, method, parameters, timing, status
+and request/response sizes. Nothing identifying is kept:
+
+* ObjectIds (path, query and JSON bodies) are replaced by keyed hashes
+  tagged with their kind (``candidate:…``, ``job:…``), so the access
+  pattern survives but the ids do not;
+* cursors are dropped, other string query values are kept (filters such as
+  skills, fields or status);
+* JSON bodies are kept only for the read-only matching endpoints, with the
+  same id hashing; other bodies (candidate data, CV files) are reduced to
+  their size.
+
+Records are written by a background thread (QueueHandler) so the event
+loop never waits on the disk. ``python -m loadtest.replay`` re-issues the
+traces.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+
+from app.config import settings
+from app.utils.metrics import route_label
+
+# Requests whose JSON body is captured (they do not write anything)
+REPLAYABLE_BODIES = ("/api/matching/",)
+DROPPED_PARAMS = {"cursor"}
+
+_OBJECT_ID = re.compile(r"^[0-9a-f]{24}$", re.IGNORECASE)
+
+_logger = logging.getLogger("app.traffic")
+_logger.propagate = False
+_listener: Optional[QueueListener] = None
+_key: bytes = b""
+
+
+def start_capture(path: str = None):
+    """Start writing traces to `path` (default TRAFFIC_CAPTURE_PATH)"""
+    global _listener, _key
+    path = path or settings.TRAFFIC_CAPTURE_PATH
+    if _listener is not None or not path:
+        return
+    # Without a configured key hashes are stable for the life of the process only
+    _key = (settings.TRAFFIC_CAPTURE_KEY or secrets.token_hex(16)).encode()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.TRAFFIC_CAPTURE_MAX_BYTES,
+        backupCount=settings.TRAFFIC_CAPTURE_BACKUPS
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    records = queue.SimpleQueue()
+    _logger.addHandler(QueueHandler(records))
+    _logger.setLevel(logging.INFO)
+    _listener = QueueListener(records, handler)
+    _listener.start()
+
+
+def stop_capture():
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _logger.handlers.clear()
+    _listener = None
+
+
+def is_capturing() -> bool:
+    return _listener is not None
+
+
+def _kind(key: Optional[str]) -> str:
+    key = (key or "").lower()
+    if "candidate" in key:
+        return "candidate"
+    if "job" in key:
+        return "job"
+    return "id"
+
+
+def hash_id(value: str, key: Optional[str] = None) -> str:
+    # ObjectIds are case-insensitive: both spellings of one id hash alike
+    digest = hmac.new(_key, value.lower().encode(), hashlib.sha256).hexdigest()[:24]
+    return f"{_kind(key)}:{digest}"
+
+
+def anonymize(value: Any, key: Optional[str] = None) -> Any:
+    """Copy of a JSON value with ObjectIds hashed (kind taken from the key)"""
+    if isinstance(value, str):
+        return hash_id(value, key) if _OBJECT_ID.match(value) else value
+    if isinstance(value, list):
+        return [anonymize(item, key) for item in value]
+    if isinstance(value, dict):
+        return {k: anonymize(v, k) for k, v in value.items()}
+    return value
+
+
+def _anonymized_path(request) -> str:
+    path = request.url.path
+    for name, value in request.path_params.items():
+        if isinstance(value, str) and _OBJECT_ID.match(value):
+            path = path.replace(value, hash_id(value, name))
+    return path
+
+
+def _wants_body(request) -> bool:
+    return (
+        request.method == "POST"
+        and request.url.path.startswith(REPLAYABLE_BODIES)
+        and request.headers.get("content-type", "").startswith("application/json")
+    )
+
+
+def _write(record: Dict):
+    _logger.info(json.dumps(record, separators=(",", ":")))
+
+
+class TrafficCaptureMiddleware:
+    """ASGI middleware: time sampled requests and log their anonymized traces.
+
+    Plain ASGI rather than ``@app.middleware("http")``: the request body is
+    copied from ``receive`` as the endpoint reads it, instead of being read
+    ahead of the endpoint (which then waits for a body that never comes).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _listener is None or random.random() >= settings.TRAFFIC_CAPTURE_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        chunks = [] if _wants_body(request) else None
+        response = {"status": None, "bytes": 0}
+
+        async def receive_copy():
+            message = await receive()
+            if chunks is not None and message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def send_counted(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        timestamp = time.time()
+        start = time.perf_counter()
+        try:
+            # Returns once the response, streamed or not, has been sent
+            await self.app(scope, receive_copy, send_counted)
+        except Exception:
+            # Failing requests are replayed too
+            response["status"] = 500
+            raise
+        finally:
+            _write(_record(request, chunks, response, timestamp, time.perf_counter() - start))
+
+
+def _record(request, chunks, response: Dict, timestamp: float, duration: float) -> Dict:
+    return {
+        "ts": timestamp,
+        "method": request.method,
+        "route": route_label(request),
+        "path": _anonymized_path(request),
+        "query": {
+            key: anonymize(value, key)
+            for key, value in request.query_params.items()
+            if key not in DROPPED_PARAMS
+        },
+        "body": _captured_body(chunks),
+        "request_bytes": int(request.headers.get("content-length") or 0),
+        "status": response["status"],
+        "duration": duration,
+        "response_bytes": response["bytes"],
+    }
+
+
+def _captured_body(chunks) -> Any:
+    if chunks is None:
+        return None
+    try:
+        return anonymize(json.loads(b"".join(chunks) or b"null"))
+    except ValueError:
+        return None
@@ -0,0 +1,83 @@
+"""
+Model preloading, warm-up and readiness.
+
+Importing the app no longer builds the matching engine. It is built either:
+
+* at import with ``PRELOAD_MODELS``, for pre-fork servers (``gunicorn
+  --preload``): workers then inherit the loaded modules and engine;
+* in the background at startup with ``WARMUP_ON_STARTUP`` (default);
+* otherwise on the first matching request.
+
+``/ready`` reports whether the engine is built and warmed up and whether
+all registered MongoDB indexes exist, so traffic can be held back until
+then.
+"""
+
+import asyncio
+import time
+from typing import Dict
+
+from app.indexes import missing_indexes
+from app.ml import get_matching_engine
+
+# Scored once to run the TF-IDF and similarity code paths before real traffic
+SAMPLE_CANDIDATE = {
+    "skills": ["Python", "Docker"],
+    "experience_years": 3,
+    "cv_text": "Python developer building services with Docker and PostgreSQL"
+}
+SAMPLE_JOB = {
+    "required_skills": ["Python"],
+    "min_experience": 2,
+    "description": "Backend engineer working with Python and Docker"
+}
+
+state = {"models": False, "indexes": False, "errors": {}, "warmup_seconds": None}
+
+
+def preload():
+    """Import the heavy modules and build the matching engine (blocking)"""
+    engine = get_matching_engine()
+    engine.score_candidates([SAMPLE_CANDIDATE], SAMPLE_JOB)
+    state["models"] = True
+    state["errors"].pop("models", None)
+
+
+async def check_indexes(db) -> bool:
+    try:
+        missing = await missing_indexes(db)
+    except Exception as e:
+        state["errors"]["indexes"] = str(e)
+        return False
+    if missing:
+        state["errors"]["indexes"] = f"missing indexes: {missing}"
+    else:
+        state["errors"].pop("indexes", None)
+    state["indexes"] = not missing
+    return state["indexes"]
+
+
+async def warm_up(db):
+    """Build the engine off the event loop, then check the indexes"""
+    start = time.perf_counter()
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, preload)
+    except Exception as e:
+        state["errors"]["models"] = str(e)
+        print(f"Matching engine warm-up failed: {e}")
+    await check_indexes(db)
+    state["warmup_seconds"] = round(time.perf_counter() - start, 3)
+    print(f"Warm-up done in {state['warmup_seconds']}s (models: {state['models']}, indexes: {state['indexes']})")
+
+
+async def readiness(db) -> Dict:
+    """Readiness report; indexes are re-checked until they all exist"""
+    if not state["indexes"]:
+        await check_indexes(db)
+    return {
+        "ready": state["models"] and state["indexes"],
+        "models": state["models"],
+        "indexes": state["indexes"],
+        "errors": state["errors"],
+        "warmup_seconds": state["warmup_seconds"]
+    }
@@ -0,0 +1,12 @@
+"""
+Micro-benchmarks of the matching and CV parsing hot paths.
+
+Run from ``backend/``:
+
+    python -m benchmarks --save baseline.json        # record a baseline
+    python -m benchmarks --compare baseline.json     # fails on regressions
+    python -m benchmarks matching.rank --max-size 10000
+
+Compare runs from the same machine only; the baseline records where it was
+taken.
+"""
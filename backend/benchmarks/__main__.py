@@ -0,0 +1,43 @@
+import argparse
+import sys
+
+from benchmarks import bench_cv_parser, bench_matching, bench_startup  # noqa: F401 (registration)
+from benchmarks.harness import DEFAULT_THRESHOLD, compare, environment, format_seconds, load, run, save
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Matching and CV parsing benchmarks")
+    parser.add_argument("names", nargs="*", help="benchmark name prefixes (default: all)")
+    parser.add_argument("--max-size", type=int, help="skip entity counts above this")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds spent per benchmark")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown counted as a regression (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = run(args.names, args.max_size, args.min_time)
+    if args.save:
+        save(args.save, results)
+        print(f"Saved {len(results)} results to {args.save}")
+    if not args.compare:
+        return 0
+
+    baseline = load(args.compare)
+    if baseline["environment"].get("processor") != environment()["processor"]:
+        print("Warning: baseline recorded on a different processor")
+    rows = compare(baseline["results"], results, args.threshold)
+    print()
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['benchmark']:<48} {format_seconds(row['baseline']):>12} -> "
+              f"{format_seconds(row['current']):>12} {row['change']:+8.1%} {flag}")
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""CVParser text extraction and skill detection"""
+
+from functools import lru_cache
+
+from app.utils.cv_parser import COMMON_SKILLS, CVParser
+from benchmarks import data
+from benchmarks.harness import benchmark
+
+
+@lru_cache(maxsize=None)
+def _files():
+    return data.cv_files()
+
+
+@benchmark("cv_parser.extract_skills")
+def extract_skills(size):
+    text = "\n".join(data.cv_lines(60))
+    return lambda: CVParser.extract_skills(text, COMMON_SKILLS)
+
+
+@benchmark("cv_parser.extract_text_from_pdf")
+def extract_text_from_pdf(size):
+    path = _files()[".pdf"]
+    return lambda: CVParser.extract_text_from_pdf(path)
+
+
+@benchmark("cv_parser.extract_text_from_docx")
+def extract_text_from_docx(size):
+    path = _files()[".docx"]
+    return lambda: CVParser.extract_text_from_docx(path)
@@ -0,0 +1,62 @@
+"""MatchingEngine hot paths"""
+
+from functools import lru_cache
+
+from app.ml.matching_engine import MatchingEngine
+from benchmarks import data
+from benchmarks.harness import benchmark
+
+ENTITY_SIZES = (1000, 10000, 100000)
+
+
+@lru_cache(maxsize=None)
+def _engine() -> MatchingEngine:
+    return MatchingEngine()
+
+
+@lru_cache(maxsize=2)
+def _candidates(count: int):
+    return data.candidates(count)
+
+
+@lru_cache(maxsize=2)
+def _jobs(count: int):
+    return data.jobs(count)
+
+
+@benchmark("matching.preprocess_text")
+def preprocess_text(size):
+    engine, text = _engine(), _candidates(1)[0]["cv_text"]
+    return lambda: engine.preprocess_text(text)
+
+
+@benchmark("matching.calculate_text_similarity")
+def calculate_text_similarity(size):
+    engine, cv, job = _engine(), _candidates(1)[0]["cv_text"], _jobs(1)[0]["description"]
+    return lambda: engine.calculate_text_similarity(cv, job)
+
+
+@benchmark("matching.calculate_skill_match")
+def calculate_skill_match(size):
+    engine, candidate, job = _engine(), _candidates(1)[0], _jobs(1)[0]
+    return lambda: engine.calculate_skill_match(
+        candidate["skills"], job["required_skills"], job["nice_to_have_skills"]
+    )
+
+
+@benchmark("matching.calculate_match_score")
+def calculate_match_score(size):
+    engine, candidate, job = _engine(), _candidates(1)[0], _jobs(1)[0]
+    return lambda: engine.calculate_match_score(candidate, job)
+
+
+@benchmark("matching.rank_candidates", sizes=ENTITY_SIZES)
+def rank_candidates(size):
+    engine, candidates, job = _engine(), _candidates(size), _jobs(1)[0]
+    return lambda: engine.rank_candidates(candidates, job, top_n=10)
+
+
+@benchmark("matching.recommend_jobs", sizes=ENTITY_SIZES)
+def recommend_jobs(size):
+    engine, candidate, jobs = _engine(), _candidates(1)[0], _jobs(size)
+    return lambda: engine.recommend_jobs(candidate, jobs, top_n=10)
@@ -0,0 +1,25 @@
+"""Cold start: importing the app and building the matching engine, each in a fresh interpreter"""
+
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import benchmark
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _python(code: str):
+    def run():
+        subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, check=True, capture_output=True)
+    return run
+
+
+@benchmark("startup.import_app")
+def import_app(size):
+    return _python("import app.main")
+
+
+@benchmark("startup.preload")
+def preload(size):
+    return _python("import app.main; from app import warmup; warmup.preload()")
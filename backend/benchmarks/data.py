@@ -0,0 +1,120 @@
+"""
+Seeded synthetic inputs for the benchmarks.
+
+Candidates and jobs have the fields the matching engine reads, with skills
+drawn from COMMON_SKILLS (Zipf-like popularity) and CV texts / job
+descriptions of realistic length mixing skills and filler vocabulary.
+"""
+
+import os
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from app.utils.cv_parser import COMMON_SKILLS
+
+SEED = 2024
+
+FILLER = (
+    "experienced engineer team project production design delivered built maintained "
+    "improved performance reliability customers platform services data pipelines "
+    "migration cloud architecture agile code review mentoring testing deployment "
+    "monitoring scalable distributed systems api backend frontend analytics"
+).split()
+
+
+def _skill_weights() -> np.ndarray:
+    weights = 1.0 / np.arange(1, len(COMMON_SKILLS) + 1)
+    return weights / weights.sum()
+
+
+def _text(rng, skills: List[str], words: int) -> str:
+    vocabulary = FILLER + skills * 3
+    return " ".join(vocabulary[i] for i in rng.integers(0, len(vocabulary), words))
+
+
+def candidates(count: int, seed: int = SEED) -> List[Dict]:
+    rng = np.random.default_rng([seed, 1])
+    weights = _skill_weights()
+    result = []
+    for _ in range(count):
+        skills = [COMMON_SKILLS[i] for i in rng.choice(len(COMMON_SKILLS), rng.integers(3, 12), replace=False, p=weights)]
+        result.append({
+            "skills": skills,
+            "experience_years": int(rng.integers(0, 20)),
+            "cv_text": _text(rng, skills, int(rng.integers(80, 400)))
+        })
+    return result
+
+
+def jobs(count: int, seed: int = SEED) -> List[Dict]:
+    rng = np.random.default_rng([seed, 2])
+    weights = _skill_weights()
+    result = []
+    for _ in range(count):
+        skills = [COMMON_SKILLS[i] for i in rng.choice(len(COMMON_SKILLS), rng.integers(3, 9), replace=False, p=weights)]
+        min_experience = int(rng.choice([0, 2, 3, 5, 8]))
+        result.append({
+            "required_skills": skills[:5],
+            "nice_to_have_skills": skills[5:],
+            "min_experience": min_experience,
+            "max_experience": min_experience + 5 if rng.random() < 0.3 else None,
+            "description": _text(rng, skills, int(rng.integers(40, 150)))
+        })
+    return result
+
+
+def cv_lines(count: int, seed: int = SEED) -> List[str]:
+    """Lines of a one or two page CV"""
+    rng = np.random.default_rng([seed, 3])
+    skills = [COMMON_SKILLS[i] for i in rng.choice(len(COMMON_SKILLS), 15, replace=False)]
+    return ["Jane Doe - jane.doe@example.com - +33 6 12 34 56 78"] + [
+        _text(rng, skills, 12) for _ in range(count)
+    ]
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, lines: List[str]):
+    """Minimal single-page PDF with one text line per entry"""
+    content = "BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path: str, lines: List[str]):
+    from docx import Document
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def cv_files(lines: int = 60) -> Dict[str, str]:
+    """A PDF and a DOCX CV in a temporary directory, by extension"""
+    directory = tempfile.mkdtemp(prefix="cv-bench-")
+    text = cv_lines(lines)
+    paths = {".pdf": os.path.join(directory, "cv.pdf"), ".docx": os.path.join(directory, "cv.docx")}
+    write_pdf(paths[".pdf"], text)
+    write_docx(paths[".docx"], text)
+    return paths
@@ -0,0 +1,125 @@
+"""
+Benchmark registry, timing and baseline comparison.
+
+A benchmark is a setup function taking the size (number of entities) and
+returning the zero-argument callable to time; setup is not timed. Each
+callable is run for at least `min_time` seconds (and `min_rounds` times)
+and the best round is kept, as `timeit` recommends: slower rounds measure
+noise from the rest of the machine, not the code.
+"""
+
+import json
+import platform
+import subprocess
+import time
+from statistics import median
+from typing import Callable, Dict, List, Optional, Sequence
+
+BENCHMARKS: Dict[str, Dict] = {}
+
+DEFAULT_THRESHOLD = 0.2  # relative slowdown reported as a regression
+
+
+def benchmark(name: str, sizes: Sequence[Optional[int]] = (None,)):
+    """Register a setup function `(size) -> callable` under `name`"""
+    def register(setup: Callable):
+        BENCHMARKS[name] = {"setup": setup, "sizes": tuple(sizes)}
+        return setup
+    return register
+
+
+def result_key(name: str, size: Optional[int]) -> str:
+    return name if size is None else f"{name}[{size}]"
+
+
+def measure(func: Callable, min_time: float = 1.0, min_rounds: int = 3, max_rounds: int = 1000) -> Dict:
+    """Time `func` over several rounds, in seconds per call"""
+    # Warm up (caches, lazy imports), then calibrate the number of calls per
+    # round so that fast functions are not dominated by timer resolution
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    number = max(1, int(0.01 / first)) if first > 0 else 1000
+
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_rounds and (len(timings) < min_rounds or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+        # A single round when one call alone exceeds the budget
+        if first >= min_time:
+            break
+    return {
+        "min": min(timings),
+        "median": median(timings),
+        "rounds": len(timings),
+        "calls_per_round": number
+    }
+
+
+def run(names: List[str] = None, max_size: int = None, min_time: float = 1.0, report=print) -> Dict[str, Dict]:
+    """Run the selected benchmarks, returns results by key"""
+    results = {}
+    for name, entry in BENCHMARKS.items():
+        if names and not any(name.startswith(selected) for selected in names):
+            continue
+        for size in entry["sizes"]:
+            if size is not None and max_size is not None and size > max_size:
+                continue
+            func = entry["setup"](size)
+            key = result_key(name, size)
+            results[key] = measure(func, min_time)
+            report(f"{key:<48} {format_seconds(results[key]['min']):>12}  ({results[key]['rounds']} rounds)")
+    return results
+
+
+def environment() -> Dict:
+    """Where the numbers come from, to spot baselines from other machines"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "commit": commit,
+        "timestamp": time.time()
+    }
+
+
+def save(path: str, results: Dict[str, Dict]):
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Benchmarks present in both runs, with their relative change of best time"""
+    rows = []
+    for key in sorted(set(baseline) & set(current)):
+        before, after = baseline[key]["min"], current[key]["min"]
+        change = after / before - 1 if before else 0.0
+        rows.append({
+            "benchmark": key,
+            "baseline": before,
+            "current": after,
+            "change": change,
+            "regression": change > threshold
+        })
+    return rows
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
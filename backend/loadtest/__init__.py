@@ -0,0 +1,12 @@
+"""
+End-to-end load testing of the API.
+
+Run from ``backend/``:
+
+    python -m loadtest --target memory --seed 2000:200 --concurrency 16 --duration 30
+    python -m loadtest --target local --seed 20000:1000 --json report.json
+    python -m loadtest --target url --url http://localhost:8000 --mix recommend_candidates=1
+
+Reports throughput, error rate, latency percentiles and event-loop lag per
+operation (see runner.py for how lag is attributed).
+"""
@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from loadtest.runner import format_report, run_load
+from loadtest.targets import TARGETS, open_target
+from loadtest.workload import OPERATIONS, Context, parse_mix, seed_database
+
+
+async def main(args) -> int:
+    weights = parse_mix(args.mix)
+    async with open_target(args.target, args.url) as (client, db):
+        if args.seed:
+            if db is None:
+                raise SystemExit("--seed needs an in-process target, use scripts/generate_bulk_data.py otherwise")
+            candidates, _, jobs = args.seed.partition(":")
+            await seed_database(db, int(candidates), int(jobs or 0))
+        context = await Context.discover(client)
+        print(f"Running {', '.join(weights)} with {args.concurrency} workers for {args.duration}s "
+              f"({len(context.candidate_ids)} candidates, {len(context.job_ids)} jobs)")
+        report = await run_load(client, context, weights, OPERATIONS, args.concurrency, args.duration)
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if args.max_error_rate is not None and report["total"]["error_rate"] > args.max_error_rate else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="API load test")
+    parser.add_argument("--target", choices=TARGETS, default="memory")
+    parser.add_argument("--url", help="base URL of the url target")
+    parser.add_argument("--seed", metavar="CANDIDATES:JOBS", help="insert synthetic data first (in-process targets)")
+    parser.add_argument("--mix", default="", help=f"name=weight,... among {', '.join(OPERATIONS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--json", metavar="PATH", help="write the full report as JSON")
+    parser.add_argument("--max-error-rate", type=float, help="exit 1 above this overall error rate")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,261 @@
+"""
+Replay captured traffic (app/utils/traffic_capture.py) against one or two
+deployments and compare them.
+
+    python -m loadtest.replay traces.jsonl* --url http://baseline:8000 \\
+        --compare-url http://candidate:8000 --speed 4 --json replay.json
+
+Requests are re-issued on the original schedule divided by ``--speed``
+(0 sends them as fast as ``--max-inflight`` allows). Only reads are
+replayed: GET requests and the matching POST endpoints whose bodies were
+captured; writes and uploads are skipped so both runs see the same data.
+
+Hashed ids are mapped onto ids discovered from the first deployment, the
+same hash always giving the same id, so popular entities stay popular and
+caches behave as in production. Both deployments must serve the same data
+(for instance generated with the same seed and ``--end`` by
+scripts/generate_bulk_data.py) and should not share a Redis, or the second
+run is served from the first one's caches.
+
+With two deployments the runs are sequential, then latency distributions
+are compared per route, and responses are compared by status and body
+(after dropping volatile fields such as ``last_updated``).
+"""
+
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import re
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from loadtest.runner import summarize
+from loadtest.workload import Context
+
+TOKEN = re.compile(r"\b(candidate|job|id):([0-9a-f]{24})\b")
+SKIPPED_ROUTES = ("/api/admin", "/metrics")
+VOLATILE_FIELDS = ("last_updated",)
+
+
+def load_traces(patterns: List[str]) -> List[Dict]:
+    """Replayable traces of the capture files, in time order"""
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    traces = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    traces.append(json.loads(line))
+    traces.sort(key=lambda trace: trace["ts"])
+    return [trace for trace in traces if is_replayable(trace)]
+
+
+def is_replayable(trace: Dict) -> bool:
+    if trace["route"] == "unmatched" or trace["route"].startswith(SKIPPED_ROUTES):
+        return False
+    if trace["method"] == "GET":
+        return True
+    return trace["method"] == "POST" and trace["route"].startswith("/api/matching/") and (
+        trace["body"] is not None or trace["request_bytes"] == 0
+    )
+
+
+class IdMapper:
+    """Maps hashed ids of a capture onto existing ids"""
+
+    def __init__(self, candidate_ids: List[str], job_ids: List[str]):
+        self.pools = {"candidate": sorted(candidate_ids), "job": sorted(job_ids)}
+        self.pools["id"] = self.pools["candidate"]
+
+    def _replace(self, match) -> str:
+        pool = self.pools[match.group(1)]
+        return pool[int(match.group(2), 16) % len(pool)]
+
+    def restore(self, value):
+        if isinstance(value, str):
+            return TOKEN.sub(self._replace, value)
+        if isinstance(value, list):
+            return [self.restore(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.restore(item) for key, item in value.items()}
+        return value
+
+
+def _without(value, fields):
+    if isinstance(value, dict):
+        return {key: _without(item, fields) for key, item in value.items() if key not in fields}
+    if isinstance(value, list):
+        return [_without(item, fields) for item in value]
+    return value
+
+
+def body_digest(content: bytes, ignored=VOLATILE_FIELDS) -> str:
+    """Digest of a response body, JSON compared without its volatile fields"""
+    try:
+        content = json.dumps(_without(json.loads(content), set(ignored)), sort_keys=True).encode()
+    except ValueError:
+        pass
+    return hashlib.sha256(content).hexdigest()
+
+
+async def replay(client, traces: List[Dict], mapper: IdMapper, speed: float, max_inflight: int,
+                 ignored=VOLATILE_FIELDS) -> List[Dict]:
+    """Re-issue the traces, returns one result per trace (same order)"""
+    results: List[Optional[Dict]] = [None] * len(traces)
+    semaphore = asyncio.Semaphore(max_inflight)
+    origin = traces[0]["ts"] if traces else 0
+    started = time.perf_counter()
+
+    async def send(index: int, trace: Dict):
+        async with semaphore:
+            behind = time.perf_counter() - started - (trace["ts"] - origin) / speed if speed else 0.0
+            start = time.perf_counter()
+            try:
+                response = await client.request(
+                    trace["method"],
+                    mapper.restore(trace["path"]),
+                    params=mapper.restore(trace["query"]),
+                    json=mapper.restore(trace["body"]) if trace["body"] is not None else None
+                )
+                content = response.content
+                results[index] = {
+                    "route": trace["route"],
+                    "status": response.status_code,
+                    "latency": time.perf_counter() - start,
+                    "bytes": len(content),
+                    "digest": body_digest(content, ignored),
+                    "behind": behind
+                }
+            except Exception as e:
+                results[index] = {
+                    "route": trace["route"],
+                    "status": type(e).__name__,
+                    "latency": time.perf_counter() - start,
+                    "bytes": 0,
+                    "digest": None,
+                    "behind": behind
+                }
+
+    tasks = []
+    for index, trace in enumerate(traces):
+        if speed:
+            delay = (trace["ts"] - origin) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(index, trace)))
+    await asyncio.gather(*tasks)
+    return results
+
+
+def latency_by_route(results: List[Dict]) -> Dict[str, Dict]:
+    latencies = defaultdict(list)
+    for result in results:
+        latencies[result["route"]].append(result["latency"])
+    return {route: summarize(values) for route, values in sorted(latencies.items())}
+
+
+def compare_runs(baseline: List[Dict], candidate: List[Dict], traces: List[Dict], examples: int = 5) -> Dict:
+    """Latency change per route and response mismatches between two runs"""
+    before, after = latency_by_route(baseline), latency_by_route(candidate)
+    routes = {}
+    for route in before:
+        routes[route] = {
+            "baseline": before[route],
+            "candidate": after[route],
+            "p50_change": after[route]["p50"] / before[route]["p50"] - 1,
+            "p99_change": after[route]["p99"] / before[route]["p99"] - 1
+        }
+    mismatches = []
+    for index, (a, b) in enumerate(zip(baseline, candidate)):
+        if a["status"] != b["status"] or a["digest"] != b["digest"]:
+            mismatches.append({
+                "index": index,
+                "route": a["route"],
+                "path": traces[index]["path"],
+                "status": [a["status"], b["status"]],
+                "kind": "status" if a["status"] != b["status"] else "body"
+            })
+    return {"routes": routes, "mismatches": len(mismatches), "mismatch_examples": mismatches[:examples]}
+
+
+def _ms(summary: Dict, key: str) -> str:
+    return f"{summary[key] * 1000:9.1f}"
+
+
+def format_run(results: List[Dict]) -> str:
+    lines = [f"{'route':<48} {'reqs':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'errors':>7}"]
+    errors = defaultdict(int)
+    for result in results:
+        if not isinstance(result["status"], int) or result["status"] >= 500:
+            errors[result["route"]] += 1
+    for route, summary in latency_by_route(results).items():
+        lines.append(f"{route:<48} {summary['count']:>6} {_ms(summary, 'p50')} {_ms(summary, 'p90')} "
+                     f"{_ms(summary, 'p99')} {errors[route]:>7}")
+    behind = summarize([result["behind"] for result in results])
+    if behind.get("count"):
+        lines.append(f"Replayer lag p99 {behind['p99'] * 1000:.1f} ms (high values: lower --speed)")
+    return "\n".join(lines)
+
+
+def format_comparison(comparison: Dict) -> str:
+    lines = [f"{'route':<48} {'p50 before':>10} {'p50 after':>10} {'change':>8} {'p99 change':>10}"]
+    for route, row in comparison["routes"].items():
+        lines.append(f"{route:<48} {_ms(row['baseline'], 'p50'):>10} {_ms(row['candidate'], 'p50'):>10} "
+                     f"{row['p50_change']:>+8.1%} {row['p99_change']:>+10.1%}")
+    lines.append(f"Response mismatches: {comparison['mismatches']}")
+    for example in comparison["mismatch_examples"]:
+        lines.append(f"  #{example['index']} {example['path']} {example['kind']} {example['status']}")
+    return "\n".join(lines)
+
+
+async def main(args) -> int:
+    traces = load_traces(args.traces)
+    if not traces:
+        raise SystemExit("No replayable traces found")
+    ignored = VOLATILE_FIELDS + tuple(args.ignore_field)
+
+    runs = []
+    mapper = None
+    for url in [args.url] + ([args.compare_url] if args.compare_url else []):
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout) as client:
+            if mapper is None:
+                context = await Context.discover(client, args.ids)
+                mapper = IdMapper(context.candidate_ids, context.job_ids)
+            print(f"Replaying {len(traces)} requests against {url} (speed {args.speed or 'max'})")
+            results = await replay(client, traces, mapper, args.speed, args.max_inflight, ignored)
+        print(format_run(results))
+        runs.append({"url": url, "results": results})
+
+    report = {"traces": len(traces), "runs": runs}
+    status = 0
+    if len(runs) == 2:
+        report["comparison"] = compare_runs(runs[0]["results"], runs[1]["results"], traces)
+        print()
+        print(format_comparison(report["comparison"]))
+        if args.fail_on_mismatch and report["comparison"]["mismatches"]:
+            status = 1
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m loadtest.replay", description="Replay captured traffic")
+    parser.add_argument("traces", nargs="+", help="capture files (globs allowed, rotated files included)")
+    parser.add_argument("--url", required=True, help="deployment to replay against (the baseline)")
+    parser.add_argument("--compare-url", help="second deployment, compared with the first")
+    parser.add_argument("--speed", type=float, default=1.0, help="rate multiplier, 0 for as fast as possible")
+    parser.add_argument("--max-inflight", type=int, default=64)
+    parser.add_argument("--ids", type=int, default=1000, help="ids discovered per collection for the mapping")
+    parser.add_argument("--ignore-field", action="append", default=[], help="response field left out of comparisons")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", metavar="PATH", help="write per-request results and the comparison")
+    parser.add_argument("--fail-on-mismatch", action="store_true", help="exit 1 when responses differ")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,144 @@
+"""
+Closed-loop load generation and latency statistics.
+
+`concurrency` workers each send one request at a time, picking operations
+by weight, until `duration` elapses. A monitor coroutine measures event-loop
+lag (how late a short sleep wakes up); each lag sample is attributed to the
+operations in flight during it. With concurrency above 1 a blocking
+endpoint also shows up in the lag of the others: run it alone (``--mix``)
+to isolate it.
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+LAG_INTERVAL = 0.01  # seconds between event-loop lag probes
+
+
+def summarize(values: List[float]) -> Dict:
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values)
+    summary = {f"p{p}": float(np.percentile(array, p)) for p in PERCENTILES}
+    summary.update({"count": len(values), "mean": float(array.mean()), "max": float(array.max())})
+    return summary
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag and the operations in flight meanwhile"""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.inflight = Counter()
+        self.started = Counter()
+        self.samples: List[float] = []
+        self.by_operation = defaultdict(list)
+
+    def begin(self, name: str):
+        self.inflight[name] += 1
+        self.started[name] += 1
+
+    def end(self, name: str):
+        self.inflight[name] -= 1
+
+    async def run(self):
+        while True:
+            active = {name for name, count in self.inflight.items() if count > 0}
+            started = Counter(self.started)
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            # In flight at some point of the interval: already running, or started since
+            active |= {name for name, count in self.started.items() if count > started[name]}
+            self.samples.append(lag)
+            for name in active:
+                self.by_operation[name].append(lag)
+
+
+async def run_load(client, context, weights: Dict[str, float], operations: Dict[str, Dict],
+                   concurrency: int, duration: float, seed: int = 0) -> Dict:
+    """Drive the weighted mix, returns per-operation and overall statistics"""
+    names = [name for name, weight in weights.items() if weight > 0]
+    cumulative = list(np.cumsum([weights[name] for name in names]))
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    errors = Counter()
+    monitor = LoopLagMonitor()
+    deadline = time.perf_counter() + duration
+
+    async def worker(number: int):
+        rng = random.Random(seed * 1000 + number)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, cum_weights=cumulative)[0]
+            monitor.begin(name)
+            start = time.perf_counter()
+            try:
+                response = await operations[name]["func"](client, context, rng)
+                statuses[name][response.status_code] += 1
+                if response.status_code >= 500:
+                    errors[name] += 1
+            except Exception as e:
+                statuses[name][type(e).__name__] += 1
+                errors[name] += 1
+            finally:
+                latencies[name].append(time.perf_counter() - start)
+                monitor.end(name)
+
+    lag_task = asyncio.create_task(monitor.run())
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    finally:
+        lag_task.cancel()
+    elapsed = time.perf_counter() - started
+
+    report = {"operations": {}, "duration": elapsed, "concurrency": concurrency}
+    for name in names:
+        count = len(latencies[name])
+        report["operations"][name] = {
+            "requests": count,
+            "throughput": count / elapsed,
+            "errors": errors[name],
+            "error_rate": errors[name] / count if count else 0.0,
+            "statuses": {str(status): n for status, n in statuses[name].items()},
+            "latency": summarize(latencies[name]),
+            "loop_lag": summarize(monitor.by_operation[name])
+        }
+    total = sum(len(values) for values in latencies.values())
+    report["total"] = {
+        "requests": total,
+        "throughput": total / elapsed,
+        "errors": sum(errors.values()),
+        "error_rate": sum(errors.values()) / total if total else 0.0,
+        "latency": summarize([value for values in latencies.values() for value in values]),
+        "loop_lag": summarize(monitor.samples)
+    }
+    return report
+
+
+def format_report(report: Dict) -> str:
+    def ms(summary: Dict, key: str) -> str:
+        return f"{summary[key] * 1000:8.1f}" if summary.get("count") else f"{'-':>8}"
+
+    header = (f"{'operation':<22} {'reqs':>7} {'req/s':>8} {'err%':>6} {'p50 ms':>8} {'p90 ms':>8} "
+              f"{'p99 ms':>8} {'max ms':>8} {'lag p99':>8} {'lag max':>8}")
+    lines = [header, "-" * len(header)]
+    rows = list(report["operations"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        latency, lag = row["latency"], row["loop_lag"]
+        lines.append(
+            f"{name:<22} {row['requests']:>7} {row['throughput']:>8.1f} {row['error_rate'] * 100:>6.1f} "
+            f"{ms(latency, 'p50')} {ms(latency, 'p90')} {ms(latency, 'p99')} {ms(latency, 'max')} "
+            f"{ms(lag, 'p99')} {ms(lag, 'max')}"
+        )
+    for name, row in report["operations"].items():
+        failures = {status: n for status, n in row["statuses"].items() if not status.isdigit() or int(status) >= 400}
+        if failures:
+            lines.append(f"  {name}: {failures}")
+    return "\n".join(lines)
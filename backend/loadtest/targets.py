@@ -0,0 +1,63 @@
+"""
+Where the load goes.
+
+* ``memory``: the app in-process over ASGI, with mongomock-motor and
+  fakeredis standing in for MongoDB and Redis (``pip install
+  mongomock-motor fakeredis``). No services needed; absolute numbers are
+  not representative of MongoDB, and aggregation stages mongomock lacks
+  show up as errors.
+* ``local``: the app in-process over ASGI against real MongoDB and Redis
+  (``MONGODB_URL`` / ``REDIS_URL``, use a scratch ``DATABASE_NAME``).
+* ``url``: a running deployment over HTTP.
+
+In-process targets share the event loop with the load generator, so the
+measured event-loop lag is the app's own.
+"""
+
+import tempfile
+from contextlib import asynccontextmanager
+
+import httpx
+
+from app.config import settings
+from app.database import close_database_connection, connect_to_database, db, get_database
+
+TARGETS = ("memory", "local", "url")
+
+
+def _use_memory_stand_ins():
+    try:
+        import fakeredis
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError as e:
+        raise SystemExit(f"The memory target needs mongomock-motor and fakeredis ({e})")
+    db.client = AsyncMongoMockClient()
+    server = fakeredis.FakeServer()
+    db.redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    db.redis_binary_client = fakeredis.FakeRedis(server=server)
+
+
+@asynccontextmanager
+async def open_target(target: str, url: str = None, timeout: float = 30.0):
+    """HTTP client for a target, and the database when the app runs in-process"""
+    if target == "url":
+        if not url:
+            raise SystemExit("The url target needs --url")
+        async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+            yield client, None
+        return
+
+    from app.main import app
+
+    settings.UPLOAD_DIR = tempfile.mkdtemp(prefix="loadtest-uploads-")
+    if target == "memory":
+        _use_memory_stand_ins()
+    else:
+        await connect_to_database()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client, await get_database()
+    finally:
+        if target == "local":
+            await close_database_connection()
@@ -0,0 +1,156 @@
+"""
+Mixed workload: seeding, id discovery and the weighted operations.
+
+Each operation is an async function `(client, context, rng) -> response`
+registered with a default weight; `--mix name=weight,...` overrides them.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from app.analytics.skill_counters import reconcile_skill_counters
+from app.database import get_redis
+from app.utils import cv_store
+from app.utils.http_cache import bump_generation
+from benchmarks import data
+
+OPERATIONS: Dict[str, Dict] = {}
+
+
+def operation(name: str, weight: float):
+    def register(func: Callable):
+        OPERATIONS[name] = {"func": func, "weight": weight}
+        return func
+    return register
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Weights by operation from 'name=weight,...' (default weights when empty)"""
+    if not mix:
+        return {name: entry["weight"] for name, entry in OPERATIONS.items()}
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, available: {', '.join(OPERATIONS)}")
+        weights[name] = float(weight) if weight else 1.0
+    return weights
+
+
+async def seed_database(db, candidates: int, jobs: int, seed: int = data.SEED):
+    """Insert synthetic candidates (CV texts in the side store) and jobs"""
+    now = datetime.utcnow()
+    candidate_docs = data.candidates(candidates, seed)
+    for i, candidate in enumerate(candidate_docs):
+        created_at = now - timedelta(minutes=i)
+        candidate.update({
+            "name": f"Load Test {i}",
+            "email": f"loadtest{i}@example.com",
+            "location": "Paris",
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+    job_docs = data.jobs(jobs, seed)
+    for i, job in enumerate(job_docs):
+        created_at = now - timedelta(minutes=i)
+        job.update({
+            "title": f"{job['required_skills'][0]} Engineer",
+            "company": f"Company {i % 20}",
+            "location": "Paris",
+            "remote": i % 3 == 0,
+            "job_type": "Full-time",
+            "status": "active",
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+
+    if candidate_docs:
+        await db.candidates.insert_many(candidate_docs)
+        await cv_store.migrate_inline_cv_texts(db)
+    if job_docs:
+        await db.jobs.insert_many(job_docs)
+    await reconcile_skill_counters(db)
+    bump_generation(get_redis(), "candidates", "jobs")
+
+
+class Context:
+    """Ids and skills the operations pick from"""
+
+    def __init__(self, candidate_ids: List[str], job_ids: List[str], skills: List[str]):
+        self.candidate_ids = candidate_ids
+        self.job_ids = job_ids
+        self.skills = skills
+        self.cv_texts = ["\n".join(data.cv_lines(30, seed)) for seed in range(5)]
+
+    @classmethod
+    async def discover(cls, client, limit: int = 1000) -> "Context":
+        """Pick up existing ids through the API (works against any target)"""
+        candidates = (await client.get("/api/candidates/", params={"limit": limit, "fields": "skills"})).json()
+        jobs = (await client.get("/api/jobs/", params={"limit": limit})).json()
+        candidate_ids = [c["id"] for c in candidates.get("candidates", [])]
+        job_ids = [j["id"] for j in jobs.get("jobs", [])]
+        skills = sorted({s for c in candidates.get("candidates", []) for s in c.get("skills", [])})
+        if not candidate_ids or not job_ids:
+            raise SystemExit("No candidates or jobs to load-test with, seed the database first (--seed)")
+        return cls(candidate_ids, job_ids, skills or ["Python"])
+
+
+@operation("recommend_candidates", 15)
+async def recommend_candidates(client, context: Context, rng: random.Random):
+    return await client.get(f"/api/matching/recommend/{rng.choice(context.job_ids)}", params={"top_n": 10})
+
+
+@operation("jobs_for_candidate", 10)
+async def jobs_for_candidate(client, context: Context, rng: random.Random):
+    return await client.get(f"/api/matching/jobs-for-candidate/{rng.choice(context.candidate_ids)}")
+
+
+@operation("list_candidates", 20)
+async def list_candidates(client, context: Context, rng: random.Random):
+    params = {"limit": 50}
+    if rng.random() < 0.5:
+        params["skills"] = rng.choice(context.skills)
+    return await client.get("/api/candidates/", params=params)
+
+
+@operation("list_jobs", 15)
+async def list_jobs(client, context: Context, rng: random.Random):
+    return await client.get("/api/jobs/", params={"limit": 50, "status": "active"})
+
+
+@operation("get_candidate", 15)
+async def get_candidate(client, context: Context, rng: random.Random):
+    return await client.get(f"/api/candidates/{rng.choice(context.candidate_ids)}")
+
+
+@operation("analytics_dashboard", 8)
+async def analytics_dashboard(client, context: Context, rng: random.Random):
+    return await client.get("/api/analytics/dashboard")
+
+
+@operation("skills_gap", 4)
+async def skills_gap(client, context: Context, rng: random.Random):
+    return await client.get("/api/analytics/skills-gap")
+
+
+@operation("upload_cv", 5)
+async def upload_cv(client, context: Context, rng: random.Random):
+    text = rng.choice(context.cv_texts)
+    return await client.post(
+        "/api/candidates/upload-cv",
+        data={"candidate_id": rng.choice(context.candidate_ids)},
+        files={"file": ("cv.txt", text.encode("utf-8"), "text/plain")}
+    )
+
+
+@operation("create_candidate", 2)
+async def create_candidate(client, context: Context, rng: random.Random):
+    number = rng.randrange(10 ** 9)
+    return await client.post("/api/candidates/", json={
+        "name": f"Load Test {number}",
+        "email": f"loadtest-new{number}@example.com",
+        "skills": rng.sample(context.skills, min(5, len(context.skills))),
+        "experience_years": rng.randrange(15)
+    })
@@ -0,0 +1,25 @@
+import asyncio
+import os
+import sys
+
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "analytics"))
+
+from batch_analytics import count_skills  # noqa: E402
+
+
+def test_count_skills():
+    """Test that skill counts are aggregated, skipping missing and empty lists"""
+    db = AsyncMongoMockClient()["batch_analytics"]
+
+    async def run():
+        await db.jobs.insert_many([
+            {"required_skills": ["Python", "SQL"]},
+            {"required_skills": ["Python", "Python"]},
+            {"required_skills": []},
+            {"title": "No skills"},
+        ])
+        return await count_skills(db.jobs, "required_skills", batch_size=1)
+
+    assert asyncio.run(run()) == {"Python": 3, "SQL": 1}
@@ -0,0 +1,33 @@
+from app.utils.cv_parser import CVParser
+from benchmarks import data
+from benchmarks.harness import compare, measure
+
+
+def test_measure():
+    """Test that measure reports per-call timings"""
+    result = measure(lambda: sum(range(100)), min_time=0.01)
+
+    assert result["rounds"] >= 3
+    assert 0 < result["min"] <= result["median"]
+
+
+def test_compare_flags_regressions():
+    """Test baseline comparison against the threshold"""
+    baseline = {"a": {"min": 1.0}, "b": {"min": 1.0}, "removed": {"min": 1.0}}
+    current = {"a": {"min": 1.1}, "b": {"min": 1.5}, "added": {"min": 1.0}}
+
+    rows = {row["benchmark"]: row for row in compare(baseline, current, threshold=0.2)}
+    assert set(rows) == {"a", "b"}
+    assert not rows["a"]["regression"]
+    assert rows["b"]["regression"]
+    assert abs(rows["b"]["change"] - 0.5) < 1e-9
+
+
+def test_generated_cv_files_parse(tmp_path):
+    """Test that the benchmark PDF and DOCX fixtures are readable"""
+    lines = data.cv_lines(3)
+    data.write_pdf(str(tmp_path / "cv.pdf"), lines)
+    data.write_docx(str(tmp_path / "cv.docx"), lines)
+
+    assert CVParser.extract_text_from_pdf(str(tmp_path / "cv.pdf")).splitlines() == lines
+    assert CVParser.extract_text_from_docx(str(tmp_path / "cv.docx")).splitlines() == lines
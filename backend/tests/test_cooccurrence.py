@@ -0,0 +1,32 @@
+from app.analytics.cooccurrence import build_skill_matrix, compute_neighbors
+
+
+def test_build_skill_matrix():
+    """Test the sparse entity x skill matrix layout"""
+    matrix, skills = build_skill_matrix([["Python", "Spark"], ["Python"], []])
+
+    assert matrix.shape == (3, 2)
+    assert skills == ["Python", "Spark"]
+    assert matrix.toarray().tolist() == [[1, 1], [1, 0], [0, 0]]
+
+
+def test_compute_neighbors():
+    """Test co-occurrence counts and lift ranking"""
+    matrix, skills = build_skill_matrix([
+        ["Python", "Spark", "Kafka"],
+        ["Python", "Spark", "Kafka"],
+        ["Python", "Django"],
+        ["Python", "Django"],
+        ["Java"],
+    ])
+
+    neighbors = compute_neighbors(matrix, skills, top_k=5, min_count=2)
+
+    spark = neighbors["Spark"]
+    assert spark["count"] == 2
+    # Kafka always appears with Spark, Python is everywhere
+    assert spark["neighbors"][0]["skill"] == "Kafka"
+    assert spark["neighbors"][0]["lift"] == 2.5
+    assert spark["neighbors"][1]["skill"] == "Python"
+    assert spark["neighbors"][1]["confidence"] == 1.0
+    assert neighbors["Java"]["neighbors"] == []
@@ -0,0 +1,18 @@
+from app.utils.cv_store import compress_cv_text, decompress_cv_text, wants_cv_text
+
+
+def test_compression_roundtrip():
+    """Test that CV text survives compression"""
+    text = "Experienced Python développeur " * 200
+
+    payload = compress_cv_text(text)
+    assert len(payload) < len(text.encode("utf-8"))
+    assert decompress_cv_text(payload) == text
+
+
+def test_wants_cv_text():
+    """Test which projections load the CV text from the store"""
+    assert wants_cv_text(None)
+    assert wants_cv_text({"name": 1, "cv_text": 1})
+    assert not wants_cv_text({"name": 1})
+    assert not wants_cv_text({"cv_text": 0})
@@ -0,0 +1,34 @@
+import asyncio
+
+from bson import ObjectId
+from prometheus_client import REGISTRY
+
+from app.utils import events
+
+
+class Unavailable:
+    """Database and Redis stand-in whose every call fails"""
+
+    def __getattr__(self, name):
+        raise ConnectionError(f"{name}: unavailable")
+
+    def __getitem__(self, name):
+        raise ConnectionError(f"{name}: unavailable")
+
+
+def _failures(store: str) -> float:
+    return REGISTRY.get_sample_value("recruitment_app_derived_update_failures_total", {"store": store}) or 0
+
+
+def test_hooks_do_not_fail_writes():
+    """Test that derived data failures are counted instead of failing the write"""
+    before = {"_id": ObjectId(), "skills": ["Python"], "required_skills": ["Python"], "status": "active"}
+    after = {**before, "skills": ["Python", "Docker"], "required_skills": ["Docker"]}
+    stores = ("skill_counters", "rollups", "trending", "generations")
+    counts = {store: _failures(store) for store in stores}
+
+    asyncio.run(events.candidate_changed(Unavailable(), Unavailable(), before, after))
+    asyncio.run(events.job_changed(Unavailable(), Unavailable(), None, after))
+
+    for store in stores:
+        assert _failures(store) == counts[store] + 2
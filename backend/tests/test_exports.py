@@ -0,0 +1,136 @@
+import asyncio
+import csv
+import io
+import json
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app.api import exports
+from app.config import settings
+from app.database import get_database
+from app.ml import get_matching_engine
+from app.utils.cv_store import migrate_inline_cv_texts
+
+CANDIDATES = [
+    {"name": "Ada, \"the first\"", "email": "ada@example.com", "skills": ["Python", "SQL"], "experience_years": 5,
+     "cv_text": "python sql data engineer"},
+    {"name": "Bob", "email": "bob@example.com", "skills": ["Java"], "experience_years": 1,
+     "cv_text": "java backend developer"},
+    {"name": "Cy", "email": "cy@example.com", "skills": ["Python"], "experience_years": 3,
+     "cv_text": "python developer"},
+]
+JOB = {
+    "title": "Data Engineer", "description": "python sql data pipelines", "required_skills": ["Python", "SQL"],
+    "min_experience": 2, "status": "active"
+}
+
+
+def make_client():
+    db = AsyncMongoMockClient()["exports"]
+
+    async def seed():
+        await db.candidates.insert_many([dict(candidate) for candidate in CANDIDATES])
+        await db.jobs.insert_one(dict(JOB))
+    asyncio.run(seed())
+
+    app = FastAPI()
+    app.include_router(exports.router)
+    app.dependency_overrides[get_database] = lambda: db
+    return TestClient(app), db
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_ndjson_and_projection(monkeypatch):
+    """Test NDJSON rows, field projection and chunking"""
+    client, _ = make_client()
+
+    response = client.get("/api/exports/candidates", params={"fields": "name,skills"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = _ndjson(response)
+    assert [set(row) for row in rows] == [{"id", "name", "skills"}] * 3
+    assert rows[0]["skills"] == ["Python", "SQL"] and ObjectId.is_valid(rows[0]["id"])
+
+    # The default projection leaves the CV text out
+    assert all("cv_text" not in row and "email" in row for row in _ndjson(client.get("/api/exports/candidates")))
+    assert client.get("/api/exports/candidates", params={"fields": "password"}).status_code == 400
+    assert client.get("/api/exports/candidates", params={"format": "xml"}).status_code == 400
+
+    # Several rows per chunk, every chunk ending on a complete row
+    monkeypatch.setattr(exports, "CHUNK_SIZE", 50)
+
+    async def rows():
+        for i in range(20):
+            yield {"i": i}
+
+    async def collect():
+        return [chunk async for chunk in exports._ndjson_lines(rows())]
+
+    chunks = asyncio.run(collect())
+    assert 1 < len(chunks) < 20 and all(chunk.endswith(b"\n") for chunk in chunks)
+    assert [json.loads(line) for line in b"".join(chunks).splitlines()] == [{"i": i} for i in range(20)]
+
+
+def test_export_csv():
+    """Test CSV headers, list columns and escaping"""
+    client, _ = make_client()
+
+    response = client.get("/api/exports/candidates", params={"format": "csv", "fields": "name,skills"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="candidates.csv"' in response.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["id", "name", "skills"]
+    assert rows[1][1:] == ['Ada, "the first"', "Python;SQL"]
+    assert '"Ada, ""the first"""' in response.text
+    assert len(rows) == 4
+
+
+def test_export_cv_texts(monkeypatch):
+    """Test that CV texts moved to the side store are exported"""
+    monkeypatch.setattr(settings, "ANALYTICS_BATCH_SIZE", 2)
+    client, db = make_client()
+    assert asyncio.run(migrate_inline_cv_texts(db)) == 3
+
+    rows = _ndjson(client.get("/api/exports/candidates", params={"fields": "name,cv_text"}))
+    assert [row["cv_text"] for row in rows] == [candidate["cv_text"] for candidate in CANDIDATES]
+    assert [set(row) for row in rows] == [{"id", "name", "cv_text"}] * 3
+
+    response = client.get("/api/exports/candidates", params={"format": "csv", "fields": "cv_text,has_cv_text"})
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert [row[1:] for row in rows[1:]] == [[candidate["cv_text"], "True"] for candidate in CANDIDATES]
+
+
+def test_export_ranking(monkeypatch):
+    """Test the ranking export: rank order, scores and min_score"""
+    monkeypatch.setattr(settings, "ANALYTICS_BATCH_SIZE", 2)
+    client, db = make_client()
+    job_id = str(asyncio.run(db.jobs.find_one({}))["_id"])
+
+    rows = _ndjson(client.get(f"/api/exports/matching/{job_id}"))
+    assert [row["rank"] for row in rows] == [1, 2, 3]
+    scores = [row["total_score"] for row in rows]
+    assert scores == sorted(scores, reverse=True)
+    assert rows[0]["name"] == CANDIDATES[0]["name"]
+
+    # Same scores as the engine
+    candidates = [dict(candidate) for candidate in CANDIDATES]
+    expected = get_matching_engine().score_candidates(candidates, JOB)
+    assert sorted(scores, reverse=True) == sorted((score["total_score"] for score in expected), reverse=True)
+
+    # CV texts in the side store score the same
+    asyncio.run(migrate_inline_cv_texts(db))
+    assert _ndjson(client.get(f"/api/exports/matching/{job_id}")) == rows
+
+    threshold = scores[1]
+    filtered = _ndjson(client.get(f"/api/exports/matching/{job_id}", params={"min_score": threshold}))
+    assert [row["candidate_id"] for row in filtered] == [row["candidate_id"] for row in rows[:2]]
+
+    response = client.get(f"/api/exports/matching/{job_id}", params={"format": "csv"})
+    assert next(csv.reader(io.StringIO(response.text))) == exports.RANKING_COLUMNS
+    assert client.get(f"/api/exports/matching/{ObjectId()}").status_code == 404
@@ -0,0 +1,55 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError
+
+from app.database import get_redis
+from app.utils import http_cache
+from app.utils.http_cache import cache_control, content_etag, etag_matches, make_etag
+
+
+def test_etag_matching():
+    """Test weak comparison of If-None-Match against an ETag"""
+    etag = make_etag("/api/jobs/", 3)
+
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag[2:], etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(make_etag("/api/jobs/", 4), etag)
+
+
+def test_content_etag():
+    """Test that body hashes only change with the body"""
+    assert content_etag(b'{"a":1}') == content_etag(b'{"a":1}')
+    assert content_etag(b'{"a":1}') != content_etag(b'{"a":2}')
+
+
+def test_cache_control():
+    """Test Cache-Control values"""
+    assert cache_control(0) == "private, no-cache"
+    assert cache_control(60) == "private, max-age=60"
+
+
+def test_redis_outage_skips_validators():
+    """Test that conditional routes are served without an ETag when Redis is down"""
+    class Down:
+        def mget(self, keys):
+            raise ConnectionError("Redis is down")
+
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def validators(request, call_next):
+        return await http_cache.apply_validators(request, await call_next(request))
+
+    @app.get("/api/jobs/", dependencies=[Depends(http_cache.conditional("jobs"))])
+    async def jobs():
+        return {"jobs": []}
+
+    app.dependency_overrides[get_redis] = Down
+    response = TestClient(app).get("/api/jobs/", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200 and response.json() == {"jobs": []}
+    assert "etag" not in response.headers and "cache-control" not in response.headers
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "analytics"))
+
+import incremental_analytics  # noqa: E402
+from incremental_analytics import SnapshotIndex, load_state, run_incremental  # noqa: E402
+
+REPORT_FIELDS = (
+    "total_candidates", "total_jobs", "top_candidate_skills", "top_required_skills",
+    "jobs_by_status", "candidates_per_month"
+)
+START = datetime(2024, 1, 1)
+
+
+def _candidate(i, when):
+    return {
+        "_id": ObjectId.from_datetime(when),
+        "created_at": when,
+        "updated_at": when,
+        "experience_years": i % 7,
+        "skills": [["Python", "SQL", "AWS", "Java"][i % 4], "Docker"][: 1 + i % 2],
+        "location": "Paris",
+    }
+
+
+def _job(i, when):
+    return {
+        "created_at": when,
+        "updated_at": when,
+        "status": "active",
+        "company": f"Company {i % 3}",
+        "required_skills": ["Python"] if i % 2 else ["Java", "SQL"],
+    }
+
+
+def _run(db, output_dir, full=False):
+    return asyncio.run(run_incremental(str(output_dir), batch_size=16, full=full, db=db))
+
+
+def test_incremental_matches_full_run(tmp_path, monkeypatch):
+    """Test that deltas are detected and merged into the same aggregates as a full run"""
+    monkeypatch.setattr(incremental_analytics, "WATERMARK_OVERLAP", timedelta(0))
+    db = AsyncMongoMockClient()["analytics"]
+
+    async def seed():
+        await db.candidates.insert_many([_candidate(i, START + timedelta(days=i)) for i in range(60)])
+        await db.jobs.insert_many([_job(i, START + timedelta(days=i)) for i in range(10)])
+    asyncio.run(seed())
+
+    first = _run(db, tmp_path / "incremental")
+    assert first["processed"] == {"candidates": 60, "jobs": 10}
+    # Only the newest document of the watermark instant is read again
+    assert _run(db, tmp_path / "incremental")["processed"] == {"candidates": 1, "jobs": 0}
+
+    later = START + timedelta(days=90)
+
+    async def change():
+        ids = [doc["_id"] for doc in await db.candidates.find({}, {"_id": 1}).sort("_id", 1).to_list(None)]
+        await db.candidates.update_many(
+            {"_id": {"$in": ids[:5]}}, {"$set": {"skills": ["Cobol"], "experience_years": 30, "updated_at": later}}
+        )
+        # Written outside the API: no updated_at
+        await db.candidates.insert_one({**_candidate(99, later), "updated_at": None})
+        await db.jobs.update_many({"company": "Company 0"}, {"$set": {"status": "closed", "updated_at": later}})
+        await db.jobs.insert_one(_job(99, later))
+    asyncio.run(change())
+
+    report = _run(db, tmp_path / "incremental")
+    # Plus the newest document of the previous run, read again
+    assert report["processed"] == {"candidates": 7, "jobs": 5}
+    assert load_state(str(tmp_path / "incremental"))[0] == later
+
+    full = _run(db, tmp_path / "full", full=True)
+    assert {field: report[field] for field in REPORT_FIELDS} == {field: full[field] for field in REPORT_FIELDS}
+    assert report["top_candidate_skills"]["Cobol"] == 5 and report["jobs_by_status"]["closed"] == 4
+    assert all(stage["peak_memory_mb"] > 0 for stage in report["stages"])
+
+
+def test_snapshot_index(tmp_path):
+    """Test that the saved index and one rebuilt from the partitions locate the latest versions"""
+    docs = [_candidate(i, START + timedelta(days=i)) for i in range(20)]
+    output_dir = str(tmp_path)
+    index = SnapshotIndex(output_dir, "candidates")
+    for part, chunk in enumerate((docs[:10], docs[10:], docs[5:8])):
+        path = incremental_analytics.write_partition(output_dir, "candidates", f"part-{part:05d}", chunk)
+        index.add(path, [str(doc["_id"]) for doc in chunk])
+    name = index.save("run")
+
+    for loaded in (SnapshotIndex(output_dir, "candidates", name), SnapshotIndex(output_dir, "candidates")):
+        located = loaded.locate([str(docs[6]["_id"]), str(docs[12]["_id"]), str(ObjectId())])
+        assert {key: (partition.split("/")[-1], row) for key, (partition, row) in located.items()} == {
+            str(docs[6]["_id"]): ("part-00002", 1),
+            str(docs[12]["_id"]): ("part-00001", 2),
+        }
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from loadtest.runner import run_load, summarize
+from loadtest.workload import parse_mix
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+async def fast(client, context, rng):
+    await asyncio.sleep(0.001)
+    return FakeResponse(200)
+
+
+async def blocking(client, context, rng):
+    time.sleep(0.02)  # holds the event loop
+    return FakeResponse(500)
+
+
+def test_parse_mix():
+    """Test operation weights parsing"""
+    assert parse_mix("list_jobs=3, get_candidate") == {"list_jobs": 3.0, "get_candidate": 1.0}
+    assert "recommend_candidates" in parse_mix("")
+    with pytest.raises(ValueError):
+        parse_mix("unknown=1")
+
+
+def test_summarize():
+    """Test latency percentiles"""
+    summary = summarize([0.001 * i for i in range(1, 101)])
+
+    assert summary["count"] == 100
+    assert summary["p50"] == pytest.approx(0.0505)
+    assert summary["max"] == pytest.approx(0.1)
+    assert summarize([]) == {"count": 0}
+
+
+def test_run_load_reports_errors_and_loop_lag():
+    """Test per-operation error rates and event-loop lag attribution"""
+    operations = {"fast": {"func": fast}, "blocking": {"func": blocking}}
+
+    report = asyncio.run(run_load(None, None, {"fast": 1, "blocking": 1}, operations, concurrency=2, duration=0.5))
+
+    fast_stats, blocking_stats = report["operations"]["fast"], report["operations"]["blocking"]
+    assert fast_stats["requests"] > 0 and fast_stats["error_rate"] == 0
+    assert blocking_stats["error_rate"] == 1.0
+    assert blocking_stats["statuses"] == {"500": blocking_stats["requests"]}
+    assert blocking_stats["loop_lag"]["max"] >= 0.01
+    assert report["total"]["requests"] == fast_stats["requests"] + blocking_stats["requests"]
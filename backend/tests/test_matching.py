@@ -1,5 +1,12 @@
+import asyncio
+
 import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.api.matching import score_pairs
 from app.ml.matching_engine import MatchingEngine
+from app.utils.metrics import StageTimer
 
 
 def test_skill_match():
@@ -52,3 +59,52 @@ def test_matching_score():
     assert "skill_match" in result
     assert "experience_match" in result
     assert 0 <= result["total_score"] <= 1
+
+
+def test_score_candidates_matches_pairwise_scores():
+    """Test that bulk scoring gives the same scores as pairwise scoring"""
+    engine = MatchingEngine()
+    
+    job = {
+        "required_skills": ["Python", "SQL"],
+        "nice_to_have_skills": ["Docker"],
+        "min_experience": 3,
+        "max_experience": 5,
+        "description": "Python engineer building data pipelines with SQL and Docker"
+    }
+    # Enough distinct terms to go over the vectorizer's max_features
+    long_cv = " ".join(f"skill{chr(97 + i % 26)}{chr(97 + i // 26 % 26)} python" for i in range(600))
+    candidates = [
+        {"skills": ["python", "Docker"], "experience_years": 4, "cv_text": "Python developer, SQL pipelines"},
+        {"skills": ["SQL"], "experience_years": 10, "cv_text": ""},
+        {"skills": [], "experience_years": 1},
+        {"skills": None, "experience_years": 2, "cv_text": "python"},
+        {"skills": ["Python", "SQL"], "experience_years": 3, "cv_text": long_cv},
+    ]
+    
+    for job_data in (job, {**job, "required_skills": None, "nice_to_have_skills": None}):
+        expected = [engine.calculate_match_score(candidate, job_data) for candidate in candidates]
+        assert engine.score_candidates(candidates, job_data) == expected
+    assert engine.score_candidates([], job) == []
+
+
+def test_score_pairs_normalizes_ids():
+    """Test that uppercase and lowercase hex IDs find the same documents"""
+    db = AsyncMongoMockClient()["matching"]
+    
+    async def run():
+        candidate = await db.candidates.insert_one({"name": "Ada", "skills": ["Python"], "experience_years": 3})
+        job = await db.jobs.insert_one({"title": "Dev", "required_skills": ["Python"], "status": "active"})
+        candidate_id, job_id = str(candidate.inserted_id), str(job.inserted_id)
+        pairs = [
+            (candidate_id.upper(), job_id),
+            (candidate_id, job_id.upper()),
+            (candidate_id, "not-an-id"),
+            (str(ObjectId()), job_id),
+        ]
+        return candidate_id, job_id, await score_pairs(db, pairs, StageTimer("test"))
+    
+    candidate_id, job_id, (scores, candidates, jobs, errors) = asyncio.run(run())
+    assert list(scores) == [(candidate_id, job_id)]
+    assert list(candidates) == [candidate_id] and list(jobs) == [job_id]
+    assert [error["error"] for error in errors] == ["Invalid job ID", "Candidate not found"]
@@ -0,0 +1,131 @@
+import asyncio
+import os
+
+from bson import ObjectId
+
+from app.config import settings
+from app.ml import get_matching_engine, matching_index
+from app.ml.matching_index import MatchingIndex, build_arrays, is_stale, publish, published_generation
+from benchmarks import data
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield dict(doc)
+
+
+class FakeDatabase:
+    def __init__(self, candidates):
+        self.docs = candidates
+        self.candidates = self
+
+    def find(self, *args):
+        return FakeCursor(self.docs)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value, nx=False):
+        self.values.setdefault(key, str(value))
+
+
+def _word(i: int) -> str:
+    # CV text keeps letters only
+    return "z" + "".join(chr(97 + i // 26 ** k % 26) for k in range(3))
+
+
+def _candidates(count: int):
+    candidates = data.candidates(count)
+    for candidate in candidates:
+        candidate["_id"] = ObjectId()
+    # Joint vocabulary above max_features, no CV, empty CV, stop words only, no skills, null skills
+    candidates[0]["cv_text"] = " ".join(_word(i) for i in range(700)) + " python docker"
+    candidates[1].pop("cv_text")
+    candidates[2]["cv_text"] = ""
+    candidates[3]["cv_text"] = "the and of"
+    candidates[4]["skills"] = []
+    candidates[5]["skills"] = None
+    return candidates
+
+
+def _build(candidates, directory):
+    arrays, meta = asyncio.run(build_arrays(FakeDatabase(candidates), get_matching_engine()))
+    return publish(str(directory), arrays, meta)
+
+
+def test_index_ranks_like_the_engine(tmp_path):
+    """Test that rankings from the index match MatchingEngine.rank_candidates"""
+    engine = get_matching_engine()
+    candidates = _candidates(120)
+    index = MatchingIndex.open(os.path.join(tmp_path, _build(candidates, tmp_path)))
+    assert len(index) == 120
+
+    jobs = data.jobs(5) + [
+        # Repeated skills, description terms no CV has, long description
+        {
+            "required_skills": ["Python", "python", "Cobol"],
+            "description": "qqq python developer " + " ".join(_word(i) for i in range(0, 1200, 2)),
+            "min_experience": 3
+        },
+        {"required_skills": [], "description": ""},
+        {"required_skills": None, "nice_to_have_skills": None, "description": "python"},
+        {"required_skills": ["Docker"], "nice_to_have_skills": ["AWS"], "description": "the of",
+         "min_experience": 0, "max_experience": 2},
+    ]
+    for job in jobs:
+        for top_n in (10, len(candidates)):
+            expected = engine.rank_candidates([dict(c) for c in candidates], job, top_n=top_n)
+            assert index.rank(engine, job, top_n=top_n) == [
+                (str(candidate["_id"]), score_data) for candidate, score_data in expected
+            ]
+
+
+def test_generation_swap(tmp_path, monkeypatch):
+    """Test that workers swap to a newly published generation and old ones are pruned"""
+    monkeypatch.setattr(settings, "MATCHING_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MATCHING_INDEX_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(matching_index, "_attached", None)
+    candidates = _candidates(20)
+
+    first = _build(candidates[:10], tmp_path)
+    assert published_generation(str(tmp_path)) == first
+    attached = matching_index.attached_index()
+    assert attached.generation == first and len(attached) == 10
+
+    second = _build(candidates, tmp_path)
+    third = _build(candidates, tmp_path)
+    current = matching_index.attached_index()
+    assert current.generation == third and len(current) == 20
+    # The previous generation stays mapped by whoever still holds it
+    assert len(attached) == 10 and attached.ids[0].decode() == str(candidates[0]["_id"])
+    assert sorted(e for e in os.listdir(tmp_path) if e.startswith("gen-")) == [second, third]
+
+
+def test_staleness(tmp_path):
+    """Test that a generation is stale once the candidates generation counter moves"""
+    redis = FakeRedis()
+    directory = str(tmp_path)
+    assert is_stale(directory, redis)
+
+    arrays, meta = asyncio.run(build_arrays(FakeDatabase([]), get_matching_engine()))
+    redis.values["generation:candidates"] = meta["candidates_generation"] = "1"
+    publish(directory, arrays, meta)
+    assert not is_stale(directory, redis)
+
+    redis.values["generation:candidates"] = "2"
+    assert is_stale(directory, redis)
@@ -0,0 +1,65 @@
+import sys
+
+import numpy as np
+from prometheus_client import REGISTRY
+from scipy import sparse
+
+from app.utils import memory
+
+
+def test_deep_sizeof():
+    """Test sizing of nested containers and arrays"""
+    array = np.zeros(1000)
+    matrix = sparse.random(100, 100, density=0.1, format="csr")
+
+    assert memory.deep_sizeof(array) == 8000
+    assert memory.deep_sizeof(matrix) == matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    assert memory.deep_sizeof({"a": array}) > 8000
+    # Shared objects are counted once
+    assert memory.deep_sizeof([array, array]) < 2 * 8000
+
+
+def test_estimate_list_size():
+    """Test extrapolation from a sample of documents"""
+    documents = [{"name": f"Candidate {i:04d}" * 10, "skills": [f"skill-{i:04d}", f"skill-{i + 1:04d}"]} for i in range(500)]
+
+    estimate = memory.estimate_list_size(documents)
+    exact = sys.getsizeof(documents) + sum(memory.deep_sizeof(document) for document in documents)
+    assert abs(estimate - exact) / exact < 0.1
+
+
+def test_track_inflight():
+    """Test that in-flight documents are counted only while tracked"""
+    labels = {"subsystem": "test.documents"}
+
+    with memory.track_inflight("test.documents", [{"a": 1}] * 10):
+        assert REGISTRY.get_sample_value("recruitment_app_memory_inflight_bytes", labels) > 0
+    assert REGISTRY.get_sample_value("recruitment_app_memory_inflight_bytes", labels) == 0
+
+
+def test_register():
+    """Test gauges evaluated at scrape time"""
+    cache = {}
+    memory.register("test.cache", lambda: memory.deep_sizeof(cache), lambda: len(cache))
+    cache.update({i: str(i) for i in range(10)})
+
+    assert REGISTRY.get_sample_value("recruitment_app_memory_items", {"subsystem": "test.cache"}) == 10
+    assert REGISTRY.get_sample_value("recruitment_app_memory_bytes", {"subsystem": "test.cache"}) > 0
+
+
+def test_snapshot_diff_by_module():
+    """Test tracemalloc snapshots grouped and diffed by module"""
+    memory.start_tracing()
+    try:
+        base = memory.take_snapshot()
+        retained = [bytearray(1000) for _ in range(1000)]
+        target = memory.take_snapshot()
+
+        modules = memory.diff_modules(base["snapshot"], target["snapshot"])
+        assert modules[0]["module"] == __name__
+        assert modules[0]["size_diff"] >= 1000 * 1000
+        assert [entry["id"] for entry in memory.list_snapshots()][-2:] == [base["id"], target["id"]]
+        del retained
+    finally:
+        memory.stop_tracing()
+    assert memory.list_snapshots() == []
@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+from app.utils.metrics import UNMATCHED_ROUTE, StageTimer, route_label
+
+
+def test_route_label_uses_template():
+    """Test that requests are labelled by route template, not raw path"""
+    route = SimpleNamespace(path="/api/jobs/{job_id}")
+
+    assert route_label(SimpleNamespace(scope={"route": route})) == "/api/jobs/{job_id}"
+    assert route_label(SimpleNamespace(scope={})) == UNMATCHED_ROUTE
+
+
+def test_stage_timer():
+    """Test stage histograms and scored/pruned counters"""
+    timer = StageTimer("test_endpoint")
+    labels = {"endpoint": "test_endpoint", "stage": "sorting"}
+
+    with timer.stage("sorting"):
+        pass
+    timer.scored(12)
+    timer.pruned("top_n", 2)
+    timer.pruned("min_score", 0)
+
+    assert REGISTRY.get_sample_value("recruitment_app_matching_stage_duration_seconds_count", labels) == 1
+    assert REGISTRY.get_sample_value(
+        "recruitment_app_matching_candidates_scored_total", {"endpoint": "test_endpoint"}
+    ) == 12
+    assert REGISTRY.get_sample_value(
+        "recruitment_app_matching_candidates_pruned_total", {"endpoint": "test_endpoint", "reason": "top_n"}
+    ) == 2
+    assert REGISTRY.get_sample_value(
+        "recruitment_app_matching_candidates_pruned_total", {"endpoint": "test_endpoint", "reason": "min_score"}
+    ) is None
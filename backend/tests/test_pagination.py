@@ -0,0 +1,73 @@
+import asyncio
+from datetime import datetime
+
+import fakeredis
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app.api import jobs
+from app.database import get_database, get_redis
+from app.utils.pagination import SORT, after_cursor, decode_cursor, encode_cursor
+
+
+def test_cursor_roundtrip():
+    """Test that a cursor encodes the (created_at, _id) sort key"""
+    document = {"created_at": datetime(2024, 5, 1, 12, 30), "_id": ObjectId()}
+
+    created_at, object_id = decode_cursor(encode_cursor(document))
+    assert created_at == document["created_at"]
+    assert object_id == document["_id"]
+
+
+def test_invalid_cursor():
+    """Test that malformed cursors are rejected"""
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_after_cursor_keeps_filter():
+    """Test that the keyset condition is combined with the list filter"""
+    document = {"created_at": datetime(2024, 5, 1), "_id": ObjectId()}
+
+    query = after_cursor({"status": "active"}, encode_cursor(document))
+    assert query["$and"][0] == {"status": "active"}
+    assert query["$and"][1]["$or"][1] == {"created_at": document["created_at"], "_id": {"$lt": document["_id"]}}
+
+
+def test_pages_reach_documents_without_created_at():
+    """Test that walking the pages returns every document once, undated ones last"""
+    collection = AsyncMongoMockClient()["pagination"]["jobs"]
+    dated = [{"_id": ObjectId(), "created_at": datetime(2024, 5, 1 + i % 3)} for i in range(7)]
+    undated = [{"_id": ObjectId()}, {"_id": ObjectId(), "created_at": None}, {"_id": ObjectId()}]
+
+    async def pages():
+        await collection.insert_many(dated + undated)
+        seen, cursor = [], None
+        while True:
+            query = after_cursor({}, cursor) if cursor else {}
+            page = await collection.find(query).sort(SORT).limit(4).to_list(length=4)
+            seen += [document["_id"] for document in page]
+            if len(page) < 4:
+                return seen
+            cursor = encode_cursor(page[-1])
+
+    seen = asyncio.run(pages())
+    assert len(seen) == len(set(seen)) == 10
+    assert set(seen[-3:]) == {document["_id"] for document in undated}
+
+
+def test_skip_with_cursor_is_rejected():
+    """Test that skip is refused on cursor pages"""
+    app = FastAPI()
+    app.include_router(jobs.router)
+    app.dependency_overrides[get_database] = lambda: AsyncMongoMockClient()["pagination"]
+    app.dependency_overrides[get_redis] = lambda: fakeredis.FakeRedis(decode_responses=True)
+    client = TestClient(app)
+    cursor = encode_cursor({"created_at": datetime(2024, 5, 1), "_id": ObjectId()})
+
+    assert client.get("/api/jobs/", params={"cursor": cursor, "skip": 5}).status_code == 400
+    assert client.get("/api/jobs/", params={"cursor": cursor}).status_code == 200
+    assert client.get("/api/jobs/", params={"skip": 5}).status_code == 200
@@ -0,0 +1,99 @@
+"""
+Pre-scoring pipeline tests.
+
+The pipeline must agree with the matching engine's skill and experience
+scores; this is checked against a local MongoDB (MONGODB_URL) and skipped
+when no server is reachable.
+"""
+
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.ml.matching_engine import MatchingEngine
+from app.ml.prescoring import prescore_pipeline
+
+TEST_DATABASE = "recruitment_db_prescoring"
+
+JOBS = [
+    {"required_skills": ["Python", "SQL", "Docker"], "nice_to_have_skills": ["AWS"],
+     "min_experience": 4, "max_experience": 6},
+    {"required_skills": ["Java"], "min_experience": 0},
+    {"required_skills": [], "min_experience": 2},
+    # Repeated skills count once per mention, as in the engine
+    {"required_skills": ["Python", "python", "SQL"], "nice_to_have_skills": ["AWS", "aws", "Go"],
+     "min_experience": 1},
+]
+
+
+def test_pipeline_shortlists_in_mongo():
+    """Test that the pipeline ends with a top-k sort and limit"""
+    pipeline = prescore_pipeline(JOBS[0], 50)
+
+    assert pipeline[-2] == {"$sort": {"prescore": -1, "_id": 1}}
+    assert pipeline[-1] == {"$limit": 50}
+    assert "cv_text" in pipeline[1]["$project"]
+
+
+def _expected(engine, document, job):
+    return (
+        engine.calculate_skill_match(
+            document.get("skills") or [], job["required_skills"], job.get("nice_to_have_skills")
+        ) * 0.4
+        + engine.calculate_experience_match(
+            document.get("experience_years", 0), job["min_experience"], job.get("max_experience")
+        ) * 0.3
+    )
+
+
+def test_repeated_skills_match_engine():
+    """Test that a job repeating a skill prescores like the engine (without a server)"""
+    engine = MatchingEngine()
+    db = AsyncMongoMockClient()["prescoring"]
+
+    async def run():
+        await db.candidates.insert_many([
+            {"skills": ["PYTHON"], "experience_years": 3},
+            {"skills": ["sql", "aws", "aws"], "experience_years": 0},
+            {"skills": ["Go"]},
+        ])
+        return await db.candidates.aggregate(prescore_pipeline(JOBS[-1], 10)).to_list(length=None)
+
+    documents = asyncio.run(run())
+    assert len(documents) == 3
+    for document in documents:
+        assert document["prescore"] == pytest.approx(_expected(engine, document, JOBS[-1]))
+
+
+@pytest.fixture(scope="module")
+def candidates():
+    client = MongoClient(settings.MONGODB_URL, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("MongoDB is not available")
+
+    client.drop_database(TEST_DATABASE)
+    collection = client[TEST_DATABASE].candidates
+    skills = ["python", "SQL", "docker", "Java", "aws", "Go"]
+    collection.insert_many([
+        {"name": f"c{i}", "skills": skills[i % 5: i % 5 + i % 4], "experience_years": i % 15}
+        for i in range(60)
+    ] + [{"name": "no skills"}])
+
+    yield collection
+    client.drop_database(TEST_DATABASE)
+    client.close()
+
+
+@pytest.mark.parametrize("job", JOBS)
+def test_prescore_matches_engine(candidates, job):
+    """Test that Mongo computes the same partial score as the engine"""
+    engine = MatchingEngine()
+
+    for document in candidates.aggregate(prescore_pipeline(job, 100)):
+        assert document["prescore"] == pytest.approx(_expected(engine, document, job))
@@ -0,0 +1,131 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils import profiling
+from app.utils.profiling import ProfileAggregate, StackSampler, check_admin_token, collapse_stack, format_collapsed
+
+
+def _busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_collapse_stack():
+    """Test that stacks are collapsed root first with module-qualified frames"""
+    stack = collapse_stack(sys._getframe(), "MainThread")
+
+    assert stack.startswith("MainThread;")
+    assert stack.endswith("test_profiling:test_collapse_stack")
+
+
+def test_sampler_sees_other_threads():
+    """Test that the sampler records stacks of busy threads"""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy, args=(stop,), name="busy-worker")
+    worker.start()
+    sampler = StackSampler(interval=0.001).start()
+    time.sleep(0.1)
+    stacks = sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert sampler.samples > 0
+    assert any(stack.startswith("busy-worker;") and "test_profiling:_busy" in stack for stack in stacks)
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def test_sampler_restricted_to_root():
+    """Test that a sampler with a root frame ignores other threads"""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy, args=(stop,), name="busy-worker")
+    worker.start()
+    sampler = StackSampler(interval=0.001, root=sys._getframe()).start()
+    _spin(0.1)
+    stacks = sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert any("test_profiling:_spin" in stack for stack in stacks)
+    assert all("test_profiling:test_sampler_restricted_to_root" in stack for stack in stacks)
+
+
+def _profiled_app():
+    app = FastAPI()
+
+    @app.get("/busy")
+    async def busy():
+        _spin(0.1)
+        return {"ok": True}
+
+    app.add_middleware(profiling.ProfilingMiddleware)
+    return TestClient(app)
+
+
+def test_middleware(monkeypatch):
+    """Test sampled aggregates (request frames only) and per-request profiles"""
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_INTERVAL", 0.001)
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    profiling.aggregate.reset()
+    client = _profiled_app()
+
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        assert client.get("/busy").json() == {"ok": True}
+        collapsed = client.get("/busy", headers={"X-Profile": "collapsed", "X-Admin-Token": "secret"})
+    finally:
+        stop.set()
+        worker.join()
+
+    snapshot = profiling.aggregate.snapshot()
+    assert snapshot["requests"] == 1
+    assert any("test_profiling:_spin" in stack for stack in snapshot["stacks"])
+    assert all(stack.startswith("/busy;") and "busy-worker" not in stack for stack in snapshot["stacks"])
+
+    # Process-wide
+    assert collapsed.headers["X-Profiled-Status"] == "200"
+    assert "busy-worker;" in collapsed.text and "test_profiling:_spin" in collapsed.text
+    pstats = client.get("/busy", params={"profile": "pstats"}, headers={"X-Admin-Token": "secret"})
+    assert pstats.headers["content-type"] == "application/octet-stream"
+    assert client.get("/busy", params={"profile": "pstats"}).json() == {"ok": True}
+
+
+def test_aggregate_windows():
+    """Test per-route aggregation and window rotation"""
+    aggregate = ProfileAggregate(window=3600)
+    aggregate.add("/api/jobs/", Counter({"main;f": 2}))
+    aggregate.add("/api/jobs/", Counter({"main;f": 1, "main;g": 1}))
+
+    current = aggregate.snapshot()
+    assert current["requests"] == 2
+    assert current["stacks"] == Counter({"/api/jobs/;main;f": 3, "/api/jobs/;main;g": 1})
+    assert format_collapsed(current["stacks"]) == "/api/jobs/;main;f 3\n/api/jobs/;main;g 1\n"
+    assert aggregate.snapshot(previous=True) is None
+
+    aggregate.started_at -= 3600
+    assert aggregate.snapshot()["requests"] == 0
+    assert aggregate.snapshot(previous=True)["requests"] == 2
+
+
+def test_admin_token(monkeypatch):
+    """Test that profiling is off without a configured token"""
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+    assert not check_admin_token("anything")
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    assert check_admin_token("secret")
+    assert not check_admin_token("wrong")
+    assert not check_admin_token(None)
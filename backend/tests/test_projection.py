@@ -0,0 +1,19 @@
+import pytest
+
+from app.utils.projection import CANDIDATE_FIELDS, parse_fields, with_fields
+
+
+def test_parse_fields():
+    """Test projections built from the fields parameter"""
+    assert parse_fields("name, skills", CANDIDATE_FIELDS) == {"name": 1, "skills": 1}
+    assert parse_fields(None, CANDIDATE_FIELDS, {"cv_text": 0}) == {"cv_text": 0}
+
+    with pytest.raises(ValueError):
+        parse_fields("name,password", CANDIDATE_FIELDS)
+
+
+def test_with_fields():
+    """Test that required fields are only added to inclusion projections"""
+    assert with_fields({"name": 1}, "created_at") == {"name": 1, "created_at": 1}
+    assert with_fields({"cv_text": 0}, "created_at") == {"cv_text": 0}
+    assert with_fields(None, "created_at") is None
@@ -0,0 +1,138 @@
+"""
+Query-plan regression tests.
+
+Runs explain() on the queries issued by the API against a local MongoDB
+(MONGODB_URL) and fails on collection scans. Skipped when no server is
+reachable.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.indexes import INDEXES
+from app.utils.pagination import SORT, after_cursor, encode_cursor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "analytics"))
+
+from incremental_analytics import changes_query  # noqa: E402
+
+TEST_DATABASE = "recruitment_db_query_plans"
+SINCE = datetime.utcnow() - timedelta(days=30)
+PAGE_CURSOR = encode_cursor({"created_at": datetime.utcnow(), "_id": ObjectId()})
+
+# (name, collection, filter, sort) mirroring the endpoint queries
+FIND_QUERIES = [
+    ("list_jobs", "jobs", {"status": "active"}, SORT),
+    ("list_jobs_next_page", "jobs", after_cursor({"status": "active"}, PAGE_CURSOR), SORT),
+    ("list_jobs_any_status", "jobs", {}, SORT),
+    ("list_jobs_by_skill", "jobs",
+     {"status": "active", "required_skills": {"$in": ["Python"]}}, SORT),
+    ("list_candidates", "candidates", {}, SORT),
+    ("list_candidates_next_page", "candidates", after_cursor({}, PAGE_CURSOR), SORT),
+    ("list_candidates_by_skill", "candidates", {"skills": {"$in": ["Python"]}}, SORT),
+    ("get_candidate", "candidates", {"_id": ObjectId()}, None),
+    ("upload_cv", "candidates", {"_id": ObjectId()}, None),
+    ("get_job", "jobs", {"_id": ObjectId()}, None),
+    ("dashboard_active_jobs", "jobs", {"status": "active"}, None),
+    ("dashboard_recent_candidates", "candidates", {"created_at": {"$gte": SINCE}}, None),
+    ("dashboard_recent_jobs", "jobs", {"created_at": {"$gte": SINCE}}, None),
+    ("company_stats_total", "jobs", {"company": "TechCorp"}, None),
+    ("company_stats_active", "jobs", {"company": "TechCorp", "status": "active"}, None),
+    ("skill_cooccurrence", "skill_cooccurrence", {"_id": "jobs:Python"}, None),
+    ("skill_cooccurrence_cleanup", "skill_cooccurrence", {"computed_at": {"$lt": SINCE}}, None),
+]
+
+# Delta scans of analytics/incremental_analytics.py, which must be index scans
+INCREMENTAL_QUERIES = [
+    ("incremental_candidates", "candidates", changes_query(SINCE)),
+    ("incremental_jobs", "jobs", changes_query(SINCE)),
+]
+
+# (name, collection, pipeline)
+AGGREGATE_QUERIES = [
+    ("company_stats_skills", "jobs", [
+        {"$match": {"company": "TechCorp"}},
+        {"$unwind": "$required_skills"},
+        {"$group": {"_id": "$required_skills", "count": {"$sum": 1}}}
+    ]),
+    ("timeseries", "analytics_rollups", [
+        {"$match": {"metric": {"$in": ["candidates_new", "jobs_new"]}, "day": {"$gte": SINCE}}},
+        {"$group": {"_id": "$metric", "count": {"$sum": "$count"}}}
+    ]),
+]
+
+
+@pytest.fixture(scope="module")
+def database():
+    client = MongoClient(settings.MONGODB_URL, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("MongoDB is not available")
+
+    client.drop_database(TEST_DATABASE)
+    database = client[TEST_DATABASE]
+    for collection, indexes in INDEXES.items():
+        database[collection].create_indexes(indexes)
+
+    now = datetime.utcnow()
+    database.candidates.insert_many([
+        {"name": f"c{i}", "skills": ["Python", "SQL"][: i % 2 + 1], "created_at": now}
+        for i in range(50)
+    ])
+    database.jobs.insert_many([
+        {"title": f"j{i}", "company": "TechCorp", "status": "active",
+         "required_skills": ["Python"], "created_at": now}
+        for i in range(50)
+    ])
+
+    yield database
+    client.drop_database(TEST_DATABASE)
+    client.close()
+
+
+def _stages(plan):
+    """All plan stage names in an explain document"""
+    if isinstance(plan, dict):
+        for key, value in plan.items():
+            if key == "stage":
+                yield value
+            else:
+                yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+@pytest.mark.parametrize("name,collection,query,sort", FIND_QUERIES, ids=[q[0] for q in FIND_QUERIES])
+def test_find_uses_index(database, name, collection, query, sort):
+    """Test that endpoint find queries never scan a whole collection"""
+    cursor = database[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    stages = list(_stages(cursor.explain()["queryPlanner"]))
+    assert "COLLSCAN" not in stages, f"{name} scans {collection}: {stages}"
+
+
+@pytest.mark.parametrize("name,collection,query", INCREMENTAL_QUERIES, ids=[q[0] for q in INCREMENTAL_QUERIES])
+def test_incremental_scan_uses_index(database, name, collection, query):
+    """Test that the watermark filter of incremental analytics reads an index"""
+    stages = list(_stages(database[collection].find(query).explain()["queryPlanner"]))
+    assert "COLLSCAN" not in stages and "IXSCAN" in stages, f"{name} scans {collection}: {stages}"
+
+
+@pytest.mark.parametrize("name,collection,pipeline", AGGREGATE_QUERIES, ids=[q[0] for q in AGGREGATE_QUERIES])
+def test_aggregate_uses_index(database, name, collection, pipeline):
+    """Test that endpoint aggregations start from an index"""
+    explain = database.command("aggregate", collection, pipeline=pipeline, explain=True)
+
+    stages = list(_stages(explain))
+    assert "COLLSCAN" not in stages, f"{name} scans {collection}: {stages}"
@@ -0,0 +1,233 @@
+import asyncio
+
+import fakeredis
+import numpy as np
+from mongomock_motor import AsyncMongoMockClient
+
+from app.config import settings
+from app.ml import get_matching_engine, recommendations
+from app.ml.recommendations import _TopK, dirty_key, get_list, list_key, listed_key, merge, processing_key
+from app.utils.projection import MATCHING_CANDIDATE_PROJECTION, MATCHING_JOB_PROJECTION
+from app.utils.serialization import pack, unpack
+from benchmarks import data
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def sismember(self, key, member):
+        self.calls.append(lambda: member in self.redis.sets.get(key, set()))
+
+    def get(self, key):
+        self.calls.append(lambda: self.redis.values.get(key))
+
+    def execute(self):
+        return [call() for call in self.calls]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+
+def _scores(*totals):
+    return [(f"id{i}", {"total_score": total}) for i, total in totals]
+
+
+def test_merge():
+    """Test that merges drop removed ids and only insert scores above the threshold"""
+    entry = {"items": _scores((1, 0.9), (2, 0.8), (3, 0.7), (4, 0.6)), "threshold": 0.6}
+
+    merged = merge(entry, {"id2", "id5", "id6"}, _scores((5, 0.85), (6, 0.5)), 4, 10)
+    assert [item[0] for item in merged["items"]] == ["id1", "id5", "id3", "id4"]
+    assert merged["threshold"] == 0.6 and merged["evaluated"] == 10
+
+    # Ties are ordered by id, the longer list is cut and its threshold raised
+    merged = merge(entry, {"id0"}, _scores((0, 0.8)), 4, 10)
+    assert [item[0] for item in merged["items"]] == ["id1", "id0", "id2", "id3"]
+    assert merged["threshold"] == 0.7
+
+    # Too few entries left: recomputed instead
+    assert merge(entry, {"id1", "id2", "id3"}, [], 4, 10) is None
+    # A list holding every entity has no threshold and never runs short
+    entry["threshold"] = None
+    assert merge(entry, {"id1", "id2", "id3"}, _scores((7, 0.1)), 4, 10)["items"] == [
+        ["id4", {"total_score": 0.6}], ["id7", {"total_score": 0.1}]
+    ]
+
+
+def test_top_k(monkeypatch):
+    """Test that chunked top-k selection matches a full sort (rounded score, then column)"""
+    monkeypatch.setattr(recommendations, "TOP_K_CHUNK", 3)
+    rng = np.random.default_rng(0)
+    scores = np.round(rng.random((7, 20)), 2)  # many ties
+    top = _TopK(7, 5)
+    for column in range(20):
+        top.add(column, (scores[:, column], *(scores[:, column] * i for i in (1, 2, 3))))
+    columns, values = top.result()
+
+    for row in range(7):
+        expected = sorted(range(20), key=lambda column: (-scores[row, column], column))[:5]
+        assert columns[row].tolist() == expected
+        assert values[0][row].tolist() == scores[row, expected].tolist()
+        assert values[3][row].tolist() == (scores[row, expected] * 3).tolist()
+    assert _TopK(0, 5).result()[0].shape == (0, 0)
+
+
+def test_get_list(monkeypatch):
+    """Test that lists are served unless disabled, dirty, missing or too short"""
+    redis = FakeRedis()
+    monkeypatch.setattr(settings, "PRECOMPUTE_INTERVAL", 0)
+    redis.values[list_key("job", "a")] = pack({"items": _scores((1, 0.9), (2, 0.8)), "threshold": 0.8})
+    redis.values[list_key("job", "b")] = pack({"items": _scores((1, 0.9)), "threshold": None})
+    assert get_list(redis, "job", "a", 1) is None
+
+    monkeypatch.setattr(settings, "PRECOMPUTE_INTERVAL", 60)
+    assert get_list(redis, "job", "a", 1)["items"] == [["id1", {"total_score": 0.9}]]
+    assert len(get_list(redis, "job", "a", 2)["items"]) == 2
+    assert get_list(redis, "job", "a", 3) is None
+    assert get_list(redis, "job", "b", 3)["items"] == [["id1", {"total_score": 0.9}]]
+    assert get_list(redis, "job", "c", 1) is None
+
+    recommendations.mark_dirty(redis, "job", "a")
+    assert redis.sets[dirty_key("job")] == {"a"}
+    assert get_list(redis, "job", "a", 1) is None
+    redis.sets[processing_key("job")] = redis.sets.pop(dirty_key("job"))
+    assert get_list(redis, "job", "a", 1) is None
+
+
+def _check_lists(db, redis):
+    """Stored lists are the top of a live ranking (lists left dirty are served live)"""
+    engine = get_matching_engine()
+
+    async def load():
+        candidates = await db.candidates.find({}, MATCHING_CANDIDATE_PROJECTION).sort("_id", 1).to_list(None)
+        jobs = await db.jobs.find({"status": "active"}, MATCHING_JOB_PROJECTION).sort("_id", 1).to_list(None)
+        return candidates, jobs
+
+    candidates, jobs = asyncio.run(load())
+    dirty = {kind: {member.decode() for member in redis.smembers(dirty_key(kind))} for kind in ("job", "candidate")}
+    for kind, entities, others in (("job", jobs, candidates), ("candidate", candidates, jobs)):
+        assert {member.decode() for member in redis.smembers(listed_key(kind))} == {str(e["_id"]) for e in entities}
+        for entity in entities:
+            entity_id = str(entity["_id"])
+            entry = unpack(redis.get(list_key(kind, entity_id)))
+            if entity_id in dirty[kind]:
+                assert get_list(redis, kind, entity_id, 1) is None
+                continue
+            top_n = len(entry["items"])
+            if kind == "job":
+                expected = engine.rank_candidates([dict(c) for c in others], entity, top_n=top_n)
+            else:
+                expected = engine.recommend_jobs(dict(entity), others, top_n=top_n)
+            assert [tuple(item) for item in entry["items"]] == [(str(doc["_id"]), score) for doc, score in expected]
+            assert entry["evaluated"] == len(others)
+            assert entry["threshold"] is not None or top_n == len(others)
+    return dirty
+
+
+def test_refresh(monkeypatch):
+    """Test that incremental refreshes keep lists equal to live rankings"""
+    monkeypatch.setattr(settings, "PRECOMPUTE_INTERVAL", 60)
+    monkeypatch.setattr(settings, "PRECOMPUTE_CANDIDATES_PER_JOB", 8)
+    monkeypatch.setattr(settings, "PRECOMPUTE_JOBS_PER_CANDIDATE", 4)
+    monkeypatch.setattr(settings, "MATCHING_INDEX_DIR", None)
+    monkeypatch.setattr(recommendations, "MAX_MERGED_JOBS", 3)
+    db = AsyncMongoMockClient()["recommendations"]
+    redis = fakeredis.FakeRedis()
+
+    def run(changes=None):
+        async def go():
+            if changes:
+                await changes()
+            return await recommendations.refresh(db, redis)
+        return asyncio.run(go())
+
+    async def seed():
+        await db.candidates.insert_many(data.candidates(60))
+        await db.jobs.insert_many([{**job, "status": "active"} for job in data.jobs(12)])
+
+    assert run(seed)["written"] == 72
+    _check_lists(db, redis)
+    # Nothing changed
+    assert run() == {"written": 0, "deleted": 0, "deferred": 0}
+
+    async def writes():
+        candidates = await db.candidates.find({}, {"_id": 1}).sort("_id", 1).to_list(None)
+        jobs = await db.jobs.find({}, {"_id": 1}).sort("_id", 1).to_list(None)
+        for candidate in candidates[:3]:
+            await db.candidates.update_one(
+                {"_id": candidate["_id"]}, {"$set": {"skills": ["Python", "Docker", "AWS"], "experience_years": 12}}
+            )
+            recommendations.mark_dirty(redis, "candidate", candidate["_id"])
+        new = await db.candidates.insert_many(data.candidates(2, seed=7))
+        for candidate_id in new.inserted_ids:
+            recommendations.mark_dirty(redis, "candidate", candidate_id)
+        for candidate in candidates[3:5]:
+            await db.candidates.delete_one({"_id": candidate["_id"]})
+        recommendations.mark_dirty(redis, "candidate", candidates[3]["_id"])  # the other one outside the API
+        await db.jobs.update_one({"_id": jobs[0]["_id"]}, {"$set": {"status": "closed"}})
+        await db.jobs.update_one({"_id": jobs[1]["_id"]}, {"$set": {"description": "python docker aws cloud"}})
+        new = await db.jobs.insert_one({**data.jobs(1, seed=7)[0], "status": "active"})
+        for job_id in (jobs[0]["_id"], jobs[1]["_id"], new.inserted_id):
+            recommendations.mark_dirty(redis, "job", job_id)
+
+    counts = run(writes)
+    assert counts["deleted"] == 3 and counts["written"] > 0
+    dirty = _check_lists(db, redis)
+    assert not redis.exists(processing_key("job")) and not redis.exists(processing_key("candidate"))
+    if dirty["job"] or dirty["candidate"]:
+        run()
+        _check_lists(db, redis)
+
+    # Only the rows a change affects are scored: the changed job against every
+    # candidate, and the other jobs against the changed candidate alone
+    calls = []
+    score = recommendations._Scorer.score
+
+    def counted(self, job):
+        calls.append(len(self.ids))
+        return score(self, job)
+
+    monkeypatch.setattr(recommendations._Scorer, "score", counted)
+
+    async def change(kinds):
+        if "job" in kinds:
+            job = await db.jobs.find_one({"status": "active"}, sort=[("_id", 1)])
+            await db.jobs.update_one({"_id": job["_id"]}, {"$set": {"required_skills": ["Python", "SQL"]}})
+            recommendations.mark_dirty(redis, "job", job["_id"])
+        if "candidate" in kinds:
+            candidate = await db.candidates.find_one({}, sort=[("_id", -1)])
+            await db.candidates.update_one({"_id": candidate["_id"]}, {"$inc": {"experience_years": 1}})
+            recommendations.mark_dirty(redis, "candidate", candidate["_id"])
+
+    total = asyncio.run(db.candidates.count_documents({}))
+    for kinds, expected in (
+        (("job",), [total]),
+        (("candidate",), [1] * 12),
+        (("job", "candidate"), [total] + [1] * 11),
+    ):
+        calls.clear()
+        run(lambda: change(kinds))
+        assert calls == expected
+        _check_lists(db, redis)
+    monkeypatch.setattr(recommendations._Scorer, "score", score)
+
+    # More new jobs than are merged one by one: every list is recomputed
+    async def many_jobs():
+        new = await db.jobs.insert_many([{**job, "status": "active"} for job in data.jobs(4, seed=8)])
+        for job_id in new.inserted_ids:
+            recommendations.mark_dirty(redis, "job", job_id)
+
+    counts = run(many_jobs)
+    assert counts["written"] == 16 + 60
+    _check_lists(db, redis)
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from app.analytics.rollups import candidate_events, day_start, job_events
+
+
+def test_day_start():
+    """Test truncation of timestamps to the day bucket"""
+    assert day_start(datetime(2024, 5, 1, 17, 42)) == datetime(2024, 5, 1)
+
+
+def test_candidate_events():
+    """Test rollup increments for candidate creation and skill additions"""
+    created = candidate_events(None, {"skills": ["Python", "SQL"]})
+    assert created[("candidates_new", None)] == 1
+    assert created[("candidate_skills", "Python")] == 1
+
+    # Only newly added skills are counted as mentions on update
+    updated = candidate_events({"skills": ["Python"]}, {"skills": ["Python", "Docker"]})
+    assert dict(updated) == {("candidate_skills", "Docker"): 1}
+
+    # Deletes do not rewrite history
+    assert not candidate_events({"skills": ["Python"]}, None)
+
+
+def test_job_events():
+    """Test rollup increments for job creation and status transitions"""
+    job = {
+        "company": "TechCorp",
+        "remote": True,
+        "status": "active",
+        "required_skills": ["Python"]
+    }
+
+    created = job_events(None, job)
+    assert created[("jobs_new", None)] == 1
+    assert created[("jobs_by_company", "TechCorp")] == 1
+    assert created[("jobs_by_remote", "remote")] == 1
+    assert created[("jobs_by_status", "active")] == 1
+
+    closed = job_events(job, {**job, "status": "closed"})
+    assert dict(closed) == {("jobs_by_status", "closed"): 1}
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.utils.serialization import FastJSONResponse, dumps, loads, pack, unpack
+
+
+def test_dumps_mongo_document():
+    """Test that ObjectIds and datetimes serialize without conversion"""
+    object_id = ObjectId()
+    document = {"id": object_id, "created_at": datetime(2024, 5, 1, 12, 30), "skills": ["Python"]}
+
+    assert loads(dumps(document)) == {
+        "id": str(object_id),
+        "created_at": "2024-05-01T12:30:00",
+        "skills": ["Python"]
+    }
+
+
+def test_dumps_rejects_unknown_types():
+    """Test that unsupported values fail loudly"""
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_fast_json_response():
+    """Test that responses are rendered as compact JSON"""
+    response = FastJSONResponse({"total": 1, "ok": True})
+
+    assert response.body == b'{"total":1,"ok":true}'
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_pack_roundtrip():
+    """Test msgpack cache entries"""
+    object_id = ObjectId()
+    entry = {"candidate_id": object_id, "scores": [0.5, 0.25], "computed_at": datetime(2024, 5, 1)}
+
+    assert unpack(pack(entry)) == {
+        "candidate_id": str(object_id),
+        "scores": [0.5, 0.25],
+        "computed_at": "2024-05-01T00:00:00"
+    }
@@ -0,0 +1,33 @@
+from collections import Counter
+
+from app.analytics.skill_counters import candidate_supply, counter_deltas, job_demand
+
+
+def test_counter_deltas():
+    """Test delta computation between two skill multisets"""
+    before = Counter(["Python", "Docker"])
+    after = Counter(["Python", "Kubernetes"])
+
+    deltas = counter_deltas(before, after)
+    assert deltas == {"Docker": -1, "Kubernetes": 1}
+
+
+def test_job_demand_only_counts_active_jobs():
+    """Test that closed and deleted jobs contribute no demand"""
+    job = {"required_skills": ["Python", "Spark"], "status": "active"}
+
+    assert job_demand(job) == Counter(["Python", "Spark"])
+    assert job_demand({**job, "status": "closed"}) == Counter()
+    assert job_demand(None) == Counter()
+
+    # Closing a job removes its demand
+    deltas = counter_deltas(job_demand(job), job_demand({**job, "status": "closed"}))
+    assert deltas == {"Python": -1, "Spark": -1}
+
+
+def test_candidate_delete_removes_supply():
+    """Test that deleting a candidate decrements its skills"""
+    candidate = {"skills": ["Python", "SQL"]}
+
+    deltas = counter_deltas(candidate_supply(candidate), candidate_supply(None))
+    assert deltas == {"Python": -1, "SQL": -1}
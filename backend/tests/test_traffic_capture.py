@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.utils import traffic_capture
+from loadtest.replay import IdMapper, compare_runs, load_traces, replay
+
+JOB_ID = "65a1b2c3d4e5f60718293a4b"
+CANDIDATE_ID = "65a1b2c3d4e5f60718293a4c"
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(traffic_capture.TrafficCaptureMiddleware)
+
+    @app.get("/api/matching/recommend/{job_id}")
+    async def recommend(job_id: str, top_n: int = 10):
+        return {"job_id": job_id, "top_n": top_n}
+
+    @app.post("/api/matching/bulk-score")
+    async def bulk_score(payload: dict):
+        return payload
+
+    @app.get("/api/matching/fail/{job_id}")
+    async def fail(job_id: str):
+        raise RuntimeError("scoring failed")
+
+    return app
+
+
+def test_anonymize():
+    """Test that ObjectIds are hashed with their kind and other values kept"""
+    value = traffic_capture.anonymize({"job_id": JOB_ID, "candidate_ids": [CANDIDATE_ID], "top_n": 5})
+
+    assert value["job_id"].startswith("job:") and JOB_ID not in value["job_id"]
+    assert value["candidate_ids"][0].startswith("candidate:")
+    assert value["top_n"] == 5
+    assert traffic_capture.anonymize(JOB_ID, "job_id") == value["job_id"]
+    # Uppercase hex is the same ObjectId
+    assert traffic_capture.anonymize(JOB_ID.upper(), "job_id") == value["job_id"]
+
+
+def test_failing_request_is_captured(tmp_path):
+    """Test that a request whose endpoint raises is written with status 500"""
+    path = str(tmp_path / "traces.jsonl")
+    traffic_capture.start_capture(path)
+    try:
+        client = TestClient(make_app(), raise_server_exceptions=False)
+        assert client.get(f"/api/matching/fail/{JOB_ID.upper()}").status_code == 500
+    finally:
+        traffic_capture.stop_capture()
+
+    content = open(path).read()
+    assert JOB_ID.upper() not in content
+    [trace] = load_traces([path + "*"])
+    assert trace["status"] == 500 and trace["route"] == "/api/matching/fail/{job_id}"
+    assert trace["path"].startswith("/api/matching/fail/job:")
+
+
+def test_capture_and_replay(tmp_path):
+    """Test capturing anonymized traces and replaying them"""
+    path = str(tmp_path / "traces.jsonl")
+    settings.TRAFFIC_CAPTURE_KEY = "test-key"
+    traffic_capture.start_capture(path)
+    try:
+        client = TestClient(make_app())
+        assert client.get(f"/api/matching/recommend/{JOB_ID}", params={"top_n": 3, "cursor": "abc"}).status_code == 200
+        assert client.post("/api/matching/bulk-score", json={"job_id": JOB_ID, "candidate_ids": [CANDIDATE_ID]}).status_code == 200
+    finally:
+        traffic_capture.stop_capture()
+        settings.TRAFFIC_CAPTURE_KEY = None
+
+    content = open(path).read()
+    assert JOB_ID not in content and CANDIDATE_ID not in content
+    traces = load_traces([path + "*"])
+    assert [trace["route"] for trace in traces] == ["/api/matching/recommend/{job_id}", "/api/matching/bulk-score"]
+    assert traces[0]["query"] == {"top_n": "3"}
+    assert traces[0]["response_bytes"] > 0
+    assert traces[1]["body"]["job_id"].startswith("job:") and traces[1]["status"] == 200
+
+    # Same hash, same id: the job of both requests maps to one existing job
+    mapper = IdMapper(candidate_ids=["c1", "c2"], job_ids=["j1", "j2", "j3"])
+    restored_path = mapper.restore(traces[0]["path"])
+    restored_body = mapper.restore(traces[1]["body"])
+    assert restored_path == f"/api/matching/recommend/{restored_body['job_id']}"
+    assert restored_body["candidate_ids"][0] in ("c1", "c2")
+
+    async def run():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await replay(client, traces, mapper, speed=0, max_inflight=4)
+
+    first, second = asyncio.run(run()), asyncio.run(run())
+    assert [result["status"] for result in first] == [200, 200]
+    assert first[0]["bytes"] > 0
+    comparison = compare_runs(first, second, traces)
+    assert comparison["mismatches"] == 0
+    assert set(comparison["routes"]) == {trace["route"] for trace in traces}
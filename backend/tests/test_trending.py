@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import fakeredis
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.analytics import trending
+from app.analytics.trending import _day, hll_key, mentions_key
+from app.api import analytics
+from app.database import get_redis
+
+
+def test_bucket_keys():
+    """Test daily bucket key layout"""
+    now = datetime(2024, 3, 1, 12, 0)
+
+    assert _day(0, now) == "20240301"
+    assert _day(1, now) == "20240229"
+    assert mentions_key("jobs", "20240301") == "trending:jobs:20240301"
+    assert hll_key("Python", "20240301") == "trending:hll:Python:20240301"
+
+
+def _redis():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def test_skill_changes():
+    """Test that gained skills are counted up and lost ones down"""
+    redis = _redis()
+    key = mentions_key("candidates", _day())
+
+    trending.apply_candidate_change(redis, None, {"_id": "c1", "skills": ["Python", "SQL"]})
+    trending.apply_candidate_change(
+        redis, {"_id": "c1", "skills": ["Python", "SQL"]}, {"_id": "c1", "skills": ["Python", "AWS"]}
+    )
+    assert dict(redis.zrange(key, 0, -1, withscores=True)) == {"Python": 1, "SQL": 0, "AWS": 1}
+
+    trending.apply_job_change(redis, {"required_skills": ["Java"]}, {"required_skills": None})
+    assert redis.zscore(mentions_key("jobs", _day()), "Java") == -1
+    assert 0 < redis.ttl(key) <= trending.RETENTION_DAYS * 86400
+
+    # Net zero or negative skills are not trending
+    assert {item["skill"] for item in trending.get_trending_skills(redis)} == {"AWS", "Python"}
+    assert trending.get_trending_skills(redis, "jobs") == []
+
+
+def test_windows_and_distinct_counts():
+    """Test window unions, week-over-week deltas and distinct candidates"""
+    redis = _redis()
+    for offset, count in ((0, 3), (6, 2), (8, 4), (20, 5), (60, 7)):
+        redis.zincrby(mentions_key("candidates", _day(offset)), count, "Python")
+    redis.zincrby(mentions_key("candidates", _day(1)), 1, "Go")
+    for i in range(50):
+        redis.pfadd(hll_key("Python", _day(i % 3)), f"c{i % 40}")
+
+    by_window = {window: trending.get_trending_skills(redis, window=window) for window in trending.WINDOWS}
+    assert [item["mentions"] for item in by_window[7]] == [5, 1]
+    assert by_window[30][0]["mentions"] == 14 and by_window[90][0]["mentions"] == 21
+    python = by_window[90][0]
+    assert (python["this_week"], python["previous_week"], python["wow_delta"]) == (5, 4, 1)
+    assert python["wow_change_pct"] == 25.0
+    assert by_window[7][1]["previous_week"] == 0 and by_window[7][1]["wow_change_pct"] is None
+    # HyperLogLog union over the window: ~40 distinct candidates
+    assert abs(python["distinct_candidates"] - 40) <= 2
+    assert trending.get_trending_skills(redis, window=7, limit=1)[0]["skill"] == "Python"
+
+
+def test_temporary_keys_expire():
+    """Test that window unions are short-lived and reused"""
+    redis = _redis()
+    for offset in (0, 10):
+        redis.zincrby(mentions_key("jobs", _day(offset)), 1, "Python")
+    trending.get_trending_skills(redis, "jobs", window=30)
+
+    tmp_keys = redis.keys("trending:tmp:*")
+    assert len(tmp_keys) == 3
+    assert all(0 < redis.ttl(key) <= trending.TMP_KEY_TTL for key in tmp_keys)
+
+    # A union is not rebuilt while it lives, and is gone once it expired
+    redis.zincrby(mentions_key("jobs", _day()), 1, "Go")
+    assert [item["skill"] for item in trending.get_trending_skills(redis, "jobs", window=30)] == ["Python"]
+    for key in tmp_keys:
+        redis.delete(key)
+    assert len(trending.get_trending_skills(redis, "jobs", window=30)) == 2
+
+
+def test_trending_endpoint_limit():
+    """Test that the endpoint validates limit"""
+    app = FastAPI()
+    app.include_router(analytics.router)
+    app.dependency_overrides[get_redis] = _redis
+    client = TestClient(app)
+
+    assert client.get("/api/analytics/skills-trending", params={"limit": 0}).status_code == 422
+    assert client.get("/api/analytics/skills-trending", params={"limit": trending.MAX_LIMIT + 1}).status_code == 422
+    response = client.get("/api/analytics/skills-trending", params={"limit": 5})
+    assert response.status_code == 200 and response.json()["trending_skills"] == []
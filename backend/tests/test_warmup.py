@@ -0,0 +1,50 @@
+import asyncio
+import subprocess
+import sys
+
+from app import warmup
+from app.indexes import INDEXES
+from app.ml import get_matching_engine, loaded_matching_engine
+
+
+class FakeCollection:
+    def __init__(self, names):
+        self.names = names
+
+    async def index_information(self):
+        return {name: {} for name in self.names}
+
+
+class FakeDatabase(dict):
+    def __missing__(self, collection):
+        return FakeCollection(["_id_"])
+
+
+def test_import_does_not_load_models():
+    """Test that importing the app leaves the heavy ML modules unloaded"""
+    code = (
+        "import sys, app.main, app.ml; "
+        "assert app.ml.loaded_matching_engine() is None; "
+        "print(sorted(m for m in ('sklearn', 'scipy', 'nltk', 'pandas', 'docx', 'PyPDF2') if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+
+def test_preload_and_readiness():
+    """Test that readiness needs the engine and every registered index"""
+    complete = FakeDatabase({
+        collection: FakeCollection(["_id_"] + [index.document["name"] for index in indexes])
+        for collection, indexes in INDEXES.items()
+    })
+
+    warmup.preload()
+    assert loaded_matching_engine() is get_matching_engine()
+
+    report = asyncio.run(warmup.readiness(complete))
+    assert report["ready"] and report["models"] and report["indexes"]
+
+    warmup.state["indexes"] = False
+    report = asyncio.run(warmup.readiness(FakeDatabase()))
+    assert not report["ready"]
+    assert "missing indexes" in report["errors"]["indexes"]
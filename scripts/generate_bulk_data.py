@@ -0,0 +1,375 @@
+"""
+Bulk synthetic data generator (benchmarks and capacity tests)
+
+Writes candidates, jobs and CV texts straight to MongoDB with batched
+`insert_many`. Output is deterministic for a given seed: each batch draws
+from its own generator seeded with (seed, collection, batch number), and
+ObjectIds are built from `created_at` plus seeded bytes (pass --end to pin
+the dates too). Batches are generated and inserted by a pool of processes,
+one per core.
+
+Skills follow a Zipf law over an extended taxonomy, biased towards the
+domain of each candidate or job, so that a few skills are very common and
+most are rare, as in real data. CV texts vary in length (log-normal) and
+are stored zlib-compressed in ``cv_texts`` like backend/app/utils/cv_store.py
+does.
+
+Derived data is not maintained while loading. Afterwards rebuild the
+rollups (``python -m app.analytics.rollups``); skill counters are
+reconciled by the API periodically (SKILL_COUNTERS_RECONCILE_INTERVAL).
+Trending skills are left alone: they track recent writes only.
+
+    python scripts/generate_bulk_data.py --candidates 1000000 --jobs 50000
+    python scripts/generate_bulk_data.py --candidates 200000 --dry-run
+"""
+
+import argparse
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+from bson import Binary, ObjectId
+from pymongo import MongoClient
+
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://127.0.0.1:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "recruitment_db")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+CV_COMPRESSION_LEVEL = 6  # cv_store.COMPRESSION_LEVEL
+
+# Skill taxonomy by domain, most common skills first within each domain
+DOMAINS = {
+    "Backend": ["Python", "Java", "SQL", "Git", "PostgreSQL", "Docker", "Spring Boot", "Django",
+                "Node.js", "REST API", "Redis", "MySQL", "Go", "Flask", "FastAPI", "Microservices",
+                "C#", "ASP.NET", "PHP", "Kotlin", "Ruby", "RabbitMQ", "gRPC", "Rust", "Scala"],
+    "Frontend": ["JavaScript", "React", "HTML", "CSS", "TypeScript", "Angular", "Vue.js", "Redux",
+                 "Webpack", "Sass", "Next.js", "Jest", "Tailwind CSS", "Figma", "GraphQL", "Svelte"],
+    "Data": ["Python", "SQL", "Pandas", "Spark", "Kafka", "Airflow", "Hadoop", "Hive", "Scala",
+             "Snowflake", "dbt", "Tableau", "Power BI", "Excel", "BigQuery", "Flink", "HBase",
+             "Cassandra", "Elasticsearch", "Data Mining", "Statistical Analysis", "R"],
+    "ML": ["Python", "Machine Learning", "Scikit-learn", "TensorFlow", "PyTorch", "NumPy",
+           "Pandas", "Deep Learning", "NLP", "MLflow", "Computer Vision", "Keras", "Kubeflow",
+           "DVC", "Hugging Face", "XGBoost", "Weights & Biases", "MATLAB"],
+    "DevOps": ["Docker", "Kubernetes", "Linux", "AWS", "Terraform", "Jenkins", "Ansible", "Git",
+               "GitLab CI", "GitHub Actions", "Prometheus", "Grafana", "Azure", "GCP", "Bash",
+               "Helm", "ELK Stack", "Nginx", "CI/CD", "ArgoCD"],
+    "Security": ["Cybersecurity", "Linux", "Networking", "SIEM", "Penetration Testing", "Python",
+                 "ISO 27001", "Firewalls", "OWASP", "Splunk", "Wireshark", "IAM", "Cryptography"],
+    "Mobile": ["Swift", "Kotlin", "Android", "iOS", "Flutter", "React Native", "Dart",
+               "Objective-C", "Firebase", "Java", "Jetpack Compose", "SwiftUI"],
+}
+SOFT_SKILLS = ["Communication", "Team Work", "Agile", "Scrum", "Problem Solving", "Leadership",
+               "English", "Jira", "Project Management", "Mentoring"]
+
+DOMAIN_TITLES = {
+    "Backend": ["Backend Developer", "Software Engineer", "Java Developer", "Python Developer"],
+    "Frontend": ["Frontend Developer", "Full Stack Developer", "UI Engineer", "React Developer"],
+    "Data": ["Data Engineer", "Data Analyst", "Big Data Engineer", "BI Developer"],
+    "ML": ["ML Engineer", "Data Scientist", "NLP Engineer", "MLOps Engineer"],
+    "DevOps": ["DevOps Engineer", "Cloud Architect", "Site Reliability Engineer", "Platform Engineer"],
+    "Security": ["Security Engineer", "SOC Analyst", "Pentester", "Security Architect"],
+    "Mobile": ["Mobile Developer", "iOS Developer", "Android Developer", "Flutter Developer"],
+}
+
+FIRST_NAMES = ["Alice", "Bob", "Claire", "David", "Emma", "François", "Gabriel", "Hélène", "Ivan",
+               "Julie", "Karim", "Léa", "Mohamed", "Nina", "Olivier", "Pauline", "Quentin", "Sarah",
+               "Thomas", "Inès", "Lucas", "Camille", "Hugo", "Chloé", "Youssef", "Manon", "Nathan",
+               "Amina", "Louis", "Zoé", "Mehdi", "Jade", "Arthur", "Lina", "Paul", "Yasmine"]
+LAST_NAMES = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand",
+              "Leroy", "Moreau", "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David",
+              "Bertrand", "Roux", "Vincent", "Fournier", "Morel", "Girard", "Andre", "Mercier",
+              "Benali", "Haddad", "Nguyen", "Lambert", "Bonnet", "Francois", "Martinez", "Legrand"]
+CITIES = ["Paris", "Lyon", "Remote", "Toulouse", "Marseille", "Nantes", "Lille", "Bordeaux",
+          "Rennes", "Strasbourg", "Montpellier", "Nice", "Grenoble", "Sophia Antipolis"]
+EDUCATION = [("Master", 0.45), ("Bachelor", 0.3), ("PhD", 0.07), ("Bootcamp", 0.08), (None, 0.1)]
+COMPANY_PREFIXES = ["Tech", "Data", "Cloud", "AI", "Cyber", "Web", "Smart", "Net", "Quantum", "Green"]
+COMPANY_SUFFIXES = ["Corp", "Soft", "Labs", "Ventures", "Systems", "Works", "Solutions", "Factory"]
+JOB_TYPES = [("Full-time", 0.8), ("Contract", 0.15), ("Part-time", 0.05)]
+JOB_STATUSES = [("active", 0.8), ("closed", 0.17), ("draft", 0.03)]
+
+CV_SENTENCES = [
+    "Experienced {title} with {years} years of experience delivering production systems.",
+    "Worked extensively with {skill} and {other} in agile teams.",
+    "Designed and maintained services built on {skill}, improving reliability and performance.",
+    "Led the migration of a legacy platform to {skill}.",
+    "Mentored junior engineers and reviewed code on {skill} projects.",
+    "Built data pipelines and dashboards using {skill} and {other}.",
+    "Contributed to open source projects around {skill}.",
+    "Certified in {skill}, with hands-on experience of {other} in production.",
+    "Automated testing and deployment with {skill}, reducing release time.",
+    "Collaborated with product and design teams to ship features on {other}.",
+]
+
+SKILLS = list(dict.fromkeys([s for skills in DOMAINS.values() for s in skills] + SOFT_SKILLS))
+SKILL_INDEX = {skill: i for i, skill in enumerate(SKILLS)}
+DOMAIN_NAMES = list(DOMAINS)
+COMPANIES = [p + s for p in COMPANY_PREFIXES for s in COMPANY_SUFFIXES]
+
+COLLECTION_KEYS = {"candidates": 1, "jobs": 2}
+
+
+def zipf_weights(n: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _choice(rng, options, size):
+    values, probabilities = zip(*options)
+    return [values[i] for i in rng.choice(len(values), size=size, p=probabilities)]
+
+
+class SkillSampler:
+    """Skill sets drawn without replacement from domain-biased Zipf weights"""
+
+    def __init__(self, exponent: float, domain_boost: float):
+        # Global popularity: skills in taxonomy order, plus a boost for the
+        # domain's own skills by their rank within the domain
+        base = np.log(zipf_weights(len(SKILLS), exponent))
+        self.logits = np.tile(base, (len(DOMAIN_NAMES), 1))
+        for d, name in enumerate(DOMAIN_NAMES):
+            indexes = [SKILL_INDEX[s] for s in DOMAINS[name]]
+            self.logits[d, indexes] += domain_boost + np.log(zipf_weights(len(indexes), exponent)) + np.log(len(indexes))
+
+    def sample(self, rng, domains: np.ndarray, counts: np.ndarray) -> List[List[str]]:
+        # Gumbel top-k: the k largest of logits + Gumbel noise are a weighted
+        # sample without replacement, for the whole batch at once
+        keys = self.logits[domains] + rng.gumbel(size=(len(domains), len(SKILLS)))
+        k = int(counts.max())
+        top = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(keys, top, axis=1).argsort(axis=1)[:, ::-1]
+        top = np.take_along_axis(top, order, axis=1)
+        return [[SKILLS[i] for i in row[:count]] for row, count in zip(top.tolist(), counts.tolist())]
+
+
+def created_at_and_ids(rng, size: int, start: float, end: float):
+    """Creation times (denser towards `end`, as a growing platform) and matching ObjectIds"""
+    timestamps = np.sort(start + (end - start) * rng.power(2.0, size))
+    dates = (timestamps * 1000).astype(np.int64).astype("datetime64[ms]").tolist()
+    prefixes = timestamps.astype(">u4").tobytes()
+    suffixes = rng.bytes(8 * size)
+    ids = [ObjectId(prefixes[4 * i:4 * i + 4] + suffixes[8 * i:8 * i + 8]) for i in range(size)]
+    return ids, dates
+
+
+def cv_text(title: str, years: int, skills: List[str], picks: List[int], fractions: List[List[float]]) -> str:
+    """CV text from pre-drawn sentence picks, and skill picks as fractions of len(skills)"""
+    lines = [f"{title} - {', '.join(skills)}"]
+    n = len(skills)
+    for pick, (a, b) in zip(picks, fractions):
+        lines.append(CV_SENTENCES[pick].format(title=title, years=years, skill=skills[int(a * n)], other=skills[int(b * n)]))
+    return "\n".join(lines)
+
+
+def cv_document(text: str, updated_at: datetime) -> Dict:
+    # Same format as cv_store._document
+    return {
+        "codec": "zlib",
+        "payload": Binary(zlib.compress(text.encode("utf-8"), CV_COMPRESSION_LEVEL)),
+        "length": len(text),
+        "updated_at": updated_at
+    }
+
+
+class Generator:
+    """Deterministic batches of candidate, job and CV text documents"""
+
+    def __init__(self, seed: int, days: int, skill_exponent: float, cv_ratio: float, end: float = None):
+        self.seed = seed
+        self.end = end or time.time()
+        self.start = self.end - days * 86400
+        self.cv_ratio = cv_ratio
+        self.skills = SkillSampler(skill_exponent, domain_boost=3.0)
+        self.domain_weights = zipf_weights(len(DOMAIN_NAMES), 0.6)
+        self.city_weights = zipf_weights(len(CITIES), 1.1)
+        self.company_weights = zipf_weights(len(COMPANIES), 1.0)
+
+    def rng(self, collection: str, batch: int):
+        return np.random.default_rng([self.seed, COLLECTION_KEYS[collection], batch])
+
+    def candidates(self, batch: int, first: int, size: int):
+        """`size` candidates numbered from `first`, and the CV texts of some of them"""
+        rng = self.rng("candidates", batch)
+        ids, dates = created_at_and_ids(rng, size, self.start, self.end)
+        domains = rng.choice(len(DOMAIN_NAMES), size=size, p=self.domain_weights)
+        skills = self.skills.sample(rng, domains, np.clip(rng.poisson(6, size), 2, 20))
+        experience = np.clip(rng.gamma(2.0, 3.0, size), 0, 35).astype(int).tolist()
+        salary = (32000 + 3500 * np.array(experience) * rng.lognormal(0, 0.15, size)).round(-3).tolist()
+        first_names = rng.integers(0, len(FIRST_NAMES), size).tolist()
+        last_names = rng.integers(0, len(LAST_NAMES), size).tolist()
+        cities = rng.choice(len(CITIES), size=size, p=self.city_weights).tolist()
+        education = _choice(rng, EDUCATION, size)
+        has_cv = rng.random(size) < self.cv_ratio
+        # Sentence counts: log-normal, from a few lines to long CVs
+        sentences = np.where(has_cv, np.clip(rng.lognormal(2.5, 0.6, size), 3, 150), 0).astype(int)
+        has_cv = has_cv.tolist()
+        titles = rng.integers(0, 4, size).tolist()
+        # Random draws of all CV texts of the batch at once
+        ends = np.cumsum(sentences).tolist()
+        sentences = sentences.tolist()
+        picks = rng.integers(0, len(CV_SENTENCES), ends[-1]).tolist()
+        fractions = rng.random((ends[-1], 2)).tolist()
+
+        candidates, texts = [], []
+        for i in range(size):
+            number = first + i
+            first_name, last_name = FIRST_NAMES[first_names[i]], LAST_NAMES[last_names[i]]
+            candidate = {
+                "_id": ids[i],
+                "name": f"{first_name} {last_name}",
+                "email": f"candidate{number}@example.com",
+                "phone": f"+336{number % 100000000:08d}",
+                "skills": skills[i],
+                "experience_years": experience[i],
+                "education": education[i],
+                "location": CITIES[cities[i]],
+                "desired_salary": salary[i],
+                "has_cv_text": has_cv[i],
+                "cv_length": 0,
+                "created_at": dates[i],
+                "updated_at": dates[i],
+            }
+            if has_cv[i]:
+                title = DOMAIN_TITLES[DOMAIN_NAMES[domains[i]]][titles[i]]
+                start = ends[i] - sentences[i]
+                text = cv_text(title, experience[i], skills[i], picks[start:ends[i]], fractions[start:ends[i]])
+                candidate["cv_length"] = len(text)
+                texts.append({"_id": ids[i], **cv_document(text, dates[i])})
+            candidates.append(candidate)
+        return candidates, texts
+
+    def jobs(self, batch: int, first: int, size: int):
+        rng = self.rng("jobs", batch)
+        ids, dates = created_at_and_ids(rng, size, self.start, self.end)
+        domains = rng.choice(len(DOMAIN_NAMES), size=size, p=self.domain_weights)
+        skills = self.skills.sample(rng, domains, np.clip(rng.poisson(6, size), 3, 12))
+        required_counts = rng.integers(3, 8, size).tolist()
+        min_experience = rng.choice([0, 1, 2, 3, 5, 8], size=size, p=[0.15, 0.15, 0.25, 0.2, 0.18, 0.07]).tolist()
+        has_max = (rng.random(size) < 0.3).tolist()
+        companies = rng.choice(len(COMPANIES), size=size, p=self.company_weights).tolist()
+        cities = rng.choice(len(CITIES), size=size, p=self.city_weights).tolist()
+        remote = (rng.random(size) < 0.35).tolist()
+        titles = rng.integers(0, 4, size).tolist()
+        job_types = _choice(rng, JOB_TYPES, size)
+        statuses = _choice(rng, JOB_STATUSES, size)
+
+        jobs = []
+        for i in range(size):
+            title = DOMAIN_TITLES[DOMAIN_NAMES[domains[i]]][titles[i]]
+            required, nice_to_have = skills[i][:required_counts[i]], skills[i][required_counts[i]:]
+            low = min_experience[i]
+            jobs.append({
+                "_id": ids[i],
+                "title": title,
+                "company": COMPANIES[companies[i]],
+                "description": (
+                    f"We are looking for a {title} to join our team. "
+                    f"You will work with {', '.join(required)} on products used by thousands of customers."
+                ),
+                "required_skills": required,
+                "nice_to_have_skills": nice_to_have,
+                "min_experience": low,
+                "max_experience": low + 5 if has_max[i] else None,
+                "location": CITIES[cities[i]],
+                "salary_range": f"{35 + 5 * low}k-{45 + 7 * low}k",
+                "job_type": job_types[i],
+                "remote": remote[i],
+                "status": statuses[i],
+                "created_at": dates[i],
+                "updated_at": dates[i],
+            })
+        return jobs
+
+
+def batches(total: int, batch_size: int):
+    for batch, first in enumerate(range(0, total, batch_size)):
+        yield batch, first, min(batch_size, total - first)
+
+
+def bump_generations(redis_url: str):
+    """Invalidate the API's HTTP validators (app.utils.http_cache.bump_generation)"""
+    try:
+        from redis import Redis
+        redis = Redis.from_url(redis_url)
+        pipe = redis.pipeline()
+        for name in ("candidates", "jobs"):
+            pipe.set(f"generation:{name}", time.time_ns(), nx=True)
+            pipe.incr(f"generation:{name}")
+        pipe.execute()
+    except Exception as e:
+        print(f"⚠️  Could not bump cache generations ({e}), cached API responses may be stale")
+
+
+# Per-process state of the worker pool
+_generator = None
+_db = None
+
+
+def _init_worker(generator: Generator, dry_run: bool):
+    global _generator, _db
+    _generator = generator
+    _db = None if dry_run else MongoClient(MONGODB_URL)[DATABASE_NAME]
+
+
+def _write(collection: str, documents: List[Dict]):
+    if _db is not None and documents:
+        _db[collection].insert_many(documents, ordered=False)
+
+
+def _run_batch(task) -> int:
+    """Generate and insert one batch (in a worker process)"""
+    collection, batch, first, size = task
+    if collection == "candidates":
+        documents, texts = _generator.candidates(batch, first, size)
+        _write("cv_texts", texts)
+    else:
+        documents = _generator.jobs(batch, first, size)
+    _write(collection, documents)
+    return size
+
+
+def generate(args):
+    end = datetime.fromisoformat(args.end).timestamp() if args.end else time.time()
+    generator = Generator(args.seed, args.days, args.skill_exponent, args.cv_ratio, end)
+    if not args.dry_run and args.drop:
+        db = MongoClient(MONGODB_URL)[DATABASE_NAME]
+        for collection in ("candidates", "jobs", "cv_texts"):
+            db[collection].drop()
+
+    # Generation is CPU bound: one process per core, each inserting its own batches
+    with ProcessPoolExecutor(args.processes, initializer=_init_worker,
+                             initargs=(generator, args.dry_run)) as pool:
+        for collection, total in (("jobs", args.jobs), ("candidates", args.candidates)):
+            started = time.perf_counter()
+            tasks = [(collection, *batch) for batch in batches(total, args.batch_size)]
+            done = sum(pool.map(_run_batch, tasks))
+            elapsed = time.perf_counter() - started
+            if total:
+                print(f"✅ {done} {collection} in {elapsed:.1f}s ({done / elapsed:,.0f} docs/s)")
+
+    if not args.dry_run:
+        bump_generations(args.redis_url)
+        print("📊 Rebuild derived analytics with: cd backend && python -m app.analytics.rollups")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk synthetic data generator")
+    parser.add_argument("--candidates", type=int, default=100000)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000, help="documents per insert_many")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="generator processes")
+    parser.add_argument("--days", type=int, default=365, help="created_at spread, in days up to --end")
+    parser.add_argument("--end", help="latest created_at (ISO date, default now), fix it for identical reruns")
+    parser.add_argument("--skill-exponent", type=float, default=1.1, help="Zipf exponent of skill popularity")
+    parser.add_argument("--cv-ratio", type=float, default=0.3, help="fraction of candidates with a CV text")
+    parser.add_argument("--drop", action="store_true", help="empty candidates, jobs and cv_texts first")
+    parser.add_argument("--dry-run", action="store_true", help="generate without writing (generator speed)")
+    parser.add_argument("--redis-url", default=REDIS_URL)
+    args = parser.parse_args()
+
+    print("🚀 Generating bulk data...")
+    generate(args)